@@ -1,6 +1,11 @@
 import argparse
 
 from scripts.analysis.analyze_ev_distribution import main_cli as analyze_ev_main
+from scripts.analysis.compare_strategies import DEFAULT_STRATEGIES
+from scripts.analysis.compare_strategies import main_cli as compare_strategies_main
+from scripts.analysis.monte_carlo import MODES as MONTE_CARLO_MODES
+from scripts.analysis.monte_carlo import STAKING as MONTE_CARLO_STAKING
+from scripts.analysis.monte_carlo import main_cli as montecarlo_main
 from scripts.analysis.plot_tournament_leaderboard import (
     main_cli as plot_leaderboard_main,
 )
@@ -10,10 +15,49 @@ from scripts.analysis.summarize_value_bets_by_match import (
 from scripts.analysis.summarize_value_bets_by_tournament import (
     main_cli as summarize_tournaments_main,
 )
+from scripts.analysis.threshold_sweep import DEFAULT_SWEEP_GRIDS
+from scripts.analysis.threshold_sweep import main_cli as sweep_main
+from scripts.features.store import add_feature_store_args
+from scripts.modeling.cross_validation import CV_SPLITTERS
+from scripts.modeling.numpy_export import main_cli as export_model_main
+from scripts.modeling.registry import add_registry_args
 from scripts.modeling.train_ev_filter_model import main_cli as train_filter_main
 from scripts.modeling.train_eval_model import main_cli as train_eval_main
+from scripts.modeling.training_dataset import add_training_data_args
+from scripts.modeling.training_dataset import main_cli as build_dataset_main
+from scripts.modeling.tune import RESOURCES as TUNE_RESOURCES
+from scripts.modeling.tune import SCORINGS as TUNE_SCORINGS
+from scripts.modeling.tune import main_cli as tune_main
 from scripts.pipeline.run_full_pipeline import main as run_pipeline_main
-from scripts.utils.constants import DEFAULT_EV_THRESHOLD, DEFAULT_MAX_ODDS
+from scripts.pipeline.simulate_bankroll_growth import (
+    STRATEGIES as SIMULATION_STRATEGIES,
+)
+from scripts.pipeline.simulate_season import main_cli as simulate_season_main
+from scripts.pipeline.stream_value_bets import main_cli as stream_detect_main
+from scripts.pipeline.walk_forward import STRATEGIES as WALK_FORWARD_STRATEGIES
+from scripts.pipeline.walk_forward import main_cli as walk_forward_main
+from scripts.serving.load_test import main_cli as serve_bench_main
+from scripts.serving.server import main_cli as serve_main
+from scripts.utils.constants import (
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    DEFAULT_CV_CACHE_DIR,
+    DEFAULT_CV_SPLITS,
+    DEFAULT_DATASET_CHUNK_ROWS,
+    DEFAULT_EV_HYSTERESIS,
+    DEFAULT_EV_THRESHOLD,
+    DEFAULT_FLAT_STAKE,
+    DEFAULT_INITIAL_BANKROLL,
+    DEFAULT_KELLY_MAX_EXPOSURE,
+    DEFAULT_KELLY_WINDOW_FREQ,
+    DEFAULT_MAX_MARGIN,
+    DEFAULT_MAX_ODDS,
+    DEFAULT_SERVE_MAX_BATCH,
+    DEFAULT_SERVE_MAX_WAIT_MS,
+    DEFAULT_SERVE_PORT,
+    DEFAULT_SIMULATION_STATE_DIR,
+    DEFAULT_TRAINING_DATASET,
+    DEFAULT_WALK_FORWARD_CACHE_DIR,
+)
 
 
 def main():
@@ -54,6 +98,11 @@ def main():
         action="store_true",
         help="Overwrite existing output files for each stage.",
     )
+    p_pipeline.add_argument(
+        "--batch_predict",
+        action="store_true",
+        help="In batch mode, score all labels' features in one predict call.",
+    )
     p_pipeline.add_argument(
         "--working_dir",
         default="data/processed",
@@ -71,39 +120,139 @@ def main():
     p_model = subparsers.add_parser("model", help="Train and evaluate models")
     model_subparsers = p_model.add_subparsers(dest="model_command", required=True)
 
-    p_train_eval = model_subparsers.add_parser(
-        "train-eval", help="Train and evaluate a general classification model"
+    p_build_dataset = model_subparsers.add_parser(
+        "build-dataset",
+        help="Build the deduplicated training table from value bet CSVs",
     )
-    p_train_eval.add_argument(
+    p_build_dataset.add_argument(
         "--input_glob",
         required=True,
-        help="Glob pattern for value bet CSVs for training.",
+        help="Glob pattern for value bet CSVs (overlapping files are fine).",
+    )
+    p_build_dataset.add_argument("--output", default=DEFAULT_TRAINING_DATASET)
+    p_build_dataset.add_argument(
+        "--chunk_rows",
+        type=int,
+        default=DEFAULT_DATASET_CHUNK_ROWS,
+        help="Rows read per chunk.",
+    )
+    p_build_dataset.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild even if the source files are unchanged.",
+    )
+    p_build_dataset.set_defaults(
+        func=build_dataset_main, verbose=False, json_logs=False
     )
+
+    p_train_eval = model_subparsers.add_parser(
+        "train-eval", help="Train and evaluate a general classification model"
+    )
+    add_training_data_args(p_train_eval)
     p_train_eval.add_argument(
-        "--output_model", required=True, help="Path to save the trained model file."
+        "--output_model",
+        default=None,
+        help="Optional path for a copy of the model outside the registry.",
     )
     p_train_eval.add_argument("--algorithm", choices=["rf", "logreg"], default="rf")
-    p_train_eval.add_argument("--test_size", type=float, default=0.25)
+    p_train_eval.add_argument(
+        "--n_splits", type=int, default=DEFAULT_CV_SPLITS, help="CV folds."
+    )
+    p_train_eval.add_argument(
+        "--cv",
+        choices=CV_SPLITTERS,
+        default="stratified_group",
+        help="Grouped K-fold splitter (folds grouped by match_id).",
+    )
+    p_train_eval.add_argument(
+        "--n_jobs",
+        type=int,
+        default=1,
+        help="Core budget shared by parallel folds and each fold's model.",
+    )
+    p_train_eval.add_argument(
+        "--cv_cache_dir",
+        default=DEFAULT_CV_CACHE_DIR,
+        help="Directory for cached fold matrices.",
+    )
+    add_feature_store_args(p_train_eval)
+    add_registry_args(p_train_eval, "eval")
     p_train_eval.set_defaults(
         func=train_eval_main, verbose=False, json_logs=False, dry_run=False
     )
 
+    p_tune = model_subparsers.add_parser(
+        "tune", help="Successive-halving hyperparameter search with grouped CV"
+    )
+    add_training_data_args(p_tune)
+    p_tune.add_argument(
+        "--output_model", required=True, help="Path to save the best model file."
+    )
+    p_tune.add_argument("--algorithm", choices=["rf", "logreg"], default="rf")
+    p_tune.add_argument(
+        "--search_space",
+        default=None,
+        help="JSON file mapping parameters to candidate values.",
+    )
+    p_tune.add_argument(
+        "--resource",
+        choices=TUNE_RESOURCES,
+        default="n_samples",
+        help="What promising candidates get more of: training rows or trees.",
+    )
+    p_tune.add_argument("--n_candidates", type=int, default=27)
+    p_tune.add_argument(
+        "--eta", type=int, default=3, help="Keep 1/eta candidates per round."
+    )
+    p_tune.add_argument("--min_resource", type=int, default=None)
+    p_tune.add_argument("--max_resource", type=int, default=None)
+    p_tune.add_argument("--scoring", choices=TUNE_SCORINGS, default="log_loss")
+    p_tune.add_argument("--n_splits", type=int, default=DEFAULT_CV_SPLITS)
+    p_tune.add_argument("--cv", choices=CV_SPLITTERS, default="stratified_group")
+    p_tune.add_argument("--n_jobs", type=int, default=1)
+    p_tune.add_argument(
+        "--budget_seconds",
+        type=float,
+        default=None,
+        help="Wall-clock budget for the search.",
+    )
+    p_tune.add_argument("--cv_cache_dir", default=DEFAULT_CV_CACHE_DIR)
+    add_feature_store_args(p_tune)
+    p_tune.set_defaults(func=tune_main, verbose=False, json_logs=False, dry_run=False)
+
     p_train_filter = model_subparsers.add_parser(
         "train-filter", help="Train the simpler EV filter model"
     )
+    add_training_data_args(p_train_filter)
     p_train_filter.add_argument(
-        "--input_glob",
-        required=True,
-        help="Glob pattern for value bet CSVs for training.",
+        "--output_model",
+        default=None,
+        help="Optional path for a copy of the model outside the registry.",
     )
+    p_train_filter.add_argument("--min_ev", type=float, default=DEFAULT_EV_THRESHOLD)
     p_train_filter.add_argument(
-        "--output_model", required=True, help="Path to save the trained model file."
+        "--incremental",
+        action="store_true",
+        help="Update an online model with only new/changed input files.",
     )
-    p_train_filter.add_argument("--min_ev", type=float, default=DEFAULT_EV_THRESHOLD)
+    add_feature_store_args(p_train_filter)
+    add_registry_args(p_train_filter, "ev_filter")
     p_train_filter.set_defaults(
         func=train_filter_main, verbose=False, json_logs=False, dry_run=False
     )
 
+    p_export = model_subparsers.add_parser(
+        "export", help="Export a trained model to the numpy inference format"
+    )
+    p_export.add_argument(
+        "--model_file", required=True, help="Path to the joblib model file."
+    )
+    p_export.add_argument(
+        "--output_file", required=True, help="Path to write the .npz model."
+    )
+    p_export.add_argument("--dry_run", action="store_true")
+    p_export.set_defaults(func=export_model_main, verbose=False, json_logs=False)
+
     # --- Analysis Commands ---
     p_analysis = subparsers.add_parser(
         "analysis", help="Run analysis and generate plots"
@@ -182,10 +331,330 @@ def main():
         func=plot_leaderboard_main, verbose=False, json_logs=False, dry_run=False
     )
 
+    p_sweep = analysis_subparsers.add_parser(
+        "sweep", help="Evaluate a grid of value bet thresholds (ROI surface)"
+    )
+    p_sweep.add_argument(
+        "--input_glob",
+        required=True,
+        help="Glob pattern for prediction or value bet CSVs with winners.",
+    )
+    p_sweep.add_argument(
+        "--output_csv",
+        default="data/analysis/threshold_sweep.csv",
+        help="Path to save the ROI surface table.",
+    )
+    for name, help_text in (
+        ("ev_grid", "EV thresholds"),
+        ("confidence_grid", "Confidence thresholds"),
+        ("max_odds_grid", "Max odds limits"),
+        ("max_margin_grid", "Max margin limits"),
+    ):
+        p_sweep.add_argument(
+            f"--{name}",
+            default=DEFAULT_SWEEP_GRIDS[name],
+            help=f"{help_text} as 'start:stop:step' or 'a,b,c'.",
+        )
+    p_sweep.add_argument(
+        "--min_bets",
+        type=int,
+        default=20,
+        help="Minimum bets for a combination to be reported as a top result.",
+    )
+    p_sweep.add_argument("--top_n", type=int, default=10)
+    p_sweep.add_argument(
+        "--no_drawdown",
+        action="store_true",
+        help="Skip the (path dependent) max drawdown computation.",
+    )
+    p_sweep.add_argument(
+        "--dry_run", action="store_true", help="Log results without writing files."
+    )
+    p_sweep.add_argument("--verbose", action="store_true")
+    p_sweep.add_argument("--json_logs", action="store_true")
+    p_sweep.set_defaults(func=sweep_main)
+
+    p_montecarlo = analysis_subparsers.add_parser(
+        "montecarlo", help="Monte Carlo bankroll paths: ruin, drawdown, quantiles"
+    )
+    p_montecarlo.add_argument(
+        "--input_glob", required=True, help="Glob pattern for value bet CSVs."
+    )
+    p_montecarlo.add_argument(
+        "--output_csv",
+        default="data/analysis/montecarlo_summary.csv",
+        help="Path to save the summary table.",
+    )
+    p_montecarlo.add_argument(
+        "--paths_csv", default=None, help="Optional path for per-path metrics."
+    )
+    p_montecarlo.add_argument("--n_paths", type=int, default=100_000)
+    p_montecarlo.add_argument(
+        "--n_bets", type=int, default=None, help="Bets per path (default: all)."
+    )
+    p_montecarlo.add_argument(
+        "--mode",
+        choices=MONTE_CARLO_MODES,
+        default="resample",
+        help="Resample outcomes, bootstrap bet sequences, or both.",
+    )
+    p_montecarlo.add_argument("--staking", choices=MONTE_CARLO_STAKING, default="kelly")
+    p_montecarlo.add_argument(
+        "--kelly_multiplier", type=float, default=1.0, help="Fraction of full Kelly."
+    )
+    p_montecarlo.add_argument(
+        "--max_fraction",
+        type=float,
+        default=1.0,
+        help="Cap on the Kelly stake as a fraction of bankroll.",
+    )
+    p_montecarlo.add_argument("--flat_stake", type=float, default=DEFAULT_FLAT_STAKE)
+    p_montecarlo.add_argument(
+        "--initial_bankroll", type=float, default=DEFAULT_INITIAL_BANKROLL
+    )
+    p_montecarlo.add_argument(
+        "--ruin_fraction",
+        type=float,
+        default=0.1,
+        help="Ruin means the bankroll ever falls to this fraction of the start.",
+    )
+    p_montecarlo.add_argument("--seed", type=int, default=0)
+    p_montecarlo.add_argument(
+        "--n_jobs", type=int, default=1, help="Parallel workers for path chunks."
+    )
+    p_montecarlo.add_argument(
+        "--dry_run", action="store_true", help="Log results without writing files."
+    )
+    p_montecarlo.add_argument("--verbose", action="store_true")
+    p_montecarlo.add_argument("--json_logs", action="store_true")
+    p_montecarlo.set_defaults(func=montecarlo_main)
+
+    p_compare = analysis_subparsers.add_parser(
+        "compare-strategies", help="Compare staking strategies on the same bets"
+    )
+    p_compare.add_argument(
+        "--input_glob", required=True, help="Glob pattern for value bet CSVs."
+    )
+    p_compare.add_argument(
+        "--strategies",
+        nargs="+",
+        default=DEFAULT_STRATEGIES,
+        help="Specs like flat:10, proportional:0.02, kelly:0.25,0.5:0.05 "
+        "(multiplier:max_fraction) or capped:0.5:50 (multiplier:max_stake).",
+    )
+    p_compare.add_argument(
+        "--initial_bankroll", type=float, default=DEFAULT_INITIAL_BANKROLL
+    )
+    p_compare.add_argument("--commission", type=float, default=0.0)
+    p_compare.add_argument(
+        "--output_csv",
+        default="data/analysis/strategy_comparison.csv",
+        help="Path to save the comparison table.",
+    )
+    p_compare.add_argument(
+        "--curves_csv", default=None, help="Optional path for bankroll curves."
+    )
+    p_compare.add_argument(
+        "--plot_png", default=None, help="Optional path for the overlaid curves plot."
+    )
+    p_compare.add_argument(
+        "--show", action="store_true", help="Display the curves interactively."
+    )
+    p_compare.add_argument(
+        "--dry_run", action="store_true", help="Log results without writing files."
+    )
+    p_compare.add_argument("--verbose", action="store_true")
+    p_compare.add_argument("--json_logs", action="store_true")
+    p_compare.set_defaults(func=compare_strategies_main)
+
+    p_stream = subparsers.add_parser(
+        "detect-stream", help="Replay price snapshots through the live detector"
+    )
+    p_stream.add_argument(
+        "--snapshots_glob", required=True, help="Glob for Betfair snapshot files."
+    )
+    p_stream.add_argument(
+        "--predictions_csv", required=True, help="Predictions with match_id."
+    )
+    p_stream.add_argument(
+        "--matches_csv",
+        required=True,
+        help="Matches with match_id, market_id and selection_id_1/2.",
+    )
+    p_stream.add_argument(
+        "--output_csv", required=True, help="Path to save entry/exit signals."
+    )
+    p_stream.add_argument(
+        "--engine",
+        choices=["stream", "vectorized"],
+        default="stream",
+        help="Tick-by-tick detector or the equivalent vectorised replay.",
+    )
+    p_stream.add_argument("--ev_threshold", type=float, default=DEFAULT_EV_THRESHOLD)
+    p_stream.add_argument(
+        "--confidence_threshold", type=float, default=DEFAULT_CONFIDENCE_THRESHOLD
+    )
+    p_stream.add_argument("--max_odds", type=float, default=DEFAULT_MAX_ODDS)
+    p_stream.add_argument("--max_margin", type=float, default=DEFAULT_MAX_MARGIN)
+    p_stream.add_argument(
+        "--ev_hysteresis",
+        type=float,
+        default=DEFAULT_EV_HYSTERESIS,
+        help="How far EV must fall below the threshold to withdraw a signal.",
+    )
+    p_stream.add_argument(
+        "--dry_run", action="store_true", help="Log actions without writing files."
+    )
+    p_stream.add_argument("--verbose", action="store_true")
+    p_stream.add_argument("--json_logs", action="store_true")
+    p_stream.set_defaults(func=stream_detect_main)
+
+    p_season = subparsers.add_parser(
+        "simulate-season",
+        help="Simulate the season's bets, resuming from a saved checkpoint",
+    )
+    p_season.add_argument(
+        "--input_glob", required=True, help="Glob for all of the season's value bets."
+    )
+    p_season.add_argument(
+        "--output_csv", default=None, help="Optional path for the season simulation."
+    )
+    p_season.add_argument(
+        "--state_dir",
+        default=DEFAULT_SIMULATION_STATE_DIR,
+        help="Directory holding one checkpoint per strategy.",
+    )
+    p_season.add_argument(
+        "--name", default=None, help="Checkpoint name (defaults to the strategy)."
+    )
+    p_season.add_argument("--strategy", choices=SIMULATION_STRATEGIES, default="kelly")
+    p_season.add_argument(
+        "--initial_bankroll", type=float, default=DEFAULT_INITIAL_BANKROLL
+    )
+    p_season.add_argument("--flat_stake", type=float, default=DEFAULT_FLAT_STAKE)
+    p_season.add_argument("--max_stake", type=float, default=None)
+    p_season.add_argument("--window_col", default="market_time")
+    p_season.add_argument("--window_freq", default=DEFAULT_KELLY_WINDOW_FREQ)
+    p_season.add_argument(
+        "--max_exposure", type=float, default=DEFAULT_KELLY_MAX_EXPOSURE
+    )
+    p_season.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Discard the checkpoint and simulate from scratch.",
+    )
+    p_season.add_argument("--verbose", action="store_true")
+    p_season.add_argument("--json_logs", action="store_true")
+    p_season.set_defaults(func=simulate_season_main)
+
+    p_walk = subparsers.add_parser(
+        "walk-forward",
+        help="Walk-forward backtest: train on earlier tournaments, bet on the next",
+    )
+    p_walk.add_argument(
+        "--input_glob",
+        required=True,
+        help="Glob for labeled feature tables, one tournament per file.",
+    )
+    p_walk.add_argument(
+        "--output_csv", default=None, help="Optional path for the bet ledger."
+    )
+    p_walk.add_argument(
+        "--summary_csv", default=None, help="Optional path for the fold summary."
+    )
+    p_walk.add_argument("--algorithm", choices=["rf", "logreg"], default="rf")
+    p_walk.add_argument(
+        "--params", default=None, help="Model hyperparameters as a JSON object."
+    )
+    p_walk.add_argument(
+        "--features",
+        nargs="+",
+        default=None,
+        help="Model features (defaults to the predict stage's).",
+    )
+    p_walk.add_argument("--min_train_tournaments", type=int, default=1)
+    p_walk.add_argument(
+        "--date_col",
+        default=None,
+        help="Column dating each row (defaults to market_time or match_date).",
+    )
+    p_walk.add_argument("--ev_threshold", type=float, default=DEFAULT_EV_THRESHOLD)
+    p_walk.add_argument(
+        "--confidence_threshold", type=float, default=DEFAULT_CONFIDENCE_THRESHOLD
+    )
+    p_walk.add_argument("--max_odds", type=float, default=DEFAULT_MAX_ODDS)
+    p_walk.add_argument("--max_margin", type=float, default=DEFAULT_MAX_MARGIN)
+    p_walk.add_argument("--strategy", choices=WALK_FORWARD_STRATEGIES, default="kelly")
+    p_walk.add_argument(
+        "--initial_bankroll", type=float, default=DEFAULT_INITIAL_BANKROLL
+    )
+    p_walk.add_argument("--flat_stake", type=float, default=DEFAULT_FLAT_STAKE)
+    p_walk.add_argument("--max_stake", type=float, default=None)
+    p_walk.add_argument(
+        "--n_jobs", type=int, default=1, help="Worker processes for the folds."
+    )
+    p_walk.add_argument("--cache_dir", default=DEFAULT_WALK_FORWARD_CACHE_DIR)
+    p_walk.add_argument("--verbose", action="store_true")
+    p_walk.add_argument("--json_logs", action="store_true")
+    p_walk.set_defaults(func=walk_forward_main)
+
+    # --- Serving Commands ---
+    p_serve = subparsers.add_parser(
+        "serve", help="Run the local micro-batching scoring service"
+    )
+    p_serve.add_argument(
+        "--model_file", required=True, help="Path to a joblib or exported .npz model."
+    )
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=DEFAULT_SERVE_PORT)
+    p_serve.add_argument(
+        "--unix_socket", default=None, help="Listen on a Unix socket instead of TCP."
+    )
+    p_serve.add_argument(
+        "--max_batch",
+        type=int,
+        default=DEFAULT_SERVE_MAX_BATCH,
+        help="Maximum rows per model call.",
+    )
+    p_serve.add_argument(
+        "--max_wait_ms",
+        type=float,
+        default=DEFAULT_SERVE_MAX_WAIT_MS,
+        help="How long a batch may wait for more requests.",
+    )
+    p_serve.add_argument("--ev_threshold", type=float, default=DEFAULT_EV_THRESHOLD)
+    p_serve.add_argument(
+        "--confidence_threshold", type=float, default=DEFAULT_CONFIDENCE_THRESHOLD
+    )
+    p_serve.add_argument("--max_odds", type=float, default=DEFAULT_MAX_ODDS)
+    p_serve.add_argument("--max_margin", type=float, default=DEFAULT_MAX_MARGIN)
+    p_serve.add_argument("--verbose", action="store_true")
+    p_serve.add_argument("--json_logs", action="store_true")
+    p_serve.set_defaults(func=serve_main)
+
+    p_serve_bench = subparsers.add_parser(
+        "serve-bench", help="Benchmark a running scoring service"
+    )
+    p_serve_bench.add_argument("--host", default="127.0.0.1")
+    p_serve_bench.add_argument("--port", type=int, default=DEFAULT_SERVE_PORT)
+    p_serve_bench.add_argument("--unix_socket", default=None)
+    p_serve_bench.add_argument(
+        "--concurrency", type=int, default=16, help="Concurrent connections."
+    )
+    p_serve_bench.add_argument(
+        "--requests", type=int, default=200, help="Requests per connection."
+    )
+    p_serve_bench.add_argument("--rows_per_request", type=int, default=1)
+    p_serve_bench.set_defaults(func=serve_bench_main, verbose=False, json_logs=False)
+
     args = parser.parse_args()
 
     # Call the appropriate function with the parsed args
-    args.func(args) if args.command != "pipeline" else args.func(**vars(args))
+    if args.command == "pipeline":
+        kwargs = {k: v for k, v in vars(args).items() if k not in ("command", "func")}
+        args.func(**kwargs)
+    else:
+        args.func(args)
 
 
 if __name__ == "__main__":
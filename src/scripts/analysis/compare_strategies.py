@@ -0,0 +1,191 @@
+"""
+Compare staking strategies over the same bet sequence.
+
+Strategies are given as "kind:param[:param]" specs, where each parameter may
+be a comma-separated list; a spec expands to every combination of its
+parameters. All resulting strategies are simulated together on
+(strategies, bets) arrays, e.g. "kelly:0.01:0.02" reproduces 1% Kelly capped
+at 2% of bankroll.
+
+    flat:stake                      fixed stake, never more than the bankroll
+    proportional:fraction           fixed fraction of the current bankroll
+    kelly:multiplier[:max_fraction] fractional Kelly, capped fraction of bankroll
+    capped:multiplier:max_stake     fractional Kelly with a cap on the stake
+"""
+
+import itertools
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from scripts.utils.betting_math import compute_kelly_stake_capped
+from scripts.utils.constants import DEFAULT_INITIAL_BANKROLL
+from scripts.utils.file_utils import load_dataframes
+from scripts.utils.logger import log_info, log_success, setup_logging
+from scripts.utils.schema import normalize_columns, patch_winner_column
+from scripts.utils.simulation import simulate_bankroll_matrix
+
+# Parameter names per strategy kind; trailing entries with defaults are optional
+STRATEGY_PARAMS: Dict[str, Tuple[str, ...]] = {
+    "flat": ("stake",),
+    "proportional": ("fraction",),
+    "kelly": ("multiplier", "max_fraction"),
+    "capped": ("multiplier", "max_stake"),
+}
+_PARAM_DEFAULTS = {"max_fraction": 1.0}
+
+DEFAULT_STRATEGIES = [
+    "flat:10",
+    "proportional:0.01,0.02",
+    "kelly:1",
+    "kelly:0.25,0.5:0.05",
+    "capped:0.5:50",
+]
+
+
+def parse_strategies(specs: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Expand strategy specs into one dict per strategy with its "strategy"
+    label, "kind" and parameters.
+    """
+    strategies = []
+    for spec in specs:
+        kind, *values = spec.split(":")
+        if kind not in STRATEGY_PARAMS:
+            raise ValueError(
+                f"Unknown strategy: {kind!r}. Valid: {list(STRATEGY_PARAMS)}"
+            )
+        names = STRATEGY_PARAMS[kind]
+        required = [n for n in names if n not in _PARAM_DEFAULTS]
+        if not len(required) <= len(values) <= len(names):
+            raise ValueError(f"Strategy {spec!r} expects parameters {names}")
+        grids = [[float(v) for v in value.split(",")] for value in values]
+        grids += [[_PARAM_DEFAULTS[n]] for n in names[len(values) :]]
+        for combo in itertools.product(*grids):
+            label = ":".join([kind, *(f"{v:g}" for v in combo[: len(values)])])
+            strategies.append(
+                {"strategy": label, "kind": kind, **dict(zip(names, combo))}
+            )
+    return strategies
+
+
+def compare_strategies(
+    df: pd.DataFrame,
+    strategies: Iterable[str] = tuple(DEFAULT_STRATEGIES),
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    commission: float = 0.0,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simulate every strategy over the bets in `df` (in market_time order when
+    available).
+
+    :return: A comparison table with one row per strategy (bets placed,
+        staked, profit, ROI, final/max/min bankroll, max drawdown as a
+        fraction of peak and log growth) and the bankroll curves after each
+        bet, one column per strategy.
+    """
+    parsed = parse_strategies(strategies)
+    df = patch_winner_column(normalize_columns(df))
+    df = df.dropna(subset=["predicted_prob", "odds", "winner"])
+    if "market_time" in df.columns:
+        df = df.sort_values("market_time", kind="stable")
+    prob, odds = df["predicted_prob"].to_numpy(float), df["odds"].to_numpy(float)
+
+    fractions = np.empty((len(parsed), len(df)))
+    max_stakes = np.full(len(parsed), np.inf)
+    for row, s in enumerate(parsed):
+        if s["kind"] == "flat":
+            fractions[row], max_stakes[row] = 1.0, s["stake"]
+        elif s["kind"] == "proportional":
+            fractions[row] = s["fraction"]
+        else:
+            compute_kelly_stake_capped(
+                prob,
+                odds,
+                fraction=s["multiplier"],
+                cap=s.get("max_fraction", 1.0),
+                commission=commission,
+                out=fractions[row],
+            )
+            max_stakes[row] = s.get("max_stake", np.inf)
+
+    bankroll, stake, pnl = simulate_bankroll_matrix(
+        odds,
+        df["winner"].to_numpy() == 1,
+        fractions,
+        initial_bankroll,
+        max_stakes,
+        commission,
+    )
+    after = bankroll + pnl
+    peak = np.maximum.accumulate(np.maximum(after, initial_bankroll), axis=1)
+    final = after[:, -1] if len(df) else np.full(len(parsed), initial_bankroll)
+    staked = stake.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = pd.DataFrame(
+            {
+                "strategy": [s["strategy"] for s in parsed],
+                "bets": (stake > 0).sum(axis=1),
+                "staked": staked,
+                "profit": final - initial_bankroll,
+                "roi": np.where(staked > 0, (final - initial_bankroll) / staked, 0.0),
+                "final_bankroll": final,
+                "max_bankroll": peak.max(axis=1, initial=initial_bankroll),
+                "min_bankroll": after.min(axis=1, initial=initial_bankroll),
+                "max_drawdown": (1.0 - after / peak).max(axis=1, initial=0.0),
+                "log_growth": np.log(final / initial_bankroll),
+            }
+        )
+    curves = pd.DataFrame(after.T, columns=table["strategy"].tolist())
+    return table, curves
+
+
+def plot_curves(
+    curves: pd.DataFrame, output_png: Optional[str] = None, show: bool = False
+) -> None:
+    """
+    Overlay the bankroll curves of all strategies in one figure.
+    """
+    fig = plt.figure(figsize=(10, 6))
+    for strategy in curves.columns:
+        plt.plot(curves[strategy].to_numpy(), label=strategy)
+    plt.xlabel("Bet #")
+    plt.ylabel("Bankroll")
+    plt.title("Bankroll Evolution by Staking Strategy")
+    plt.legend()
+    plt.tight_layout()
+    if output_png:
+        Path(output_png).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(output_png)
+        log_success(f"Saved strategy curves to {output_png}")
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    df = load_dataframes(args.input_glob)
+    table, curves = compare_strategies(
+        df, args.strategies, args.initial_bankroll, args.commission
+    )
+    log_info(
+        f"Compared {len(table)} strategies over {len(curves)} bets:\n"
+        f"{table.to_string(index=False)}"
+    )
+    if args.show or (args.plot_png and not args.dry_run):
+        plot_curves(curves, None if args.dry_run else args.plot_png, args.show)
+    if args.dry_run:
+        return
+    Path(args.output_csv).parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.output_csv, index=False)
+    log_success(f"Saved strategy comparison to {args.output_csv}")
+    if args.curves_csv:
+        curves.to_csv(args.curves_csv, index_label="bet")
+        log_success(f"Saved bankroll curves to {args.curves_csv}")
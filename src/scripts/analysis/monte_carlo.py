@@ -0,0 +1,211 @@
+"""
+Monte Carlo bankroll engine: distributions of final bankroll, drawdown, ruin
+and time-to-double over many simulated bet sequences.
+
+Paths are simulated as (paths, bets) arrays in chunks of bounded size. Each
+chunk draws from its own child of one SeedSequence, so results depend only
+on the seed and chunk size, not on how chunks are spread over workers.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from scripts.utils.betting_math import compute_kelly_stake_capped, net_odds
+from scripts.utils.constants import DEFAULT_FLAT_STAKE, DEFAULT_INITIAL_BANKROLL
+from scripts.utils.file_utils import load_dataframes
+from scripts.utils.logger import log_info, log_success, setup_logging
+from scripts.utils.schema import normalize_columns, patch_winner_column
+
+MODES = ("resample", "bootstrap", "both")
+STAKING = ("kelly", "flat")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Upper bound on (paths x bets) cells simulated per chunk
+DEFAULT_CHUNK_CELLS = 2_000_000
+
+
+def _simulate_chunk(
+    bets: Dict[str, np.ndarray],
+    n_paths: int,
+    n_steps: int,
+    mode: str,
+    staking: str,
+    flat_stake: float,
+    initial_bankroll: float,
+    seed: np.random.SeedSequence,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate `n_paths` sequences of `n_steps` bets and return per-path
+    metrics.
+    """
+    rng = np.random.default_rng(seed)
+    if mode == "resample":
+        # Cycle through the bets in order when n_steps differs from their count
+        idx: Any = np.arange(n_steps) % len(bets["prob"])
+        prob = np.broadcast_to(bets["prob"][idx], (n_paths, n_steps))
+    else:
+        idx = rng.integers(0, len(bets["prob"]), (n_paths, n_steps))
+        prob = bets["prob"][idx]
+    if mode == "bootstrap":
+        won = bets["won"][idx]
+    else:
+        won = rng.random((n_paths, n_steps)) < prob
+    returns = np.where(won, bets["net"][idx], -1.0)
+
+    if staking == "kelly":
+        bankroll = initial_bankroll * np.cumprod(
+            1.0 + bets["fraction"][idx] * returns, axis=1
+        )
+    else:
+        pnl = flat_stake * returns
+        before = initial_bankroll + np.cumsum(pnl, axis=1) - pnl
+        # Stop betting for good once the bankroll cannot cover the stake
+        pnl *= np.logical_and.accumulate(before >= flat_stake, axis=1)
+        bankroll = initial_bankroll + np.cumsum(pnl, axis=1)
+
+    peak = np.maximum.accumulate(np.maximum(bankroll, initial_bankroll), axis=1)
+    doubled = bankroll >= 2 * initial_bankroll
+    return {
+        "final_bankroll": bankroll[:, -1],
+        "min_bankroll": bankroll.min(axis=1),
+        "max_drawdown": (1.0 - bankroll / peak).max(axis=1),
+        "bets_to_double": np.where(
+            doubled.any(axis=1), doubled.argmax(axis=1) + 1.0, np.nan
+        ),
+    }
+
+
+def simulate_paths(
+    df: pd.DataFrame,
+    n_paths: int = 100_000,
+    mode: str = "resample",
+    staking: str = "kelly",
+    kelly_multiplier: float = 1.0,
+    max_fraction: float = 1.0,
+    flat_stake: float = DEFAULT_FLAT_STAKE,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    n_bets: Optional[int] = None,
+    seed: int = 0,
+    n_jobs: int = 1,
+    chunk_cells: int = DEFAULT_CHUNK_CELLS,
+) -> pd.DataFrame:
+    """
+    Per-path metrics for Monte Carlo bankroll paths over the bets in `df`.
+
+    :param mode: "resample" draws each bet's outcome from predicted_prob in
+        the original order; "bootstrap" draws bet sequences with replacement
+        and keeps their actual outcomes; "both" bootstraps sequences and
+        resamples their outcomes.
+    :param staking: "kelly" stakes kelly_multiplier x Kelly of the current
+        bankroll, capped at max_fraction; "flat" stakes flat_stake until the
+        bankroll cannot cover it.
+    :param n_bets: Bets per path (defaults to the number of bets in `df`). In
+        resample mode the bets repeat in their original order to fill it.
+    :return: One row per path with final_bankroll, min_bankroll,
+        max_drawdown (fraction of peak) and bets_to_double.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode!r}. Valid: {MODES}")
+    if staking not in STAKING:
+        raise ValueError(f"Unknown staking: {staking!r}. Valid: {STAKING}")
+    df = patch_winner_column(normalize_columns(df))
+    df = df.dropna(subset=["predicted_prob", "odds"])
+    if "market_time" in df.columns:
+        df = df.sort_values("market_time", kind="stable")
+    if mode == "bootstrap" and "winner" not in df.columns:
+        raise ValueError("Bootstrap mode needs a winner column.")
+    bets = {
+        "prob": df["predicted_prob"].to_numpy(dtype=float),
+        "net": net_odds(df["odds"]),
+        "fraction": compute_kelly_stake_capped(
+            df["predicted_prob"],
+            df["odds"],
+            fraction=kelly_multiplier,
+            cap=max_fraction,
+        ),
+        "won": df.get("winner", pd.Series(0, index=df.index)).to_numpy() == 1,
+    }
+    n_steps = n_bets or len(df)
+    per_chunk = max(1, chunk_cells // max(n_steps, 1))
+    sizes = [min(per_chunk, n_paths - s) for s in range(0, n_paths, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    log_info(
+        f"Simulating {n_paths} paths of {n_steps} bets ({mode}, {staking}) "
+        f"in {len(sizes)} chunks"
+    )
+    chunks = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_simulate_chunk)(
+            bets, size, n_steps, mode, staking, flat_stake, initial_bankroll, s
+        )
+        for size, s in zip(sizes, seeds)
+    )
+    return pd.DataFrame({k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]})
+
+
+def summarize_paths(
+    paths: pd.DataFrame,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    ruin_fraction: float = 0.1,
+) -> pd.DataFrame:
+    """
+    Summary table (metric, value): final-bankroll and max-drawdown
+    quantiles, risk of ruin (bankroll ever at or below ruin_fraction of the
+    start), probability of doubling and time-to-double quantiles.
+    """
+    rows = [("paths", float(len(paths)))]
+    rows += [
+        (f"final_bankroll_q{int(q * 100):02d}", paths["final_bankroll"].quantile(q))
+        for q in QUANTILES
+    ]
+    rows += [
+        ("mean_log_growth", np.log(paths["final_bankroll"] / initial_bankroll).mean()),
+        (
+            "risk_of_ruin",
+            (paths["min_bankroll"] <= ruin_fraction * initial_bankroll).mean(),
+        ),
+    ]
+    rows += [
+        (f"max_drawdown_q{int(q * 100):02d}", paths["max_drawdown"].quantile(q))
+        for q in QUANTILES
+    ]
+    rows.append(("prob_double", paths["bets_to_double"].notna().mean()))
+    rows += [
+        (f"bets_to_double_q{int(q * 100):02d}", paths["bets_to_double"].quantile(q))
+        for q in (0.25, 0.5, 0.75)
+    ]
+    return pd.DataFrame(rows, columns=["metric", "value"])
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    df = load_dataframes(args.input_glob)
+    paths = simulate_paths(
+        df,
+        n_paths=args.n_paths,
+        mode=args.mode,
+        staking=args.staking,
+        kelly_multiplier=args.kelly_multiplier,
+        max_fraction=args.max_fraction,
+        flat_stake=args.flat_stake,
+        initial_bankroll=args.initial_bankroll,
+        n_bets=args.n_bets,
+        seed=args.seed,
+        n_jobs=args.n_jobs,
+    )
+    summary = summarize_paths(paths, args.initial_bankroll, args.ruin_fraction)
+    log_info(f"Monte Carlo summary:\n{summary.to_string(index=False)}")
+    if args.dry_run:
+        return
+    Path(args.output_csv).parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(args.output_csv, index=False)
+    log_success(f"Saved Monte Carlo summary to {args.output_csv}")
+    if args.paths_csv:
+        paths.to_csv(args.paths_csv, index=False)
+        log_success(f"Saved per-path metrics to {args.paths_csv}")
@@ -0,0 +1,209 @@
+"""
+Vectorised sweep of detect_value_bets thresholds: bets, profit, ROI and max
+drawdown for every combination of a parameter grid from one pass over the bets.
+"""
+
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.betting_math import ev_and_kelly
+from scripts.utils.constants import DEFAULT_MAX_MARGIN, DEFAULT_MAX_ODDS
+from scripts.utils.file_utils import load_dataframes
+from scripts.utils.logger import log_info, log_success, setup_logging
+from scripts.utils.schema import normalize_columns, patch_winner_column
+
+SWEEP_PARAMS = ["ev_threshold", "confidence_threshold", "max_odds", "max_margin"]
+
+# Default grids around the pipeline thresholds: "start:stop:step" or "a,b,c"
+DEFAULT_SWEEP_GRIDS = {
+    "ev_grid": "0:0.3:0.01",
+    "confidence_grid": "0.5:0.8:0.025",
+    "max_odds_grid": f"1.5,2,2.5,3,4,5,{DEFAULT_MAX_ODDS:g},10",
+    "max_margin_grid": f"1.05,1.1,{DEFAULT_MAX_MARGIN:g},1.2,inf",
+}
+
+# Upper bound on (combinations x bets) cells per drawdown block
+_DRAWDOWN_BLOCK_CELLS = 4_000_000
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    """
+    Parse a grid given as "start:stop:step" (stop inclusive) or "a,b,c".
+    """
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        n_steps = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return np.round(start + step * np.arange(n_steps), 10)
+    return np.array([float(x) for x in spec.split(",")])
+
+
+def _bet_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bets with EV, confidence, odds, margin and flat-stake P&L, in time order.
+    """
+    df = patch_winner_column(normalize_columns(df))
+    missing = [c for c in ("predicted_prob", "odds", "winner") if c not in df.columns]
+    if missing:
+        raise ValueError(f"Sweep input is missing columns: {missing}")
+    df = df.dropna(subset=["predicted_prob", "odds"])
+    if "market_time" in df.columns:
+        df = df.sort_values("market_time", kind="stable")
+    odds = df["odds"].to_numpy(dtype=float)
+    winner = df["winner"].to_numpy(dtype=float)
+    if "expected_value" in df.columns:
+        expected_value = df["expected_value"].to_numpy(dtype=float)
+    else:
+        expected_value, _ = ev_and_kelly(df["predicted_prob"], odds)
+    confidence = df.get("confidence_score", df["predicted_prob"])
+    margin = (
+        df["odds_margin"].to_numpy(dtype=float) if "odds_margin" in df.columns else None
+    )
+    bets = pd.DataFrame(
+        {
+            "expected_value": expected_value,
+            "confidence": confidence.to_numpy(dtype=float),
+            "odds": odds,
+            "margin": margin if margin is not None else np.full(len(df), -np.inf),
+            "pnl": winner * (odds - 1) - (1 - winner),
+            "win": winner,
+        }
+    )
+    # NaN sorts past every grid value, so it would clear every threshold;
+    # detect_value_bets never selects such rows
+    valid = bets[["expected_value", "confidence"]].notna().all(axis=1)
+    if not valid.all():
+        log_info(f"Dropped {int((~valid).sum())} bets with missing EV or confidence.")
+    return bets[valid].reset_index(drop=True)
+
+
+def _max_drawdowns(
+    pnl: np.ndarray, passes: np.ndarray, indices: Sequence[np.ndarray]
+) -> np.ndarray:
+    """
+    Max drawdown of cumulative flat-stake P&L for each combination, computed
+    over blocks of combinations with a (combinations, bets) mask.
+
+    :param passes: Per-criterion pass levels per bet, shape (4, n_bets).
+    :param indices: Per-criterion grid index per combination.
+    """
+    n_combos, n_bets = len(indices[0]), len(pnl)
+    drawdowns = np.zeros(n_combos)
+    block = max(1, _DRAWDOWN_BLOCK_CELLS // max(n_bets, 1))
+    ev_pass, conf_pass, odds_pass, margin_pass = passes
+    for start in range(0, n_combos, block):
+        sl = slice(start, start + block)
+        mask = (
+            (ev_pass[None, :] > indices[0][sl, None])
+            & (conf_pass[None, :] > indices[1][sl, None])
+            & (odds_pass[None, :] <= indices[2][sl, None])
+            & (margin_pass[None, :] <= indices[3][sl, None])
+        )
+        cumulative = np.cumsum(np.where(mask, pnl, 0.0), axis=1)
+        peak = np.maximum(np.maximum.accumulate(cumulative, axis=1), 0.0)
+        drawdowns[sl] = (peak - cumulative).max(axis=1, initial=0.0)
+    return drawdowns
+
+
+def sweep_thresholds(
+    df: pd.DataFrame,
+    ev_grid: Sequence[float],
+    confidence_grid: Sequence[float],
+    max_odds_grid: Sequence[float],
+    max_margin_grid: Sequence[float] = (np.inf,),
+    drawdown: bool = True,
+) -> pd.DataFrame:
+    """
+    Evaluate every combination of detect_value_bets thresholds with flat
+    1-unit stakes.
+
+    Each bet is reduced to the number of EV / confidence thresholds it clears
+    and the first max-odds / max-margin value it fits under. Bet counts and
+    profit for the whole grid then come from one 4-D histogram and cumulative
+    sums along each axis; max drawdown (path dependent) is computed from
+    blocks of combination masks.
+
+    :param df: Predictions or value bets with predicted_prob, odds and winner
+        (plus optional confidence_score, odds_margin and market_time).
+    :return: One row per combination with bets, wins, profit, roi and
+        max_drawdown.
+    """
+    bets = _bet_frame(df)
+    grids = [
+        np.sort(np.asarray(g, dtype=float))
+        for g in (
+            ev_grid,
+            confidence_grid,
+            max_odds_grid,
+            max_margin_grid,
+        )
+    ]
+    ev_g, conf_g, odds_g, margin_g = grids
+    # A bet clears thresholds [0, pass) and fits limits [pass, len)
+    passes = np.vstack(
+        [
+            np.searchsorted(ev_g, bets["expected_value"], side="right"),
+            np.searchsorted(conf_g, bets["confidence"], side="right"),
+            np.searchsorted(odds_g, bets["odds"], side="left"),
+            np.searchsorted(margin_g, bets["margin"], side="left"),
+        ]
+    )
+    shape = tuple(len(g) + 1 for g in grids)
+    flat = np.ravel_multi_index(tuple(passes), shape)
+    size = int(np.prod(shape))
+    totals = {}
+    for name, weights in (
+        ("bets", None),
+        ("wins", bets["win"].to_numpy()),
+        ("profit", bets["pnl"].to_numpy()),
+    ):
+        hist = np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+        # Thresholds keep bets with pass level > i (suffix sums, shifted by
+        # one below); limits keep bets with pass level <= k (prefix sums)
+        hist = np.flip(np.cumsum(np.flip(hist, (0, 1)), axis=0), (0, 1))
+        hist = np.flip(np.cumsum(np.flip(hist, 1), axis=1), 1)
+        hist = np.cumsum(np.cumsum(hist, axis=2), axis=3)
+        totals[name] = hist[1:, 1:, :-1, :-1].ravel()
+
+    indices = [
+        idx.ravel()
+        for idx in np.meshgrid(*(np.arange(len(g)) for g in grids), indexing="ij")
+    ]
+    result = pd.DataFrame(
+        {name: grid[idx] for name, grid, idx in zip(SWEEP_PARAMS, grids, indices)}
+    )
+    result["bets"] = totals["bets"].astype(np.int64)
+    result["wins"] = totals["wins"].astype(np.int64)
+    result["profit"] = totals["profit"]
+    result["roi"] = result["profit"] / result["bets"].replace(0, np.nan)
+    if drawdown:
+        result["max_drawdown"] = _max_drawdowns(bets["pnl"].to_numpy(), passes, indices)
+    log_info(f"Evaluated {len(result)} threshold combinations over {len(bets)} bets.")
+    return result
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    df = load_dataframes(args.input_glob)
+    surface = sweep_thresholds(
+        df,
+        parse_grid(args.ev_grid),
+        parse_grid(args.confidence_grid),
+        parse_grid(args.max_odds_grid),
+        parse_grid(args.max_margin_grid),
+        drawdown=not args.no_drawdown,
+    )
+    best = surface[surface["bets"] >= args.min_bets].nlargest(args.top_n, "roi")
+    log_info(
+        f"Top combinations by ROI (min {args.min_bets} bets):\n"
+        f"{best.to_string(index=False)}"
+    )
+    if not args.dry_run:
+        Path(args.output_csv).parent.mkdir(parents=True, exist_ok=True)
+        surface.to_csv(args.output_csv, index=False)
+        log_success(f"Saved ROI surface to {args.output_csv}")
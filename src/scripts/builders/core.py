@@ -1,31 +1,165 @@
+"""
+Single-pass match builder: Betfair market catalog + tick data -> one row per market.
+"""
+
+import argparse
+from typing import Sequence
+
+import numpy as np
 import pandas as pd
 
-from scripts.utils.cli_utils import cli_entrypoint
+from scripts.features.tick_features import prepare_ticks, traded_volume
 from scripts.utils.logger import log_info, setup_logging
-from scripts.utils.schema import enforce_schema
+from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.time_utils import to_epoch_ms
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_NIBBLE_SHIFTS = np.arange(60, -4, -4, dtype=np.uint64)
+
+
+def generate_match_ids(
+    df: pd.DataFrame, key_cols: Sequence[str] = ("market_id", "player_1", "player_2")
+) -> pd.Series:
+    """
+    Vectorised, deterministic match ids: a 64-bit hash of the key columns
+    rendered as 16 hex characters, without any per-row Python work.
+    """
+    hashes = pd.util.hash_pandas_object(
+        df[list(key_cols)].astype(str), index=False
+    ).to_numpy(dtype=np.uint64)
+    nibbles = (hashes[:, None] >> _NIBBLE_SHIFTS) & np.uint64(0xF)
+    chars = np.ascontiguousarray(_HEX_DIGITS[nibbles.astype(np.intp)])
+    ids = chars.view("S16").ravel().astype(str)
+    return pd.Series(ids, index=df.index, name="match_id")
 
 
-def build_matches_from_snapshots(snapshot_df: pd.DataFrame) -> pd.DataFrame:
-    grouped = snapshot_df.groupby(
-        ["match_id", "market", "selection"], as_index=False
-    ).agg(
-        ltp=("price", "last"), volume=("volume", "sum"), timestamp=("timestamp", "max")
+def _latest_catalog(catalog_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the last market definition per two-runner market, with the last
+    known settled time (settledTime only appears once a market settles).
+    """
+    catalog = normalize_columns(catalog_df)
+    if "settled_time" not in catalog.columns:
+        catalog["settled_time"] = pd.NA
+    settled = catalog.groupby("market_id", sort=False)["settled_time"].last()
+    catalog = catalog.dropna(subset=["player_1", "player_2"])
+    if "player_3" in catalog.columns:
+        catalog = catalog[catalog["player_3"].isna()]
+    catalog = catalog.drop_duplicates("market_id", keep="last")
+    catalog["settled_time"] = catalog["market_id"].map(settled)
+    return catalog[
+        [
+            "market_id",
+            "market_time",
+            "settled_time",
+            "player_1",
+            "player_2",
+            "selection_id_1",
+            "selection_id_2",
+        ]
+    ].reset_index(drop=True)
+
+
+def _selection_price_stats(ticks: pd.DataFrame) -> pd.DataFrame:
+    """
+    Opening/closing/VWAP price and matched volume per (market_id, selection_id)
+    from time-ordered pre-off ticks (see `prepare_ticks`).
+    """
+    keys = ["market_id", "selection_id"]
+    prevailing_ltp = ticks.groupby(keys, sort=False)["ltp"].ffill()
+    traded = traded_volume(ticks).where(prevailing_ltp.notna(), 0)
+    ticks = ticks.assign(_traded=traded, _weighted=(prevailing_ltp * traded).fillna(0))
+    stats = ticks.groupby(keys, sort=False).agg(
+        opening_ltp=("ltp", "first"),
+        closing_ltp=("ltp", "last"),
+        _weighted=("_weighted", "sum"),
+        _traded=("_traded", "sum"),
+        matched_volume=("volume", "max"),
     )
-    matches_df = enforce_schema(grouped, schema_name="matches")
-    return matches_df
+    stats["vwap"] = stats["_weighted"] / stats["_traded"].replace(0, np.nan)
+    return stats.drop(columns=["_weighted", "_traded"]).reset_index()
 
 
-@cli_entrypoint
-def main(input_path: str, output_path: str, dry_run: bool = False):
+def build_matches_from_snapshots(
+    snapshot_df: pd.DataFrame,
+    catalog_df: pd.DataFrame,
+    assume_sorted: bool = False,
+) -> pd.DataFrame:
     """
-    Entry point to build matches from snapshot CSV.
+    Build one row per two-runner market from catalog and tick data.
+
+    :param snapshot_df: Ticks from SnapshotParser "full" mode
+        (market_id, selection_id, timestamp, ltp, volume).
+    :param catalog_df: Market definitions from SnapshotParser "metadata" mode
+        (market_id, market_time, settled_time, runner_1/2, selection_id_1/2).
+    :param assume_sorted: Ticks are already ordered by timestamp.
+    :return: DataFrame following the "matches" schema.
     """
-    setup_logging()
-    df = pd.read_csv(input_path)
-    log_info("Loaded %d snapshots from %s", len(df), input_path)
-    matches_df = build_matches_from_snapshots(df)
-    if dry_run:
+    catalog = _latest_catalog(catalog_df)
+    off_ms = pd.Series(
+        to_epoch_ms(catalog["market_time"]).to_numpy(), index=catalog["market_id"]
+    )
+    ticks = prepare_ticks(snapshot_df, off_ms, assume_sorted=assume_sorted)
+    stats = _selection_price_stats(ticks)
+    catalog["market_id"] = catalog["market_id"].astype(stats["market_id"].dtype)
+
+    matches = catalog.dropna(subset=["selection_id_1", "selection_id_2"]).astype(
+        {"selection_id_1": "int64", "selection_id_2": "int64"}
+    )
+    for side in (1, 2):
+        side_stats = stats.rename(
+            columns={
+                "selection_id": f"selection_id_{side}",
+                "opening_ltp": f"opening_ltp_{side}",
+                "closing_ltp": f"closing_ltp_{side}",
+                "vwap": f"vwap_{side}",
+                "matched_volume": f"matched_volume_{side}",
+            }
+        )
+        matches = matches.merge(
+            side_stats, on=["market_id", f"selection_id_{side}"], how="left"
+        )
+    matches["total_matched_volume"] = matches[
+        ["matched_volume_1", "matched_volume_2"]
+    ].sum(axis=1, min_count=1)
+    matches["match_id"] = generate_match_ids(matches)
+
+    log_info(
+        f"Built {len(matches)} matches from {len(ticks)} pre-off ticks "
+        f"across {len(catalog)} markets."
+    )
+    return enforce_schema(matches, schema_name="matches")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(
+        description="Build one row per market from Betfair catalog and tick data."
+    )
+    parser.add_argument("--snapshots_csv", required=True)
+    parser.add_argument("--catalog_csv", required=True)
+    parser.add_argument("--output_csv", required=True)
+    parser.add_argument(
+        "--assume_sorted",
+        action="store_true",
+        help="Ticks are already ordered by timestamp; skip the sort check.",
+    )
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--dry_run", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    setup_logging(level="DEBUG" if args.verbose else "INFO")
+    snapshots = pd.read_csv(args.snapshots_csv)
+    catalog = pd.read_csv(args.catalog_csv)
+    log_info(f"Loaded {len(snapshots)} snapshots from {args.snapshots_csv}")
+    matches_df = build_matches_from_snapshots(
+        snapshots, catalog, assume_sorted=args.assume_sorted
+    )
+    if args.dry_run:
         log_info("Dry-run mode active; no file written.")
     else:
-        matches_df.to_csv(output_path, index=False)
-        log_info("Matches written to %s", output_path)
+        matches_df.to_csv(args.output_csv, index=False)
+        log_info(f"Matches written to {args.output_csv}")
+
+
+if __name__ == "__main__":
+    main_cli()
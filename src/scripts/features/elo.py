@@ -0,0 +1,351 @@
+"""
+Incremental overall and surface-specific Elo ratings over Sackmann history.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
+
+from scripts.features.sackmann import (
+    MATCH_ORDER,
+    SURFACES,
+    load_sackmann_matches,
+    sackmann_files,
+    signatures_digest,
+)
+from scripts.utils.constants import DEFAULT_ELO_RATING
+from scripts.utils.logger import log_info, log_warning
+
+SURFACE_ELO_COLUMNS = [f"elo_{s}" for s in SURFACES]
+HISTORY_COLUMNS = ["player_id", "date", "elo"] + SURFACE_ELO_COLUMNS
+ELO_FEATURES = [
+    "elo_1",
+    "elo_2",
+    "elo_diff",
+    "surface_elo_1",
+    "surface_elo_2",
+    "surface_elo_diff",
+    "elo_prob_1",
+]
+
+
+class EloEngine:
+    """
+    Overall and per-surface Elo ratings with per-player state held in numpy
+    arrays indexed by a dense player code.
+
+    The K-factor decays with experience, K = k_scale / (matches + k_offset) ** k_shape
+    (the FiveThirtyEight tennis model). Post-match ratings are recorded per
+    (player_id, date), so pre-match ratings can be looked up as of any date.
+    New matches are applied on top of the saved state; history is never
+    replayed.
+    """
+
+    def __init__(
+        self,
+        initial_rating: float = DEFAULT_ELO_RATING,
+        k_scale: float = 250.0,
+        k_offset: float = 5.0,
+        k_shape: float = 0.4,
+    ):
+        self.params = {
+            "initial_rating": initial_rating,
+            "k_scale": k_scale,
+            "k_offset": k_offset,
+            "k_shape": k_shape,
+        }
+        self.player_codes: Dict[int, int] = {}
+        self.player_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.ratings: np.ndarray = np.empty(0)
+        self.counts: np.ndarray = np.empty(0, dtype=np.int64)
+        self.surface_ratings: np.ndarray = np.empty((0, len(SURFACES)))
+        self.surface_counts: np.ndarray = np.empty((0, len(SURFACES)), dtype=np.int64)
+        self.last_key: Optional[tuple] = None
+        self.processed_files: Dict[str, list] = {}
+        self.history = pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    def _codes(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Map player ids to dense codes, growing the state arrays for new players.
+        """
+        new = [int(pid) for pid in pd.unique(ids) if pid not in self.player_codes]
+        for pid in new:
+            self.player_codes[pid] = len(self.player_codes)
+        if new:
+            self.player_ids = np.array(list(self.player_codes), dtype=np.int64)
+        n_players = len(self.player_codes)
+        if n_players > len(self.ratings):
+            grow = max(n_players, 2 * len(self.ratings)) - len(self.ratings)
+            initial = self.params["initial_rating"]
+            self.ratings = np.concatenate([self.ratings, np.full(grow, initial)])
+            self.counts = np.concatenate([self.counts, np.zeros(grow, np.int64)])
+            self.surface_ratings = np.vstack(
+                [self.surface_ratings, np.full((grow, len(SURFACES)), initial)]
+            )
+            self.surface_counts = np.vstack(
+                [self.surface_counts, np.zeros((grow, len(SURFACES)), np.int64)]
+            )
+        return pd.Series(ids).map(self.player_codes).to_numpy(dtype=np.intp)
+
+    def update(self, matches: pd.DataFrame) -> int:
+        """
+        Apply matches (from `prepare_sackmann_matches`) played after the last
+        processed match. Returns the number of matches applied.
+        """
+        if self.last_key is not None:
+            keys = zip(*(matches[c] for c in MATCH_ORDER))
+            matches = matches[[tuple(k) > self.last_key for k in keys]]
+        if matches.empty:
+            return 0
+
+        winners = self._codes(matches["winner_id"].to_numpy())
+        losers = self._codes(matches["loser_id"].to_numpy())
+        surface_idx = (
+            matches["surface"]
+            .map({s: i for i, s in enumerate(SURFACES)})
+            .fillna(0)
+            .astype(int)
+            .to_numpy()
+        )
+        ratings, counts = self.ratings, self.counts
+        s_ratings, s_counts = self.surface_ratings, self.surface_counts
+        k_scale, k_offset, k_shape = (
+            self.params["k_scale"],
+            self.params["k_offset"],
+            self.params["k_shape"],
+        )
+
+        n = len(matches)
+        post = np.empty((2 * n, 1 + len(SURFACES)))
+        for i in range(n):
+            win, lose, s = winners[i], losers[i], surface_idx[i]
+            expected = 1.0 / (1.0 + 10.0 ** ((ratings[lose] - ratings[win]) / 400.0))
+            ratings[win] += (
+                k_scale / (counts[win] + k_offset) ** k_shape * (1 - expected)
+            )
+            ratings[lose] -= (
+                k_scale / (counts[lose] + k_offset) ** k_shape * (1 - expected)
+            )
+            counts[win] += 1
+            counts[lose] += 1
+
+            gap = s_ratings[lose, s] - s_ratings[win, s]
+            expected = 1.0 / (1.0 + 10.0 ** (gap / 400.0))
+            s_ratings[win, s] += (
+                k_scale / (s_counts[win, s] + k_offset) ** k_shape * (1 - expected)
+            )
+            s_ratings[lose, s] -= (
+                k_scale / (s_counts[lose, s] + k_offset) ** k_shape * (1 - expected)
+            )
+            s_counts[win, s] += 1
+            s_counts[lose, s] += 1
+
+            post[2 * i, 0], post[2 * i, 1:] = ratings[win], s_ratings[win]
+            post[2 * i + 1, 0], post[2 * i + 1, 1:] = ratings[lose], s_ratings[lose]
+
+        new_history = pd.DataFrame(post, columns=["elo"] + SURFACE_ELO_COLUMNS)
+        new_history.insert(
+            0,
+            "player_id",
+            np.column_stack(
+                [matches["winner_id"].to_numpy(), matches["loser_id"].to_numpy()]
+            ).ravel(),
+        )
+        new_history.insert(1, "date", np.repeat(matches["date"].to_numpy(), 2))
+        # One row per (player, date): the state after their last match that day
+        self.history = pd.concat(
+            [self.history, new_history] if len(self.history) else [new_history],
+            ignore_index=True,
+        ).drop_duplicates(["player_id", "date"], keep="last")
+        self.last_key = tuple(matches[MATCH_ORDER].iloc[-1])
+        return n
+
+    def update_from_files(self, pattern: str) -> int:
+        """
+        Apply only Sackmann files that are new or changed since the last run.
+        """
+        pending = []
+        for path in sackmann_files(pattern):
+            stat = os.stat(path)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            if self.processed_files.get(path) != signature:
+                pending.append(path)
+                self.processed_files[path] = signature
+        if not pending:
+            log_info("Elo ratings are up to date.")
+            return 0
+
+        matches = load_sackmann_matches(pending)
+        if self.last_key is not None:
+            stale = sum(
+                tuple(k) <= self.last_key
+                for k in zip(*(matches[c] for c in MATCH_ORDER))
+            )
+            if stale:
+                log_warning(
+                    f"{stale} matches predate the saved Elo state and are skipped; "
+                    "rebuild the state to include them."
+                )
+        applied = self.update(matches)
+        log_info(f"Applied {applied} matches from {len(pending)} new/changed files.")
+        return applied
+
+    @property
+    def source_digest(self) -> str:
+        """
+        Hash of the Sackmann files applied so far; changes when newer files
+        are applied.
+        """
+        return signatures_digest(self.processed_files)
+
+    def ratings_as_of(
+        self,
+        player_ids: ArrayLike,
+        dates: ArrayLike,
+        surface: Union[str, Sequence[str]] = "hard",
+    ) -> pd.DataFrame:
+        """
+        Pre-match ratings: the latest ratings strictly before each date.
+        Unknown players get the initial rating.
+
+        :return: DataFrame aligned with the inputs with `elo` and `surface_elo`.
+        """
+        queries = pd.DataFrame(
+            {
+                "player_id": pd.to_numeric(
+                    np.asarray(player_ids), errors="coerce"
+                ).astype("float64"),
+                "date": pd.to_datetime(np.asarray(dates))
+                .tz_localize(None)
+                .astype("datetime64[ns]"),
+                "surface": surface if isinstance(surface, str) else list(surface),
+            }
+        )
+        queries["surface"] = queries["surface"].fillna("hard").str.lower()
+        queries["_row"] = np.arange(len(queries))
+        history = self.history.astype({"player_id": "float64"}).sort_values("date")
+        history["date"] = pd.to_datetime(history["date"]).astype("datetime64[ns]")
+        joined = pd.merge_asof(
+            queries.sort_values("date"),
+            history,
+            on="date",
+            by="player_id",
+            allow_exact_matches=False,
+        ).sort_values("_row")
+
+        initial = self.params["initial_rating"]
+        surface_cols = "elo_" + joined["surface"].where(
+            joined["surface"].isin(SURFACES), "hard"
+        )
+        surface_values = joined[SURFACE_ELO_COLUMNS].to_numpy()
+        col_idx = surface_cols.map({c: i for i, c in enumerate(SURFACE_ELO_COLUMNS)})
+        surface_elo = surface_values[np.arange(len(joined)), col_idx.to_numpy()]
+        return pd.DataFrame(
+            {
+                "elo": joined["elo"].fillna(initial).to_numpy(dtype=float),
+                "surface_elo": np.nan_to_num(surface_elo.astype(float), nan=initial),
+            }
+        )
+
+    def save(self, state_dir: str) -> None:
+        """
+        Persist arrays (npz), metadata (json) and rating history (csv).
+        """
+        path = Path(state_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        n = len(self.player_codes)
+        np.savez(
+            path / "elo_state.npz",
+            player_ids=self.player_ids[:n],
+            ratings=self.ratings[:n],
+            counts=self.counts[:n],
+            surface_ratings=self.surface_ratings[:n],
+            surface_counts=self.surface_counts[:n],
+        )
+        last_key = None
+        if self.last_key is not None:
+            date, *rest = self.last_key
+            last_key = [pd.Timestamp(date).isoformat(), *[_to_json(v) for v in rest]]
+        with open(path / "elo_state.json", "w") as f:
+            json.dump(
+                {
+                    "params": self.params,
+                    "last_key": last_key,
+                    "processed_files": self.processed_files,
+                },
+                f,
+                indent=2,
+            )
+        self.history.to_csv(path / "elo_history.csv", index=False)
+        log_info(f"Saved Elo state for {n} players to {path}")
+
+    @classmethod
+    def load(cls, state_dir: str) -> "EloEngine":
+        """
+        Load a saved engine, or return a fresh one if no state exists.
+        """
+        path = Path(state_dir)
+        if not (path / "elo_state.json").exists():
+            return cls()
+        with open(path / "elo_state.json") as f:
+            meta = json.load(f)
+        engine = cls(**meta["params"])
+        arrays = np.load(path / "elo_state.npz")
+        engine.player_ids = arrays["player_ids"]
+        engine.player_codes = {int(pid): i for i, pid in enumerate(engine.player_ids)}
+        engine.ratings = arrays["ratings"]
+        engine.counts = arrays["counts"]
+        engine.surface_ratings = arrays["surface_ratings"]
+        engine.surface_counts = arrays["surface_counts"]
+        if meta["last_key"] is not None:
+            date, *rest = meta["last_key"]
+            engine.last_key = (pd.Timestamp(date), *rest)
+        engine.processed_files = meta["processed_files"]
+        engine.history = pd.read_csv(path / "elo_history.csv", parse_dates=["date"])
+        return engine
+
+
+def _to_json(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def compute_elo_features(
+    matches_df: pd.DataFrame,
+    engine: EloEngine,
+    surface: Optional[str] = None,
+    as_of: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Pre-match Elo features per match_id for matches carrying sackmann_id_1/2.
+
+    Ratings are taken strictly before `as_of` (e.g. the tournament start date)
+    when given, otherwise before each match's market_time. Because Sackmann
+    dates every match with its tournament start date, a per-tournament `as_of`
+    is what keeps later rounds from leaking into earlier ones.
+    """
+    dates = (
+        pd.Series(pd.Timestamp(as_of), index=matches_df.index)
+        if as_of is not None
+        else pd.to_datetime(matches_df["market_time"], utc=True)
+    )
+    surface = surface or "hard"
+    p1 = engine.ratings_as_of(matches_df["sackmann_id_1"], dates, surface)
+    p2 = engine.ratings_as_of(matches_df["sackmann_id_2"], dates, surface)
+    features = pd.DataFrame(
+        {
+            "match_id": matches_df["match_id"].to_numpy(),
+            "elo_1": p1["elo"],
+            "elo_2": p2["elo"],
+            "surface_elo_1": p1["surface_elo"],
+            "surface_elo_2": p2["surface_elo"],
+        }
+    )
+    features["elo_diff"] = features["elo_1"] - features["elo_2"]
+    features["surface_elo_diff"] = features["surface_elo_1"] - features["surface_elo_2"]
+    features["elo_prob_1"] = 1.0 / (1.0 + 10.0 ** (-features["elo_diff"] / 400.0))
+    return features[["match_id"] + ELO_FEATURES]
@@ -0,0 +1,309 @@
+"""
+Rolling player form and head-to-head features precomputed from Sackmann history.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.features.sackmann import (
+    file_signatures,
+    load_sackmann_matches,
+    sackmann_files,
+)
+from scripts.utils.constants import DEFAULT_FORM_WINDOW
+from scripts.utils.logger import log_info
+
+FORM_TABLE_FILE = "player_form.csv"
+H2H_TABLE_FILE = "head_to_head.csv"
+# What the saved tables were built from: window and Sackmann file signatures
+FORM_MANIFEST_FILE = "form_tables.json"
+
+# Per-side Sackmann serve columns (w_<stat> / l_<stat>)
+SERVE_STATS = ["ace", "svpt", "1stIn", "1stWon", "2ndWon"]
+
+# Rolling rates over the last `window` matches, stored per (player_id, date)
+FORM_RATES = [
+    "win_rate",
+    "ace_rate",
+    "first_in",
+    "first_won",
+    "second_won",
+    "return_won",
+]
+FORM_TABLE_COLUMNS = ["player_id", "date", "last_date", "n_matches"] + FORM_RATES
+H2H_TABLE_COLUMNS = ["player_id", "opponent_id", "date", "h2h_wins", "h2h_matches"]
+
+FORM_FEATURES = [
+    f"form_{name}_{side}" for name in FORM_RATES + ["n_matches"] for side in (1, 2)
+] + [
+    "days_since_last_1",
+    "days_since_last_2",
+    "h2h_wins_1",
+    "h2h_wins_2",
+    "h2h_matches",
+]
+
+
+def _player_matches(matches: pd.DataFrame) -> pd.DataFrame:
+    """
+    Two rows per match (winner and loser view) with the player's own serve
+    counts and the opponent's, in playing order.
+    """
+    order = np.arange(len(matches))
+    sides = []
+    for player, opponent, me, opp, won in (
+        ("winner_id", "loser_id", "w", "l", 1),
+        ("loser_id", "winner_id", "l", "w", 0),
+    ):
+        side = pd.DataFrame(
+            {
+                "player_id": matches[player].to_numpy(),
+                "opponent_id": matches[opponent].to_numpy(),
+                "date": matches["date"].to_numpy(),
+                "_order": order,
+                "won": won,
+            }
+        )
+        for stat in SERVE_STATS:
+            for prefix, owner in ((me, ""), (opp, "opp_")):
+                col = f"{prefix}_{stat}"
+                values = matches[col] if col in matches.columns else np.nan
+                side[f"{owner}{stat}"] = values
+        sides.append(side)
+    return pd.concat(sides, ignore_index=True)
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """
+    For rows sorted by `keys` (one or more columns), the index of the first
+    row of each row's group.
+    """
+    keys = keys.reshape(len(keys), -1)
+    new_group = np.ones(len(keys), dtype=bool)
+    new_group[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+    starts = np.flatnonzero(new_group)
+    return np.repeat(starts, np.diff(np.append(starts, len(keys))))
+
+
+def _windowed_sums(
+    values: np.ndarray, group_start: np.ndarray, window: Optional[int]
+) -> np.ndarray:
+    """
+    Sum of each row and up to `window - 1` preceding rows of its group
+    (the whole group so far when `window` is None), as cumulative-sum diffs.
+    """
+    cumsum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    idx = np.arange(len(values))
+    lower = group_start if window is None else np.maximum(idx + 1 - window, group_start)
+    return cumsum[idx + 1] - cumsum[lower]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def build_form_table(
+    matches: pd.DataFrame, window: int = DEFAULT_FORM_WINDOW
+) -> pd.DataFrame:
+    """
+    Rolling form per (player_id, date), including that date's matches.
+
+    Rates cover the player's last `window` matches: win rate, aces per
+    service point, first-serve in / won, second-serve won and return points
+    won. Matches without serve stats only count towards the win rate.
+
+    :param matches: Sackmann matches from `prepare_sackmann_matches`.
+    """
+    rows = _player_matches(matches).sort_values(
+        ["player_id", "_order"], kind="stable", ignore_index=True
+    )
+    group_start = _group_starts(rows["player_id"].to_numpy())
+
+    serve = rows[SERVE_STATS].to_numpy(dtype=float)
+    opp = rows[[f"opp_{s}" for s in SERVE_STATS]].to_numpy(dtype=float)
+    # Only use matches where both sides' serve stats were recorded
+    has_stats = ~(np.isnan(serve).any(axis=1) | np.isnan(opp).any(axis=1))
+    ace, svpt, first_in, first_won, second_won = np.where(
+        has_stats[:, None], serve, 0
+    ).T
+    opp_svpt, opp_first_won, opp_second_won = np.where(has_stats[:, None], opp, 0).T[
+        [1, 3, 4]
+    ]
+
+    values = np.column_stack(
+        [
+            rows["won"].to_numpy(dtype=float),
+            np.ones(len(rows)),
+            ace,
+            svpt,
+            first_in,
+            first_won,
+            second_won,
+            opp_svpt - opp_first_won - opp_second_won,
+            opp_svpt,
+        ]
+    )
+    sums = _windowed_sums(values, group_start, window)
+    wins, played, ace, svpt, first_in, first_won, second_won, ret_won, ret_pts = sums.T
+
+    table = pd.DataFrame(
+        {
+            "player_id": rows["player_id"].to_numpy(),
+            "date": rows["date"].to_numpy(),
+            "last_date": rows["date"].to_numpy(),
+            "n_matches": np.arange(len(rows)) - group_start + 1,
+            "win_rate": wins / played,
+            "ace_rate": _ratio(ace, svpt),
+            "first_in": _ratio(first_in, svpt),
+            "first_won": _ratio(first_won, first_in),
+            "second_won": _ratio(second_won, svpt - first_in),
+            "return_won": _ratio(ret_won, ret_pts),
+        }
+    )
+    # One row per (player, date): the state after their last match that day
+    table = table.drop_duplicates(["player_id", "date"], keep="last")
+    return table[FORM_TABLE_COLUMNS].reset_index(drop=True)
+
+
+def build_h2h_table(matches: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cumulative head-to-head record per (player_id, opponent_id, date),
+    including that date's matches.
+    """
+    rows = _player_matches(matches).sort_values(
+        ["player_id", "opponent_id", "_order"], kind="stable", ignore_index=True
+    )
+    group_start = _group_starts(rows[["player_id", "opponent_id"]].to_numpy())
+    sums = _windowed_sums(
+        np.column_stack([rows["won"].to_numpy(dtype=float), np.ones(len(rows))]),
+        group_start,
+        window=None,
+    )
+    table = pd.DataFrame(
+        {
+            "player_id": rows["player_id"].to_numpy(),
+            "opponent_id": rows["opponent_id"].to_numpy(),
+            "date": rows["date"].to_numpy(),
+            "h2h_wins": sums[:, 0].astype(np.int64),
+            "h2h_matches": sums[:, 1].astype(np.int64),
+        }
+    )
+    table = table.drop_duplicates(["player_id", "opponent_id", "date"], keep="last")
+    return table[H2H_TABLE_COLUMNS].reset_index(drop=True)
+
+
+def save_form_tables(form: pd.DataFrame, h2h: pd.DataFrame, table_dir: str) -> None:
+    path = Path(table_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    form.to_csv(path / FORM_TABLE_FILE, index=False)
+    h2h.to_csv(path / H2H_TABLE_FILE, index=False)
+    log_info(f"Saved form ({len(form)} rows) and H2H ({len(h2h)} rows) to {path}")
+
+
+def load_form_tables(table_dir: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    path = Path(table_dir)
+    form = pd.read_csv(path / FORM_TABLE_FILE, parse_dates=["date", "last_date"])
+    h2h = pd.read_csv(path / H2H_TABLE_FILE, parse_dates=["date"])
+    return form, h2h
+
+
+def load_or_build_form_tables(
+    pattern: str, table_dir: str, window: int = DEFAULT_FORM_WINDOW
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reuse the saved tables unless they were built with another window or the
+    Sackmann files matching `pattern` changed since.
+    """
+    files = sackmann_files(pattern)
+    manifest = {"window": window, "sources": file_signatures(files)}
+    manifest_path = Path(table_dir) / FORM_MANIFEST_FILE
+    if (
+        manifest_path.exists()
+        and (Path(table_dir) / FORM_TABLE_FILE).exists()
+        and (Path(table_dir) / H2H_TABLE_FILE).exists()
+    ):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                log_info(f"Form tables in {table_dir} are up to date.")
+                return load_form_tables(table_dir)
+    matches = load_sackmann_matches(files)
+    form, h2h = build_form_table(matches, window=window), build_h2h_table(matches)
+    save_form_tables(form, h2h, table_dir)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return form, h2h
+
+
+def _as_of(
+    table: pd.DataFrame, queries: pd.DataFrame, by: list, columns: list
+) -> pd.DataFrame:
+    """
+    Latest table row strictly before each query date, aligned with `queries`.
+    """
+    queries = queries.assign(_row=np.arange(len(queries)))
+    table = table.astype({c: "float64" for c in by})
+    table["date"] = pd.to_datetime(table["date"]).astype("datetime64[ns]")
+    joined = pd.merge_asof(
+        queries.sort_values("date"),
+        table.sort_values("date")[by + ["date"] + columns],
+        on="date",
+        by=by,
+        allow_exact_matches=False,
+    ).sort_values("_row")
+    return joined[columns].reset_index(drop=True)
+
+
+def compute_form_features(
+    matches_df: pd.DataFrame,
+    form: pd.DataFrame,
+    h2h: pd.DataFrame,
+    as_of: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Pre-match form and head-to-head features per match_id for matches carrying
+    sackmann_id_1/2, taken strictly before `as_of` (e.g. the tournament start
+    date) or before each match's market_time.
+    """
+    dates = (
+        pd.Series(pd.Timestamp(as_of), index=matches_df.index)
+        if as_of is not None
+        else pd.to_datetime(matches_df["market_time"], utc=True)
+    )
+    dates = pd.to_datetime(dates).dt.tz_localize(None).astype("datetime64[ns]")
+    ids = {
+        side: pd.to_numeric(matches_df[f"sackmann_id_{side}"], errors="coerce")
+        .astype("float64")
+        .to_numpy()
+        for side in (1, 2)
+    }
+    features = pd.DataFrame({"match_id": matches_df["match_id"].to_numpy()})
+    for side in (1, 2):
+        queries = pd.DataFrame({"player_id": ids[side], "date": dates.to_numpy()})
+        side_form = _as_of(
+            form, queries, ["player_id"], FORM_RATES + ["n_matches", "last_date"]
+        )
+        for name in FORM_RATES:
+            features[f"form_{name}_{side}"] = side_form[name].to_numpy()
+        features[f"form_n_matches_{side}"] = side_form["n_matches"].fillna(0).to_numpy()
+        last_date = pd.to_datetime(side_form["last_date"]).to_numpy()
+        features[f"days_since_last_{side}"] = (
+            dates.to_numpy() - last_date
+        ) / np.timedelta64(1, "D")
+
+    record = _as_of(
+        h2h,
+        pd.DataFrame(
+            {"player_id": ids[1], "opponent_id": ids[2], "date": dates.to_numpy()}
+        ),
+        ["player_id", "opponent_id"],
+        ["h2h_wins", "h2h_matches"],
+    ).fillna(0)
+    features["h2h_wins_1"] = record["h2h_wins"].to_numpy()
+    features["h2h_matches"] = record["h2h_matches"].to_numpy()
+    features["h2h_wins_2"] = features["h2h_matches"] - features["h2h_wins_1"]
+    return features[["match_id"] + FORM_FEATURES]
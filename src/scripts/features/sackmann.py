@@ -0,0 +1,93 @@
+"""
+Loading and ordering of Jeff Sackmann match results.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Union
+
+import pandas as pd
+
+from scripts.utils.logger import log_info
+
+# Sackmann only records the tournament start date, so matches inside a
+# tournament are ordered by round.
+ROUND_ORDER = {
+    "Q1": 0,
+    "Q2": 1,
+    "Q3": 2,
+    "Q4": 3,
+    "ER": 4,
+    "RR": 5,
+    "R128": 6,
+    "R64": 7,
+    "R32": 8,
+    "R16": 9,
+    "QF": 10,
+    "SF": 11,
+    "BR": 12,
+    "F": 13,
+}
+
+SURFACES = ("hard", "clay", "grass", "carpet")
+
+MATCH_ORDER = ["date", "tourney_id", "round_order", "match_num"]
+
+
+def sackmann_files(pattern: str) -> list:
+    """
+    Sorted list of Sackmann CSVs matching a glob pattern.
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No Sackmann files found matching: {pattern}")
+    return files
+
+
+def file_signatures(files: Iterable[str]) -> Dict[str, list]:
+    """
+    (mtime_ns, size) per file, to detect new or changed Sackmann files.
+    """
+    signatures = {}
+    for path in files:
+        stat = os.stat(path)
+        signatures[path] = [stat.st_mtime_ns, stat.st_size]
+    return signatures
+
+
+def signatures_digest(signatures: Dict[str, list]) -> str:
+    """
+    Short hash of a set of file signatures, e.g. for feature-group versions.
+    """
+    payload = json.dumps(signatures, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def prepare_sackmann_matches(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add `date`, `round_order` and normalised `surface` columns and sort into
+    playing order.
+    """
+    df = df.dropna(subset=["winner_id", "loser_id", "tourney_date"]).copy()
+    df["date"] = pd.to_datetime(
+        df["tourney_date"].astype("int64").astype(str), format="%Y%m%d"
+    ).astype("datetime64[ns]")
+    df["round_order"] = df["round"].map(ROUND_ORDER).fillna(len(ROUND_ORDER))
+    df["surface"] = df["surface"].fillna("hard").str.lower()
+    df["winner_id"] = df["winner_id"].astype("int64")
+    df["loser_id"] = df["loser_id"].astype("int64")
+    if "match_num" not in df.columns:
+        df["match_num"] = 0
+    return df.sort_values(MATCH_ORDER, kind="stable").reset_index(drop=True)
+
+
+def load_sackmann_matches(files: Union[str, Iterable[str]]) -> pd.DataFrame:
+    """
+    Load one or more Sackmann match files (or a glob pattern) in playing order.
+    """
+    paths = sackmann_files(files) if isinstance(files, str) else list(files)
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+    log_info(f"Loaded {len(df)} Sackmann matches from {len(paths)} files.")
+    return prepare_sackmann_matches(df)
@@ -0,0 +1,303 @@
+"""
+Local columnar feature store: versioned, match_id-keyed feature groups.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.constants import DEFAULT_FEATURE_STORE_DIR
+from scripts.utils.logger import log_info
+
+KEY_COLUMNS = ["match_id", "available_at"]
+
+
+def _definition_sources(definition: Callable) -> str:
+    """
+    Source of the module defining `definition` and of the feature modules it
+    imports from (e.g. sackmann.py for the Elo engine), in a stable order.
+    Shared utilities are left out so that routine edits to them do not
+    invalidate every group.
+    """
+    module = inspect.getmodule(definition)
+    if module is None:
+        return inspect.getsource(definition)
+    package = __name__.rsplit(".", 1)[0] + "."
+    names = {module.__name__}
+    for value in vars(module).values():
+        name = (
+            value.__name__
+            if inspect.ismodule(value)
+            else getattr(value, "__module__", None)
+        )
+        if isinstance(name, str) and name.startswith(package) and name != __name__:
+            names.add(name)
+    return "".join(inspect.getsource(sys.modules[name]) for name in sorted(names))
+
+
+def feature_version(
+    group: str, definition: Callable, params: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Version of a feature group: a hash of its name, parameters and the source
+    its definition depends on (see _definition_sources), so a change in
+    definition invalidates the group and an edit to another group does not.
+    """
+    payload = json.dumps(
+        {"group": group, "params": params or {}}, sort_keys=True, default=str
+    )
+    source = _definition_sources(definition)
+    return hashlib.sha256((payload + source).encode()).hexdigest()[:16]
+
+
+def _encode_column(values: pd.Series) -> tuple:
+    """
+    A column as a fixed-width numpy array plus the dtype to restore on read.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        as_ns = pd.to_datetime(values).dt.tz_localize(None).astype("datetime64[ns]")
+        return as_ns.to_numpy().view(np.int64), "datetime64[ns]"
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(), str(values.dtype)
+    return values.fillna("").astype(str).to_numpy(dtype=str), "object"
+
+
+def _decode_column(array: np.ndarray, dtype: str) -> Any:
+    if dtype == "datetime64[ns]":
+        return np.asarray(array).view("datetime64[ns]")
+    if dtype == "object":
+        return pd.Series(array, dtype=object).replace("", None).to_numpy()
+    return array
+
+
+class FeatureStore:
+    """
+    Feature groups materialised on disk as one `.npy` file per column plus a
+    `schema.json`, under <root>/<group>/<version>/. Columns are memory-mapped
+    on read, so selecting a few match_ids only touches the pages it needs.
+
+    Every row carries `match_id` and `available_at` (when the values became
+    known). Reads as of a timestamp return, per match_id, the latest row
+    available at that time. <root>/<group>/LATEST names the version last
+    written, which is what readers without the definition (e.g. training) use.
+    """
+
+    def __init__(self, root: str = DEFAULT_FEATURE_STORE_DIR):
+        self.root = Path(root)
+
+    def _path(self, group: str, version: str) -> Path:
+        return self.root / group / version
+
+    def latest_version(self, group: str) -> Optional[str]:
+        pointer = self.root / group / "LATEST"
+        return pointer.read_text().strip() if pointer.exists() else None
+
+    def exists(self, group: str, version: str) -> bool:
+        return (self._path(group, version) / "schema.json").exists()
+
+    def write(
+        self,
+        group: str,
+        version: str,
+        df: pd.DataFrame,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Upsert rows into a group version; rows with the same
+        (match_id, available_at) as stored ones replace them.
+        """
+        missing = [c for c in KEY_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Feature group '{group}' is missing columns: {missing}")
+        df = df.assign(
+            available_at=pd.to_datetime(df["available_at"], utc=True)
+            .dt.tz_localize(None)
+            .astype("datetime64[ns]")
+        )
+        if self.exists(group, version):
+            df = pd.concat([self.read(group, version), df], ignore_index=True)
+        df = df.drop_duplicates(KEY_COLUMNS, keep="last").reset_index(drop=True)
+
+        path = self._path(group, version)
+        tmp = path.with_name(f".{version}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        columns = []
+        for i, col in enumerate(df.columns):
+            array, dtype = _encode_column(df[col])
+            np.save(tmp / f"{i}.npy", array, allow_pickle=False)
+            columns.append({"name": col, "file": f"{i}.npy", "dtype": dtype})
+        with open(tmp / "schema.json", "w") as f:
+            json.dump(
+                {
+                    "group": group,
+                    "version": version,
+                    "params": params or {},
+                    "rows": len(df),
+                    "columns": columns,
+                    "updated_at": datetime.now().isoformat(),
+                },
+                f,
+                indent=2,
+                default=str,
+            )
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        (self.root / group / "LATEST").write_text(version)
+        log_info(f"Feature group '{group}' ({version}) now holds {len(df)} rows.")
+
+    def read(
+        self,
+        group: str,
+        version: Optional[str] = None,
+        match_ids: Optional[Iterable] = None,
+        as_of: Optional[Any] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a feature group (latest written version by default).
+
+        :param match_ids: Restrict to these match_ids.
+        :param as_of: Point-in-time cut-off; only rows available at or before
+            it are considered, and the latest such row per match_id is returned.
+        """
+        version = version or self.latest_version(group)
+        if version is None or not self.exists(group, version):
+            raise FileNotFoundError(f"Feature group '{group}' not found in {self.root}")
+        path = self._path(group, version)
+        with open(path / "schema.json") as f:
+            schema = json.load(f)
+        arrays = {
+            c["name"]: np.load(path / c["file"], mmap_mode="r", allow_pickle=False)
+            for c in schema["columns"]
+        }
+
+        mask = np.ones(schema["rows"], dtype=bool)
+        if match_ids is not None:
+            mask &= np.isin(arrays["match_id"], np.asarray(list(match_ids), dtype=str))
+        if as_of is not None:
+            cutoff = pd.Timestamp(as_of)
+            if cutoff.tzinfo is not None:
+                cutoff = cutoff.tz_convert(None)
+            mask &= arrays["available_at"] <= cutoff.value
+        rows = np.flatnonzero(mask)
+        df = pd.DataFrame(
+            {
+                c["name"]: _decode_column(arrays[c["name"]][rows], c["dtype"])
+                for c in schema["columns"]
+            }
+        )
+        if as_of is not None:
+            df = (
+                df.sort_values("available_at", kind="stable")
+                .drop_duplicates("match_id", keep="last")
+                .sort_index()
+                .reset_index(drop=True)
+            )
+        return df
+
+    def materialize(
+        self,
+        group: str,
+        matches_df: pd.DataFrame,
+        compute: Callable[[pd.DataFrame], pd.DataFrame],
+        definition: Callable,
+        params: Optional[Dict[str, Any]] = None,
+        available_at: Optional[Any] = None,
+    ) -> pd.DataFrame:
+        """
+        Feature rows for `matches_df`, computing and storing only those not
+        yet materialised for this version and availability time.
+
+        :param compute: Maps a subset of matches_df to a match_id-keyed table.
+        :param definition: The function defining the group; the source it
+            depends on is part of the version (see feature_version).
+        :param params: Parameters of the definition, also part of the version.
+        :param available_at: When the features become known: a timestamp
+            (e.g. the tournament start date) or None for each match's
+            market_time.
+        """
+        version = feature_version(group, definition, params)
+        if available_at is None:
+            times = pd.to_datetime(matches_df["market_time"], utc=True)
+        else:
+            times = pd.Series(pd.Timestamp(available_at), index=matches_df.index)
+            times = pd.to_datetime(times, utc=True)
+        requests = pd.DataFrame(
+            {
+                "match_id": matches_df["match_id"].astype(str).to_numpy(),
+                "available_at": times.dt.tz_localize(None)
+                .astype("datetime64[ns]")
+                .to_numpy(),
+            }
+        )
+
+        cached = pd.DataFrame(columns=KEY_COLUMNS)
+        if self.exists(group, version):
+            cached = self.read(group, version, match_ids=requests["match_id"])
+            cached = cached.merge(requests.drop_duplicates(), on=KEY_COLUMNS)
+        done = set(cached["match_id"])
+        todo = matches_df[~requests["match_id"].isin(done).to_numpy()]
+        if not todo.empty:
+            computed = compute(todo)
+            computed["match_id"] = computed["match_id"].astype(str)
+            computed = computed.merge(requests.drop_duplicates(), on="match_id")
+            self.write(group, version, computed, params)
+            cached = pd.concat(
+                [cached, computed] if len(cached) else [computed], ignore_index=True
+            )
+        log_info(f"Feature group '{group}': {len(done)} cached, {len(todo)} computed.")
+        return cached.drop(columns="available_at")
+
+    def join(
+        self,
+        df: pd.DataFrame,
+        groups: Sequence[str],
+        as_of: Optional[Any] = None,
+    ) -> pd.DataFrame:
+        """
+        Left-join the latest version of each group onto `df` by match_id.
+        """
+        df = df.assign(match_id=df["match_id"].astype(str))
+        for group in groups:
+            features = (
+                self.read(group, match_ids=df["match_id"], as_of=as_of)
+                .sort_values("available_at", kind="stable")
+                .drop_duplicates("match_id", keep="last")
+                .drop(columns="available_at")
+            )
+            new_cols = [c for c in features.columns if c != "match_id"]
+            df = df.drop(columns=[c for c in new_cols if c in df.columns])
+            df = df.merge(features, on="match_id", how="left")
+            log_info(f"Joined {len(new_cols)} columns from feature group '{group}'.")
+        return df
+
+
+def add_feature_store_args(parser) -> None:
+    """
+    Options for training commands that read feature groups from the store.
+    """
+    parser.add_argument(
+        "--feature_store",
+        default=DEFAULT_FEATURE_STORE_DIR,
+        help="Feature store directory.",
+    )
+    parser.add_argument(
+        "--feature_groups",
+        nargs="*",
+        default=None,
+        help="Feature groups to join by match_id (e.g. tick elo form).",
+    )
+    parser.add_argument(
+        "--as_of",
+        default=None,
+        help="Point-in-time cut-off for feature rows (default: all rows).",
+    )
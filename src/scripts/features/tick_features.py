@@ -0,0 +1,199 @@
+"""
+Time-series odds features computed from the full Betfair tick history.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.constants import (
+    DEFAULT_LATE_MONEY_WINDOW_MIN,
+    DEFAULT_MOMENTUM_WINDOW_MIN,
+)
+from scripts.utils.logger import log_info
+from scripts.utils.schema import normalize_columns
+from scripts.utils.time_utils import to_epoch_ms
+
+SELECTION_KEYS = ["market_id", "selection_id"]
+
+# Per-selection statistics; each becomes tick_<name>_1 / tick_<name>_2
+TICK_FEATURES = [
+    "drift",
+    "volatility",
+    "vwap",
+    "late_money_share",
+    "n_price_changes",
+    "momentum",
+]
+
+
+def tick_feature_columns() -> list:
+    return [f"tick_{name}_{side}" for name in TICK_FEATURES for side in (1, 2)]
+
+
+def prepare_ticks(
+    snapshots_df: pd.DataFrame, off_ms: pd.Series, assume_sorted: bool = False
+) -> pd.DataFrame:
+    """
+    Keep pre-off ticks with int64 epoch-ms timestamps, ordered by time.
+
+    :param snapshots_df: Ticks with market_id, selection_id, timestamp, ltp and
+        optionally the cumulative traded volume `volume`.
+    :param off_ms: Scheduled off (epoch ms) indexed by market_id.
+    :param assume_sorted: Ticks are already ordered by timestamp.
+    """
+    ticks = normalize_columns(snapshots_df)
+    if "volume" not in ticks.columns:
+        ticks["volume"] = np.nan
+    ticks = ticks[SELECTION_KEYS + ["timestamp", "ltp", "volume"]]
+    ticks = ticks.dropna(subset=["selection_id"])
+    if ticks["market_id"].dtype != off_ms.index.dtype:
+        ticks = ticks.assign(market_id=ticks["market_id"].astype(str))
+        off_ms = off_ms.set_axis(off_ms.index.astype(str))
+    ticks = ticks.assign(
+        timestamp=to_epoch_ms(ticks["timestamp"]),
+        selection_id=ticks["selection_id"].astype("int64"),
+        off_ms=ticks["market_id"].map(off_ms),
+    )
+    ticks = ticks[ticks["timestamp"] <= ticks["off_ms"]]
+    if not assume_sorted and not ticks["timestamp"].is_monotonic_increasing:
+        ticks = ticks.sort_values("timestamp", kind="stable")
+    return ticks
+
+
+def traded_volume(ticks: pd.DataFrame) -> pd.Series:
+    """
+    Volume traded at each tick. Betfair's `tv` is cumulative per runner, so
+    this is the within-selection increase of its running maximum.
+    Ticks must be in time order.
+    """
+    by = [ticks[k] for k in SELECTION_KEYS]
+    cum_volume = (
+        ticks.groupby(SELECTION_KEYS, sort=False)["volume"]
+        .ffill()
+        .fillna(0)
+        .groupby(by, sort=False)
+        .cummax()
+    )
+    return cum_volume.groupby(by, sort=False).diff().fillna(cum_volume)
+
+
+def selection_tick_stats(
+    ticks: pd.DataFrame,
+    late_window_min: float = DEFAULT_LATE_MONEY_WINDOW_MIN,
+    momentum_window_min: float = DEFAULT_MOMENTUM_WINDOW_MIN,
+) -> pd.DataFrame:
+    """
+    Per-selection tick statistics from time-ordered pre-off ticks
+    (see `prepare_ticks`). All work is grouped cumulative/diff operations.
+    """
+    grouped = ticks.groupby(SELECTION_KEYS, sort=False)
+    prevailing_ltp = grouped["ltp"].ffill()
+    traded = traded_volume(ticks).where(prevailing_ltp.notna(), 0)
+    late = ticks["timestamp"] > ticks["off_ms"] - late_window_min * 60_000
+
+    prices = ticks[ticks["ltp"].notna()]
+    price_groups = prices.groupby(SELECTION_KEYS, sort=False)["ltp"]
+    log_ret = np.log(prices["ltp"] / price_groups.shift())
+    momentum_cut = (
+        prices["timestamp"] <= prices["off_ms"] - momentum_window_min * 60_000
+    )
+
+    per_tick = pd.DataFrame(
+        {
+            "market_id": ticks["market_id"],
+            "selection_id": ticks["selection_id"],
+            "_traded": traded,
+            "_weighted": (prevailing_ltp * traded).fillna(0),
+            "_late": traded.where(late, 0),
+        }
+    )
+    stats = per_tick.groupby(SELECTION_KEYS, sort=False).sum()
+    price_stats = pd.DataFrame(
+        {
+            "market_id": prices["market_id"],
+            "selection_id": prices["selection_id"],
+            "ltp": prices["ltp"],
+            "_sq_ret": np.square(log_ret),
+            "_changed": (np.nan_to_num(log_ret) != 0).astype("int64"),
+            "_ltp_at_cut": prices["ltp"].where(momentum_cut),
+        }
+    ).groupby(SELECTION_KEYS, sort=False)
+    stats = stats.join(
+        price_stats.agg(
+            _open=("ltp", "first"),
+            _close=("ltp", "last"),
+            _sq_ret=("_sq_ret", "sum"),
+            n_price_changes=("_changed", "sum"),
+            _ltp_at_cut=("_ltp_at_cut", "last"),
+        ),
+        how="left",
+    )
+
+    stats["drift"] = np.log(stats["_close"] / stats["_open"])
+    stats["volatility"] = np.sqrt(stats["_sq_ret"])
+    stats["vwap"] = stats["_weighted"] / stats["_traded"].replace(0, np.nan)
+    stats["late_money_share"] = stats["_late"] / stats["_traded"].replace(0, np.nan)
+    stats["momentum"] = np.log(stats["_close"] / stats["_ltp_at_cut"])
+    return stats[TICK_FEATURES].reset_index()
+
+
+def compute_tick_features(
+    snapshots_df: pd.DataFrame,
+    matches_df: pd.DataFrame,
+    late_window_min: float = DEFAULT_LATE_MONEY_WINDOW_MIN,
+    momentum_window_min: float = DEFAULT_MOMENTUM_WINDOW_MIN,
+    assume_sorted: bool = False,
+) -> pd.DataFrame:
+    """
+    Build per-match tick features from the pre-off price history.
+
+    For each player: price drift (log close/open), realised volatility (root
+    sum of squared log returns), VWAP, share of volume traded in the last
+    `late_window_min` minutes, number of price changes, and momentum (log price
+    change over the last `momentum_window_min` minutes).
+
+    :param snapshots_df: Ticks (market_id, selection_id, timestamp, ltp, volume).
+    :param matches_df: Matches with match_id, market_id, market_time,
+        selection_id_1 and selection_id_2.
+    :return: One row per match_id with tick_<feature>_<side> columns.
+    """
+    matches = normalize_columns(matches_df).dropna(
+        subset=["selection_id_1", "selection_id_2"]
+    )
+    off_ms = (
+        pd.Series(
+            to_epoch_ms(matches["market_time"]).to_numpy(),
+            index=matches["market_id"],
+        )
+        .groupby(level=0)
+        .first()
+    )
+    ticks = prepare_ticks(snapshots_df, off_ms, assume_sorted=assume_sorted)
+    stats = selection_tick_stats(ticks, late_window_min, momentum_window_min)
+
+    runners = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "match_id": matches["match_id"],
+                    "market_id": matches["market_id"].astype(stats["market_id"].dtype),
+                    "selection_id": matches[f"selection_id_{side}"].astype("int64"),
+                    "side": side,
+                }
+            )
+            for side in (1, 2)
+        ],
+        ignore_index=True,
+    )
+    wide = runners.merge(stats, on=SELECTION_KEYS, how="left").pivot(
+        index="match_id", columns="side", values=TICK_FEATURES
+    )
+    renamed = [
+        f"tick_{name}_{side}"
+        for name, side in zip(
+            wide.columns.get_level_values(0), wide.columns.get_level_values(1)
+        )
+    ]
+    wide = wide.set_axis(renamed, axis=1)
+    log_info(f"Computed tick features for {len(wide)} matches from {len(ticks)} ticks.")
+    return wide.reindex(columns=tick_feature_columns()).reset_index()
@@ -0,0 +1,51 @@
+"""
+Per-process cache of loaded model files.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+
+from scripts.modeling.numpy_export import load_numpy_model
+from scripts.modeling.registry import resolve_model_ref
+from scripts.utils.constants import DEFAULT_MODEL_REGISTRY_DIR
+from scripts.utils.logger import log_info
+
+_MODEL_CACHE: Dict[Tuple[str, int, int, Optional[str]], Any] = {}
+
+
+def load_model(
+    path: str,
+    mmap_mode: Optional[str] = None,
+    registry_dir: str = DEFAULT_MODEL_REGISTRY_DIR,
+) -> Any:
+    """
+    joblib.load with a per-process cache keyed by resolved path, mtime, size
+    and `mmap_mode`, so a rewritten file is picked up on the next call.
+    `.npz` files are numpy-exported models (see `modeling.numpy_export`).
+    Registry references such as "ev_filter@latest" are resolved on every
+    call, so a moved alias is picked up too.
+
+    :param mmap_mode: Passed to joblib.load (e.g. "r") to memory-map the
+        model's numpy arrays instead of reading them into memory.
+    :param registry_dir: Model registry for "<name>@<alias>" references.
+    """
+    resolved = str(Path(resolve_model_ref(path, registry_dir)).resolve())
+    stat = os.stat(resolved)
+    key = (resolved, stat.st_mtime_ns, stat.st_size, mmap_mode)
+    if key not in _MODEL_CACHE:
+        # Drop stale entries for the same file
+        for stale in [k for k in _MODEL_CACHE if k[0] == resolved]:
+            del _MODEL_CACHE[stale]
+        if resolved.endswith(".npz"):
+            _MODEL_CACHE[key] = load_numpy_model(resolved)
+        else:
+            _MODEL_CACHE[key] = joblib.load(resolved, mmap_mode=mmap_mode)
+        log_info(f"Loaded model from {path}")
+    return _MODEL_CACHE[key]
+
+
+def clear_model_cache() -> None:
+    _MODEL_CACHE.clear()
@@ -0,0 +1,255 @@
+"""
+Export fitted sklearn classifiers to a compact numpy format and score them
+without sklearn.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from scripts.utils.logger import log_info, log_success, setup_logging
+
+FORMAT_VERSION = 1
+
+# Batches with up to this many (row, tree) pairs traverse all trees at once;
+# larger ones go tree by tree, one level at a time over cache-sized row blocks
+_FLAT_PAIRS = 65_536
+_BLOCK_ROWS = 8_192
+# Levels walked between dropping rows that reached a leaf (forests are deep
+# and unbalanced, so most rows finish well before the deepest leaf)
+_LEVELS_PER_COMPACTION = 6
+
+
+def _export_forest(model) -> Dict[str, np.ndarray]:
+    """
+    Concatenate all trees into flat node arrays with absolute child indices;
+    leaves have children -1 and their values are class probabilities.
+    """
+    features, thresholds, left, right, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        value = tree.value[:, 0, :].astype(np.float64)
+        values.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "value": np.vstack(values),
+        "roots": np.asarray(roots, dtype=np.int64),
+    }
+
+
+def _export_linear(model) -> Dict[str, np.ndarray]:
+    return {
+        "coef": np.asarray(model.coef_, dtype=np.float64),
+        "intercept": np.asarray(model.intercept_, dtype=np.float64),
+    }
+
+
+_EXPORTERS = {
+    "RandomForestClassifier": ("forest", _export_forest),
+    "LogisticRegression": ("linear", _export_linear),
+}
+
+
+def export_model(model) -> Dict[str, np.ndarray]:
+    """
+    Arrays describing a fitted RandomForestClassifier or LogisticRegression.
+    """
+    model_type = type(model).__name__
+    if model_type not in _EXPORTERS:
+        raise ValueError(f"Unsupported model type for numpy export: {model_type}")
+    kind, exporter = _EXPORTERS[model_type]
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "model_type": model_type,
+        "n_features_in": int(model.n_features_in_),
+    }
+    arrays = exporter(model)
+    arrays["classes"] = np.asarray(model.classes_)
+    if hasattr(model, "feature_names_in_"):
+        arrays["feature_names"] = np.asarray(model.feature_names_in_, dtype=str)
+    arrays["meta"] = np.asarray(json.dumps(meta))
+    return arrays
+
+
+def save_numpy_model(model, path: str) -> None:
+    path_obj = Path(path)
+    path_obj.parent.mkdir(parents=True, exist_ok=True)
+    arrays = export_model(model)
+    np.savez(path_obj, **arrays)  # type: ignore[arg-type]
+
+
+class NumpyModel:
+    """
+    Pure-numpy evaluator for an exported model, exposing the parts of the
+    sklearn classifier API the pipeline uses: `predict_proba`, `predict`,
+    `classes_` and `feature_names_in_`.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        meta = json.loads(str(arrays["meta"]))
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported numpy model format: {meta['format_version']}"
+            )
+        self.kind = meta["kind"]
+        self.model_type = meta["model_type"]
+        self.n_features_in_ = meta["n_features_in"]
+        self.classes_ = arrays["classes"]
+        if "feature_names" in arrays:
+            self.feature_names_in_ = arrays["feature_names"].astype(object)
+        self._arrays = {k: v for k, v in arrays.items() if k != "meta"}
+        if self.kind == "forest":
+            self._prepare_levels()
+
+    def _prepare_levels(self) -> None:
+        """
+        Child array for level-by-level traversal: node i's children are at
+        2i (left) and 2i + 1 (right), and leaves point to themselves so rows
+        can take several steps between checks for finished rows.
+        """
+        a = self._arrays
+        self._is_leaf = a["left"] < 0
+        nodes = np.arange(len(self._is_leaf))
+        self._children = np.column_stack(
+            [
+                np.where(self._is_leaf, nodes, a["left"]),
+                np.where(self._is_leaf, nodes, a["right"]),
+            ]
+        ).ravel()
+        self._feature = a["feature"].astype(np.intp)
+
+    def _check_input(self, X, dtype) -> np.ndarray:
+        if hasattr(X, "columns") and hasattr(self, "feature_names_in_"):
+            X = X[list(self.feature_names_in_)]
+        X = np.asarray(X, dtype=dtype)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected {self.n_features_in_} features, got array of shape {X.shape}"
+            )
+        return X
+
+    def _forest_leaves(
+        self, X: np.ndarray, rows: np.ndarray, nodes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Leaf reached from each (row of X, start node) pair. Pairs are dropped
+        from the working set as soon as they reach a leaf.
+        """
+        a = self._arrays
+        flat_X = X.ravel()
+        leaves = np.empty(len(nodes), dtype=np.int64)
+        pairs: np.ndarray = np.arange(len(nodes))
+        while len(nodes):
+            left = a["left"][nodes]
+            at_leaf = left < 0
+            if at_leaf.any():
+                leaves[pairs[at_leaf]] = nodes[at_leaf]
+                inner = ~at_leaf
+                pairs, rows, nodes, left = (
+                    pairs[inner],
+                    rows[inner],
+                    nodes[inner],
+                    left[inner],
+                )
+            values = flat_X[rows * X.shape[1] + a["feature"][nodes]]
+            nodes = np.where(values <= a["threshold"][nodes], left, a["right"][nodes])
+        return leaves
+
+    def _forest_proba(self, X: np.ndarray) -> np.ndarray:
+        value, roots = self._arrays["value"], self._arrays["roots"]
+        proba = np.zeros((len(X), value.shape[1]))
+        if len(X) * len(roots) <= _FLAT_PAIRS:
+            # Small batches: walk all trees at once to keep numpy calls few
+            rows = np.repeat(np.arange(len(X)), len(roots))
+            leaves = self._forest_leaves(X, rows, np.tile(roots, len(X)))
+            leaves = leaves.reshape(len(X), len(roots))
+            for t in range(len(roots)):
+                proba += value[leaves[:, t]]
+            return proba / len(roots)
+        # Large batches: walk tree by tree, level by level, over row blocks
+        for start in range(0, len(X), _BLOCK_ROWS):
+            block = X[start : start + _BLOCK_ROWS]
+            out = proba[start : start + _BLOCK_ROWS]
+            # Accumulate tree by tree, in the same order as sklearn
+            for root in roots:
+                out += value[self._tree_leaves(block, root)]
+        return proba / len(roots)
+
+    def _tree_leaves(self, X: np.ndarray, root: int) -> np.ndarray:
+        """
+        Leaf of the tree at `root` reached by each row of X, moving all rows
+        down one level per step.
+        """
+        flat_X = X.ravel()
+        threshold = self._arrays["threshold"]
+        rows = np.arange(len(X))
+        offsets = rows * X.shape[1]
+        nodes = np.full(len(X), root)
+        leaves = np.empty(len(X), dtype=np.int64)
+        while len(nodes):
+            for _ in range(_LEVELS_PER_COMPACTION):
+                right = flat_X[offsets + self._feature[nodes]] > threshold[nodes]
+                nodes = self._children[2 * nodes + right]
+            done = self._is_leaf[nodes]
+            leaves[rows[done]] = nodes[done]
+            rows, offsets, nodes = rows[~done], offsets[~done], nodes[~done]
+        return leaves
+
+    def _linear_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = X @ self._arrays["coef"].T + self._arrays["intercept"]
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.kind == "forest":
+            # sklearn trees compare float32 features against float64 thresholds
+            return self._forest_proba(
+                self._check_input(X, np.float32).astype(np.float64)
+            )
+        return self._linear_proba(self._check_input(X, np.float64))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_numpy_model(path: str) -> NumpyModel:
+    with np.load(path, allow_pickle=False) as data:
+        return NumpyModel({k: data[k] for k in data.files})
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    import joblib
+
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    model = joblib.load(args.model_file)
+    output_path = Path(args.output_file).with_suffix(".npz")
+    if args.dry_run:
+        log_info(f"[DRY-RUN] Would export {type(model).__name__} to {output_path}")
+        return
+    save_numpy_model(model, str(output_path))
+    log_success(f"Exported {type(model).__name__} to {output_path}")
+    meta_path = Path(args.model_file).with_suffix(".json")
+    if meta_path.exists():
+        output_path.with_suffix(".json").write_text(meta_path.read_text())
+        log_info(f"Copied metadata to {output_path.with_suffix('.json')}")
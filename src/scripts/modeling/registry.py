@@ -0,0 +1,228 @@
+"""
+Local registry of trained model artifacts.
+
+Each model name (e.g. "ev_filter") has a directory holding one
+<version>.joblib / <version>.json pair per trained version and an
+index.json with the versions (in last-use order) and aliases. A version is
+the digest of everything that determines the fit: the training data, the
+feature list, the algorithm, its parameters and the code version. Training
+commands look their version up before fitting and reuse the stored model on
+a hit. Only the `max_versions` most recently used versions are kept; aliased
+versions are never evicted.
+
+Model references of the form "<name>@<alias or version>", such as
+"ev_filter@latest", resolve to the stored file (see resolve_model_ref).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import joblib
+import pandas as pd
+
+from scripts.utils.constants import (
+    DEFAULT_MODEL_REGISTRY_DIR,
+    DEFAULT_REGISTRY_MAX_VERSIONS,
+)
+from scripts.utils.git_utils import get_git_hash
+from scripts.utils.logger import log_info
+
+LATEST = "latest"
+
+
+def training_key(
+    df: pd.DataFrame,
+    features: Sequence[str],
+    algorithm: str,
+    params: Dict[str, Any],
+    code_version: Optional[str] = None,
+) -> str:
+    """
+    Version key for a model trained on `df`; `code_version` defaults to the
+    current git hash.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(
+        json.dumps(
+            {
+                "columns": [str(c) for c in df.columns],
+                "features": list(features),
+                "algorithm": algorithm,
+                "params": params,
+                "code_version": code_version or get_git_hash(),
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    return digest.hexdigest()[:16]
+
+
+class ModelRegistry:
+    """
+    Versioned model store under `root`, one directory per model name.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_MODEL_REGISTRY_DIR,
+        max_versions: int = DEFAULT_REGISTRY_MAX_VERSIONS,
+    ):
+        if max_versions < 1:
+            raise ValueError("max_versions must be at least 1.")
+        self.root = Path(root)
+        self.max_versions = max_versions
+
+    def _index(self, name: str) -> Dict[str, Any]:
+        path = self.root / name / "index.json"
+        if not path.exists():
+            return {"versions": [], "aliases": {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_index(self, name: str, index: Dict[str, Any]) -> None:
+        path = self.root / name / "index.json"
+        partial = path.with_suffix(".tmp")
+        with open(partial, "w") as f:
+            json.dump(index, f, indent=2)
+        partial.replace(path)
+
+    def versions(self, name: str) -> list:
+        """
+        Stored versions of `name`, least recently used first.
+        """
+        return list(self._index(name)["versions"])
+
+    def resolve(self, name: str, tag: str = LATEST) -> Path:
+        """
+        Model file for an alias or version of `name`.
+        """
+        index = self._index(name)
+        version = index["aliases"].get(tag, tag)
+        if version not in index["versions"]:
+            raise KeyError(f"No model '{name}@{tag}' in registry {self.root}.")
+        return self.root / name / f"{version}.joblib"
+
+    def get(self, name: str, version: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        The stored (model, metadata) for `version`, or None on a miss. A hit
+        marks the version as most recently used and moves `latest` to it.
+        """
+        index = self._index(name)
+        if version not in index["versions"]:
+            return None
+        path = self.root / name / version
+        model = joblib.load(path.with_suffix(".joblib"))
+        with open(path.with_suffix(".json")) as f:
+            meta = json.load(f)
+        index["versions"].remove(version)
+        index["versions"].append(version)
+        index["aliases"][LATEST] = version
+        self._save_index(name, index)
+        return model, meta
+
+    def put(self, name: str, version: str, model, meta: Dict[str, Any]) -> Path:
+        """
+        Store a trained model as `version` of `name`, point `latest` at it and
+        evict the least recently used unaliased versions beyond max_versions.
+        """
+        directory = self.root / name
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{version}.joblib"
+        partial = path.with_suffix(".tmp")
+        joblib.dump(model, partial)
+        partial.replace(path)
+        with open(path.with_suffix(".json"), "w") as f:
+            json.dump({**meta, "registry_version": version}, f, indent=2)
+
+        index = self._index(name)
+        if version in index["versions"]:
+            index["versions"].remove(version)
+        index["versions"].append(version)
+        index["aliases"][LATEST] = version
+        aliased = set(index["aliases"].values())
+        evictable = [v for v in index["versions"] if v not in aliased]
+        for old in evictable[: max(0, len(index["versions"]) - self.max_versions)]:
+            index["versions"].remove(old)
+            for suffix in (".joblib", ".json"):
+                (directory / f"{old}{suffix}").unlink(missing_ok=True)
+            log_info(f"Evicted model '{name}@{old}' from the registry.")
+        self._save_index(name, index)
+        log_info(f"Registered model '{name}@{version}' in {self.root}.")
+        return path
+
+    def alias(self, name: str, alias: str, version: str) -> None:
+        """
+        Point `alias` at an existing version of `name`.
+        """
+        index = self._index(name)
+        if version not in index["versions"]:
+            raise KeyError(f"No model '{name}@{version}' in registry {self.root}.")
+        index["aliases"][alias] = version
+        self._save_index(name, index)
+
+
+def cached_training(
+    args,
+    df: pd.DataFrame,
+    features: Sequence[str],
+    algorithm: str,
+    params: Dict[str, Any],
+    train: Callable[[], Tuple[Any, Dict[str, Any]]],
+) -> Tuple[Any, Dict[str, Any], bool]:
+    """
+    Return the model registered under args.model_name for this training key
+    (see add_registry_args), or run `train` and register its result (not on
+    a dry run). Without `args.registry`, always trains.
+
+    :return: The model, its metadata and whether it came from the registry.
+    """
+    if not getattr(args, "registry", None):
+        return (*train(), False)
+    registry = ModelRegistry(args.registry, args.max_versions)
+    version = training_key(df, features, algorithm, params)
+    cached = None if args.retrain else registry.get(args.model_name, version)
+    if cached is not None:
+        log_info(f"Reusing registered model '{args.model_name}@{version}'.")
+        return (*cached, True)
+    model, meta = train()
+    if not args.dry_run:
+        registry.put(args.model_name, version, model, meta)
+    return model, meta, False
+
+
+def resolve_model_ref(ref: str, root: str = DEFAULT_MODEL_REGISTRY_DIR) -> str:
+    """
+    Path for a model reference: "<name>@<alias or version>" resolves through
+    the registry at `root`; anything else (or an existing file) is a path.
+    """
+    if "@" not in str(ref) or Path(ref).exists():
+        return str(ref)
+    name, tag = str(ref).rsplit("@", 1)
+    return str(ModelRegistry(root).resolve(name, tag or LATEST))
+
+
+def add_registry_args(parser, name: str) -> None:
+    """
+    Options for training commands that register their models.
+    """
+    parser.add_argument(
+        "--registry", default=DEFAULT_MODEL_REGISTRY_DIR, help="Model registry."
+    )
+    parser.add_argument(
+        "--model_name", default=name, help="Name to register the model under."
+    )
+    parser.add_argument(
+        "--max_versions",
+        type=int,
+        default=DEFAULT_REGISTRY_MAX_VERSIONS,
+        help="Versions kept per model name.",
+    )
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Train even if the registry holds a matching model.",
+    )
@@ -1,39 +1,70 @@
 import argparse
+import glob
 import json
+import os
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import classification_report
 from sklearn.model_selection import GroupShuffleSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
 
+from scripts.features.store import FeatureStore, add_feature_store_args
+from scripts.modeling.registry import add_registry_args, cached_training
+from scripts.modeling.training_dataset import (
+    DATASET_DTYPES,
+    DEDUP_KEY,
+    add_training_data_args,
+    load_training_data,
+    load_training_dataset,
+    manifest_path,
+    source_rows,
+    unchanged_rows,
+)
 from scripts.utils.constants import DEFAULT_EV_THRESHOLD
 from scripts.utils.decorators import with_logging
-from scripts.utils.file_utils import load_dataframes
 from scripts.utils.git_utils import get_git_hash
-from scripts.utils.logger import log_info, log_success
+from scripts.utils.logger import log_info, log_success, log_warning
 from scripts.utils.schema import enforce_schema, normalize_columns, patch_winner_column
 
+BASE_FEATURES = ["predicted_prob", "odds", "expected_value"]
+
+
+def _filter_bets(df: pd.DataFrame, min_ev: float) -> pd.DataFrame:
+    """
+    Value bets at or above the EV threshold, with normalized columns.
+    """
+    df = normalize_columns(df)
+    df = patch_winner_column(df)
+    df = df[df["expected_value"] >= min_ev].copy()
+    if df.empty:
+        raise ValueError("No valid input data found after filtering.")
+    enforce_schema(df, "value_bets")
+    return df
+
 
 def run_train_ev_filter_model(
     df: pd.DataFrame,
     min_ev: float = DEFAULT_EV_THRESHOLD,
     random_state: int = 42,
+    extra_features: Sequence[str] = (),
 ) -> tuple:
     """
     Train a RandomForestClassifier to filter value bets above EV threshold.
     Returns (model, report, meta_dict).
-    """
-    df = normalize_columns(df)
-    df = patch_winner_column(df)
-    df = df[df["expected_value"] >= min_ev].copy()
-    if df.empty:
-        raise ValueError("No valid input data found after filtering.")
 
-    enforce_schema(df, "value_bets")
-    features = ["predicted_prob", "odds", "expected_value"]
+    :param extra_features: Additional numeric columns to train on, e.g. those
+        joined from the feature store.
+    """
+    df = _filter_bets(df, min_ev)
+    features = [*BASE_FEATURES, *extra_features]
     X = df[features]
     y = df["winner"]
     if "match_id" not in df.columns:
@@ -59,30 +90,266 @@ def run_train_ev_filter_model(
     return model, report, meta
 
 
-@with_logging
-def main_cli():
-    parser = argparse.ArgumentParser(description="Train EV filter model")
-    parser.add_argument(
-        "--input_glob",
-        required=True,
-        help="Glob pattern for value bet CSVs to use for training.",
+def make_online_model(random_state: int = 42) -> Pipeline:
+    """
+    Unfitted EV filter that can be updated batch by batch: a streaming
+    StandardScaler feeding a logistic-loss SGDClassifier.
+    """
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            (
+                "sgd",
+                SGDClassifier(loss="log_loss", alpha=1e-4, random_state=random_state),
+            ),
+        ]
     )
-    parser.add_argument("--output_model", required=True)
-    parser.add_argument("--min_ev", type=float, default=DEFAULT_EV_THRESHOLD)
-    parser.add_argument("--overwrite", action="store_true")
-    parser.add_argument("--dry_run", action="store_true")
-    parser.add_argument("--verbose", action="store_true")
-    parser.add_argument("--json_logs", action="store_true")
-    args = parser.parse_args()
-
-    df = load_dataframes(args.input_glob)
-    model, report, meta = run_train_ev_filter_model(df, min_ev=args.min_ev)
-
-    log_info("Evaluation on holdout set:")
-    log_info("\n" + str(report))
+
+
+def pending_files(pattern: str, processed: Dict[str, list]) -> List[str]:
+    """
+    Files matching `pattern` that are new or changed (by mtime and size)
+    since they were recorded in `processed`.
+    """
+    pending = []
+    for path in sorted(glob.glob(pattern)):
+        stat = os.stat(path)
+        if processed.get(path) != [stat.st_mtime_ns, stat.st_size]:
+            pending.append(path)
+    return pending
+
+
+def _row_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hashes of each row's bet key, cast to the training dataset's
+    dtypes so CSV and dataset rows of the same bet hash alike.
+    """
+    key = df[DEDUP_KEY].astype({c: DATASET_DTYPES[c] for c in DEDUP_KEY})
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def update_ev_filter_model(
+    df: pd.DataFrame,
+    model: Optional[Pipeline] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    min_ev: float = DEFAULT_EV_THRESHOLD,
+    random_state: int = 42,
+    extra_features: Sequence[str] = (),
+    files: Sequence[str] = (),
+    learned_keys: Optional[np.ndarray] = None,
+) -> Tuple[Pipeline, Dict[str, Any], np.ndarray]:
+    """
+    Update an online EV filter (see make_online_model) with one partial_fit
+    pass over new value bets only.
+
+    Rows whose bet key (DEDUP_KEY) hashes into `learned_keys` are skipped
+    whenever they were placed; a changed or overlapping input file only
+    contributes its new rows. Files without new rows are still recorded in
+    the watermark, and the model is left unchanged.
+
+    :param df: The new data, e.g. the latest tournament's value bets.
+    :param model: Model to update; a fresh one when None.
+    :param meta: The model's metadata from the previous update.
+    :param files: Input files `df` was read from, recorded with their mtime
+        and size in the watermark.
+    :param learned_keys: Sorted key hashes of the rows learned so far.
+    :return: The updated model, its metadata and the sorted key hashes of
+        all learned rows (kept outside the metadata, see save_learned_keys).
+    """
+    features = [*BASE_FEATURES, *extra_features]
+    if model is None:
+        model, meta = make_online_model(random_state), None
+    elif meta is None or not meta.get("online"):
+        raise ValueError("Only an incrementally trained model can be updated.")
+    elif meta["features"] != features:
+        raise ValueError(
+            f"Feature mismatch: model has {meta['features']}, data has {features}"
+        )
+    watermark = dict(meta["watermark"]) if meta else {"files": {}}
+    # A dataset read past its unchanged leading rows can be empty
+    df = _filter_bets(df, min_ev) if len(df) else df
+    keys = _row_keys(df)
+    if learned_keys is None:
+        learned_keys = np.empty(0, dtype=np.uint64)
+    new = ~pd.Series(keys).duplicated().to_numpy() & ~np.isin(keys, learned_keys)
+    if not new.all():
+        log_warning(f"{int((~new).sum())} rows were already learned and are skipped.")
+    df, keys = df[new], keys[new]
+
+    if df.empty:
+        log_warning("No new rows to learn from; the model is unchanged.")
+    else:
+        X = df[features].to_numpy(dtype=float)
+        y = df["winner"].to_numpy(dtype=np.int64)
+        scaler, sgd = model.named_steps["scaler"], model.named_steps["sgd"]
+        scaler.partial_fit(X)
+        sgd.partial_fit(scaler.transform(X), y, classes=np.array([0, 1]))
+
+    learned_keys = np.union1d(learned_keys, keys)
+    watermark["keys"] = len(learned_keys)
+    watermark["files"] = dict(watermark["files"])
+    for path in files:
+        stat = os.stat(path)
+        watermark["files"][str(path)] = [stat.st_mtime_ns, stat.st_size]
+    watermark["rows"] = watermark.get("rows", 0) + len(df)
+    meta = {
+        "timestamp": datetime.now().isoformat(),
+        "git_hash": get_git_hash(),
+        "model_type": "SGDClassifier",
+        "features": features,
+        "ev_threshold": min_ev,
+        "online": True,
+        "updates": (meta["updates"] if meta else 0) + 1,
+        "train_rows": watermark["rows"],
+        "last_update_rows": len(df),
+        "watermark": watermark,
+    }
+    return model, meta, learned_keys
+
+
+def keys_path(model_path: Path) -> Path:
+    return model_path.with_suffix(".keys.npy")
+
+
+def load_learned_keys(model_path: Path, meta: Optional[Dict[str, Any]]) -> np.ndarray:
+    """
+    Learned key hashes saved next to the model; older models kept them in
+    the metadata as `watermark.row_keys`.
+    """
+    if keys_path(model_path).exists():
+        return np.load(keys_path(model_path))
+    legacy = meta["watermark"].pop("row_keys", []) if meta else []
+    return np.array(legacy, dtype=np.uint64)
+
+
+def save_learned_keys(model_path: Path, keys: np.ndarray) -> None:
+    np.save(keys_path(model_path), keys)
+
+
+def _join_features(df: pd.DataFrame, args) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Join the requested feature-store groups; return the frame and the new
+    numeric columns.
+    """
+    if not args.feature_groups:
+        return df, []
+    columns = set(df.columns)
+    store = FeatureStore(args.feature_store)
+    df = store.join(df, args.feature_groups, as_of=args.as_of)
+    extra_features = [
+        c
+        for c in df.columns
+        if c not in columns and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    return df, extra_features
+
+
+def _run_incremental(args) -> None:
+    if not args.output_model:
+        raise ValueError("--output_model is required with --incremental.")
     output_path = Path(args.output_model)
+    meta_path = output_path.with_suffix(".json")
+    model, meta = None, None
+    if output_path.exists() and meta_path.exists():
+        model = joblib.load(output_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+    online = bool(meta and meta.get("online"))
+    processed = meta["watermark"]["files"] if meta and online else {}
+    if not args.input_glob and not Path(args.dataset).exists():
+        raise FileNotFoundError(
+            f"No training dataset at {args.dataset}; build it with 'model build-dataset'."
+        )
+    files = pending_files(args.input_glob or args.dataset, processed)
+    if not files:
+        log_info("EV filter model is up to date.")
+        return
+    if args.input_glob:
+        changed = [f for f in files if f in processed]
+        if changed:
+            log_warning(f"{len(changed)} already learned files changed: {changed}")
+        df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+        sources = None
+    else:
+        # Rows from sources unchanged since the last update lead a rebuilt
+        # dataset; only the rows after them are read and checked
+        with open(manifest_path(args.dataset)) as f:
+            sources = source_rows(json.load(f))
+        learned = meta["watermark"].get("sources", {}) if meta and online else {}
+        df = load_training_dataset(
+            args.dataset, skip_rows=unchanged_rows(sources, learned)
+        )
+    df, extra_features = _join_features(df, args)
+    model, meta, keys = update_ev_filter_model(
+        df,
+        model=model,
+        meta=meta,
+        min_ev=args.min_ev,
+        extra_features=extra_features,
+        files=files,
+        learned_keys=load_learned_keys(output_path, meta if online else None),
+    )
+    if sources is not None:
+        meta["watermark"]["sources"] = sources
+    log_info(
+        f"Update {meta['updates']}: learned {meta['last_update_rows']} rows from "
+        f"{len(files)} new/changed files ({meta['train_rows']} rows in total)."
+    )
     output_path.parent.mkdir(parents=True, exist_ok=True)
     if not args.dry_run:
+        joblib.dump(model, output_path)
+        log_success(f"Saved model to {args.output_model}")
+        save_learned_keys(output_path, keys)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        log_success(f"Saved metadata to {meta_path}")
+
+
+@with_logging
+def main_cli(args=None):
+    if args is None:
+        parser = argparse.ArgumentParser(description="Train EV filter model")
+        add_training_data_args(parser)
+        parser.add_argument("--output_model", default=None)
+        parser.add_argument("--min_ev", type=float, default=DEFAULT_EV_THRESHOLD)
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Update an online model with only new/changed input files.",
+        )
+        add_feature_store_args(parser)
+        add_registry_args(parser, "ev_filter")
+        parser.add_argument("--overwrite", action="store_true")
+        parser.add_argument("--dry_run", action="store_true")
+        parser.add_argument("--verbose", action="store_true")
+        parser.add_argument("--json_logs", action="store_true")
+        args = parser.parse_args()
+
+    if getattr(args, "incremental", False):
+        _run_incremental(args)
+        return
+    df = load_training_data(args)
+    df, extra_features = _join_features(df, args)
+
+    def train():
+        model, report, meta = run_train_ev_filter_model(
+            df, min_ev=args.min_ev, extra_features=extra_features
+        )
+        log_info("Evaluation on holdout set:")
+        log_info("\n" + str(report))
+        return model, meta
+
+    model, meta, _ = cached_training(
+        args,
+        df,
+        [*BASE_FEATURES, *extra_features],
+        "RandomForestClassifier",
+        {"min_ev": args.min_ev},
+        train,
+    )
+    if args.output_model and not args.dry_run:
+        output_path = Path(args.output_model)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         joblib.dump(model, output_path)
         log_success(f"Saved model to {args.output_model}")
         with open(output_path.with_suffix(".json"), "w") as f:
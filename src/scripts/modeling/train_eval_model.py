@@ -6,24 +6,22 @@ import joblib
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, roc_auc_score
-from sklearn.model_selection import GroupShuffleSplit
+from sklearn.metrics import classification_report
 
-from scripts.utils.file_utils import load_dataframes
+from scripts.features.store import FeatureStore
+from scripts.modeling.cross_validation import cross_validate_grouped
+from scripts.modeling.registry import cached_training
+from scripts.modeling.training_dataset import load_training_data
+from scripts.utils.constants import DEFAULT_CV_CACHE_DIR, DEFAULT_CV_SPLITS
 from scripts.utils.git_utils import get_git_hash
 from scripts.utils.logger import log_info, log_success, setup_logging
 from scripts.utils.schema import enforce_schema, normalize_columns, patch_winner_column
 
 
-def run_train_eval_model(
-    df: pd.DataFrame,
-    algorithm: str = "rf",
-    test_size: float = 0.25,
-    random_state: int = 42,
-) -> tuple:
+def prepare_training_data(df: pd.DataFrame) -> tuple:
     """
-    Train a classification model on value bets and evaluate.
-    Returns (model, report, auc, meta_dict).
+    Features (all numeric columns but winner), labels and match_id groups
+    from a DataFrame of value bets.
     """
     df = normalize_columns(df)
     df = patch_winner_column(df)
@@ -32,44 +30,83 @@ def run_train_eval_model(
         raise ValueError("No valid data to train on after preprocessing.")
 
     excluded = {"winner", "match_id"}
+    # Schema columns absent from every source are all-NaN, not features
     feature_cols = [
         c
         for c in df.columns
-        if c not in excluded and pd.api.types.is_numeric_dtype(df[c])
+        if c not in excluded
+        and pd.api.types.is_numeric_dtype(df[c])
+        and df[c].notna().any()
     ]
     if not feature_cols:
         raise ValueError("No numeric feature columns found after preprocessing.")
-    X = df[feature_cols]
-    y = df["winner"]
     if "match_id" not in df.columns:
-        raise ValueError("'match_id' column is required for grouped train/test split.")
-    groups = df["match_id"]
-    gss = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
-    train_idx, test_idx = next(gss.split(X, y, groups))
-    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+        raise ValueError("'match_id' column is required for grouped cross-validation.")
+    return df[feature_cols], df["winner"], df["match_id"]
+
+
+def make_model(algorithm: str, random_state: int = 42, **params):
+    """
+    Unfitted classifier for `algorithm` ("rf" or "logreg") with `params`
+    overriding the defaults.
+    """
     if algorithm == "rf":
-        model = RandomForestClassifier(n_estimators=100, random_state=random_state)
-    elif algorithm == "logreg":
-        model = LogisticRegression(max_iter=500, random_state=random_state)
-    else:
-        raise ValueError(f"Unknown algorithm: {algorithm}")
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-    y_prob = (
-        model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else None
+        params = {"n_estimators": 100, **params}
+        return RandomForestClassifier(random_state=random_state, **params)
+    if algorithm == "logreg":
+        params = {"max_iter": 500, **params}
+        return LogisticRegression(random_state=random_state, **params)
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+def run_train_eval_model(
+    df: pd.DataFrame,
+    algorithm: str = "rf",
+    n_splits: int = DEFAULT_CV_SPLITS,
+    splitter: str = "stratified_group",
+    n_jobs: int = 1,
+    random_state: int = 42,
+    cache_dir: str = DEFAULT_CV_CACHE_DIR,
+) -> tuple:
+    """
+    Evaluate a classification model on value bets with grouped K-fold CV
+    (folds grouped by match_id), then fit it on all rows.
+    Returns (model, report, auc, meta_dict): the report is on out-of-fold
+    predictions, auc the mean fold AUC and meta includes per-fold metrics.
+    """
+    X, y, groups = prepare_training_data(df)
+    model = make_model(algorithm, random_state)
+    folds, oof, timing = cross_validate_grouped(
+        model,
+        X,
+        y,
+        groups,
+        n_splits=n_splits,
+        splitter=splitter,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        cache_dir=cache_dir,
+    )
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    model.fit(X, y)
+    auc = float(folds["auc"].mean())
+    report = classification_report(
+        y, (oof >= 0.5).astype(int), digits=3, output_dict=False
     )
-    auc = roc_auc_score(y_test, y_prob) if y_prob is not None else None
-    report = classification_report(y_test, y_pred, digits=3, output_dict=False)
     meta = {
         "timestamp": datetime.now().isoformat(),
         "git_hash": get_git_hash(),
         "model_type": type(model).__name__,
-        "features": feature_cols,
+        "features": list(X.columns),
         "algorithm": algorithm,
-        "train_rows": len(X_train),
-        "test_rows": len(X_test),
+        "train_rows": len(X),
+        "cv_splitter": splitter,
+        "cv_folds": folds.to_dict(orient="records"),
+        "cv_wall_seconds": timing["wall_seconds"],
+        "cv_fit_seconds": timing["fit_seconds"],
         "auc": auc,
+        "log_loss": float(folds["log_loss"].mean()),
     }
     return model, report, auc, meta
 
@@ -80,16 +117,46 @@ def main_cli(args):
     """
     setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
 
-    df = load_dataframes(args.input_glob)
-    model, report, auc, meta = run_train_eval_model(
-        df, algorithm=args.algorithm, test_size=args.test_size
+    df = load_training_data(args)
+    if args.feature_groups:
+        store = FeatureStore(args.feature_store)
+        df = store.join(df, args.feature_groups, as_of=args.as_of)
+    X, _, _ = prepare_training_data(df)
+
+    def train():
+        model, report, _, meta = run_train_eval_model(
+            df,
+            algorithm=args.algorithm,
+            n_splits=args.n_splits,
+            splitter=args.cv,
+            n_jobs=args.n_jobs,
+            cache_dir=args.cv_cache_dir,
+        )
+        log_info("Out-of-fold evaluation:\n" + str(report))
+        return model, meta
+
+    model, meta, _ = cached_training(
+        args,
+        df,
+        list(X.columns),
+        args.algorithm,
+        {
+            "model": make_model(args.algorithm).get_params(),
+            "n_splits": args.n_splits,
+            "cv": args.cv,
+        },
+        train,
     )
 
-    log_info(f"Evaluation on holdout set (AUC={auc:.3f if auc else 'N/A'}):")
-    log_info("\n" + str(report))
-    output_path = Path(args.output_model)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    if not args.dry_run:
+    folds = pd.DataFrame(meta["cv_folds"])
+    log_info(f"Per-fold metrics:\n{folds.to_string(index=False)}")
+    log_info(
+        f"Cross-validation AUC={meta['auc']:.3f}, log-loss={meta['log_loss']:.4f} "
+        f"(wall {meta['cv_wall_seconds']:.2f}s, fit {meta['cv_fit_seconds']:.2f}s)"
+    )
+    if args.output_model and not args.dry_run:
+        output_path = Path(args.output_model)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         joblib.dump(model, output_path)
         log_success(f"Saved model to {args.output_model}")
         with open(output_path.with_suffix(".json"), "w") as f:
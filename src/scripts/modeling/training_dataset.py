@@ -0,0 +1,266 @@
+"""
+Deduplicated training table built out of core from overlapping CSVs.
+
+data/processed holds several versions of the same bets (e.g. a raw,
+`_deduped` and `_deduped_capped` file per tournament), so concatenating a
+glob trains on some bets several times. The builder streams the matching
+files in chunks, keeps the first row seen for each bet key (match_id, the
+selection and its odds) using a set of 64-bit row hashes, casts the columns
+to DATASET_DTYPES and appends the rows to one gzip-compressed CSV. Memory
+use is bounded by the chunk size plus the set of hashes: a Python int and
+its set slot, roughly 70 bytes per distinct bet (about 70 MB per million).
+
+A JSON manifest next to the table records the dtypes, key, source files
+(mtime and size) and row counts; the table is only rebuilt when the sources
+change. Training commands read it with load_training_dataset.
+"""
+
+import glob
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Hashable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.constants import (
+    DEFAULT_DATASET_CHUNK_ROWS,
+    DEFAULT_TRAINING_DATASET,
+)
+from scripts.utils.file_utils import load_dataframes
+from scripts.utils.logger import log_info, log_success, log_warning, setup_logging
+from scripts.utils.schema import enforce_schema, normalize_columns, patch_winner_column
+
+# The bet: which match, which selection (bets are on player_1) at what price
+DEDUP_KEY = ["match_id", "player_1", "odds"]
+# A file without the bet key or the label cannot contribute training rows
+REQUIRED_COLUMNS = [*DEDUP_KEY, "winner"]
+# Kept besides the value_bets schema: bet time, for ordering
+DATASET_EXTRA_COLUMNS = ["market_time"]
+# Forests train on float32 anyway; names are read back as categories
+DATASET_DTYPES: Dict[str, str] = {
+    "match_id": "string",
+    "player_1": "string",
+    "player_2": "string",
+    "odds": "float32",
+    "predicted_prob": "float32",
+    "expected_value": "float32",
+    "kelly_fraction": "float32",
+    "confidence_score": "float32",
+    "winner": "int8",
+    "market_time": "string",
+}
+_READ_DTYPES: Dict[Hashable, Any] = {
+    col: "category" if col in ("player_1", "player_2") else dtype
+    for col, dtype in DATASET_DTYPES.items()
+}
+
+
+def manifest_path(path: str) -> Path:
+    return Path(str(path) + ".json")
+
+
+def _signatures(files: Sequence[str]) -> Dict[str, list]:
+    signatures = {}
+    for path in files:
+        stat = os.stat(path)
+        signatures[path] = [stat.st_mtime_ns, stat.st_size]
+    return signatures
+
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Repeated CSV headers come back mangled as "<name>.<n>"; keep the first
+    mangled = [
+        c
+        for c in chunk.columns
+        if re.fullmatch(r"(.+)\.\d+", c) and c.rsplit(".", 1)[0] in chunk.columns
+    ]
+    chunk = normalize_columns(chunk.drop(columns=mangled))
+    # Aliasing can duplicate a column (e.g. actual_winner names next to a 0/1
+    # winner); the later one is the pipeline's own
+    chunk = chunk.loc[:, ~chunk.columns.duplicated(keep="last")]
+    chunk = patch_winner_column(chunk)
+    if "match_id" not in chunk.columns:
+        if "market_id" not in chunk.columns:
+            raise ValueError("no match_id or market_id to deduplicate on")
+        chunk = chunk.assign(match_id=chunk["market_id"].astype(str))
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"missing required columns {missing}")
+    chunk = enforce_schema(chunk, "value_bets", extra_columns=DATASET_EXTRA_COLUMNS)
+    for col, dtype in DATASET_DTYPES.items():
+        if dtype.startswith("float"):
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+    return chunk.dropna(subset=DEDUP_KEY).astype(DATASET_DTYPES)
+
+
+def build_training_dataset(
+    pattern: str,
+    output: str = DEFAULT_TRAINING_DATASET,
+    chunk_rows: int = DEFAULT_DATASET_CHUNK_ROWS,
+    rebuild: bool = False,
+) -> Dict[str, Any]:
+    """
+    Stream the CSVs matching `pattern` (in sorted order) into one
+    deduplicated training table at `output`.
+
+    :param rebuild: Rebuild even if the sources are unchanged.
+    :return: The table's manifest.
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No files found matching glob pattern: {pattern}")
+    sources = _signatures(files)
+    manifest_file = manifest_path(output)
+    if not rebuild and Path(output).exists() and manifest_file.exists():
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest["sources"] == sources:
+            log_info(f"Training dataset {output} is up to date.")
+            return manifest
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    partial = Path(str(output) + ".tmp")
+    seen: set = set()
+    rows_read = rows_valid = rows_written = 0
+    per_file = {}
+    for path in files:
+        read_before, written_before = rows_read, rows_written
+        try:
+            for chunk in pd.read_csv(path, chunksize=chunk_rows):
+                rows_read += len(chunk)
+                chunk = _clean_chunk(chunk)
+                rows_valid += len(chunk)
+                hashes = pd.util.hash_pandas_object(chunk[DEDUP_KEY], index=False)
+                keep = ~hashes.duplicated().to_numpy() & np.fromiter(
+                    (h not in seen for h in hashes.tolist()), bool, len(hashes)
+                )
+                seen.update(hashes[keep].tolist())
+                chunk[keep].to_csv(
+                    partial,
+                    mode="a" if rows_written else "w",
+                    header=not rows_written,
+                    index=False,
+                    compression={"method": "gzip", "mtime": 0},
+                )
+                rows_written += int(keep.sum())
+        except (ValueError, KeyError) as e:
+            # Also covers empty and unparsable files
+            log_warning(f"Skipping the rest of {path} due to error: {e}")
+        per_file[path] = {
+            "rows": rows_read - read_before,
+            "new": rows_written - written_before,
+        }
+        log_info(
+            f"{path}: {per_file[path]['new']} of {per_file[path]['rows']} rows new."
+        )
+    if not rows_written:
+        raise ValueError("No rows with a complete bet key were found.")
+    partial.replace(output)
+
+    manifest = {
+        "created": datetime.now().isoformat(),
+        "pattern": pattern,
+        "key": DEDUP_KEY,
+        "dtypes": DATASET_DTYPES,
+        "rows_read": rows_read,
+        "rows": rows_written,
+        "duplicates": rows_valid - rows_written,
+        "skipped": rows_read - rows_valid,
+        "files": per_file,
+        "sources": sources,
+    }
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    log_success(
+        f"Wrote {rows_written} unique bets to {output} "
+        f"({manifest['duplicates']} duplicates and {manifest['skipped']} rows "
+        "without a complete bet key dropped)."
+    )
+    return manifest
+
+
+def load_training_dataset(
+    path: str = DEFAULT_TRAINING_DATASET, skip_rows: int = 0
+) -> pd.DataFrame:
+    """
+    Read a table written by build_training_dataset with its dtypes.
+
+    :param skip_rows: Number of leading data rows to skip (see source_rows).
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(
+            f"No training dataset at {path}; build it with 'model build-dataset'."
+        )
+    df = pd.read_csv(path, dtype=_READ_DTYPES, skiprows=range(1, skip_rows + 1))
+    log_info(f"Loaded {len(df)} rows from training dataset {path}.")
+    return df
+
+
+def source_rows(manifest: Dict[str, Any]) -> Dict[str, list]:
+    """
+    Signature (mtime, size) and number of table rows of each source file,
+    in table order. Sources are written one after the other and a row is
+    kept only if no earlier source had its key, so sources matching a
+    previous build's in the same order lead the table with the same rows.
+    """
+    return {
+        path: [*signature, manifest["files"].get(path, {}).get("new", 0)]
+        for path, signature in manifest["sources"].items()
+    }
+
+
+def unchanged_rows(current: Dict[str, list], previous: Dict[str, list]) -> int:
+    """
+    Number of leading table rows that come from the same sources, in the same
+    order, in two source_rows records.
+    """
+    rows = 0
+    for (path, entry), (old_path, old_entry) in zip(current.items(), previous.items()):
+        if path != old_path or entry != old_entry:
+            break
+        rows += entry[-1]
+    return rows
+
+
+def add_training_data_args(parser) -> None:
+    """
+    Options for training commands: the built training dataset, or a glob of
+    CSVs read as they are.
+    """
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_TRAINING_DATASET,
+        help="Deduplicated training table from 'model build-dataset'.",
+    )
+    parser.add_argument(
+        "--input_glob",
+        default=None,
+        help="Read these value bet CSVs instead of the dataset (not deduplicated).",
+    )
+
+
+def load_training_data(args) -> pd.DataFrame:
+    """
+    Training rows per add_training_data_args: `--input_glob` when given,
+    else the training dataset.
+    """
+    if args.input_glob:
+        return load_dataframes(args.input_glob)
+    return load_training_dataset(args.dataset)
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    build_training_dataset(
+        args.input_glob,
+        output=args.output,
+        chunk_rows=args.chunk_rows,
+        rebuild=args.rebuild,
+    )
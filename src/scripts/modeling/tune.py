@@ -0,0 +1,304 @@
+"""
+Budgeted hyperparameter search by successive halving over grouped CV.
+
+Candidates sampled from a declared search space are scored with grouped
+K-fold CV on a small resource (training rows per fold, or trees for a
+forest); the best 1/eta move on to the next round with eta times the
+resource, until one is left, the resource is exhausted or the wall-clock
+budget runs out. All (candidate, fold) fits of a round run in parallel
+worker processes on the cached folds of scripts.modeling.cross_validation.
+"""
+
+import json
+import math
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_config
+from sklearn.model_selection import ParameterSampler
+
+from scripts.features.store import FeatureStore
+from scripts.modeling.cross_validation import fit_fold, fold_cache, split_budget
+from scripts.modeling.train_eval_model import make_model, prepare_training_data
+from scripts.modeling.training_dataset import load_training_data
+from scripts.utils.constants import DEFAULT_CV_CACHE_DIR, DEFAULT_CV_SPLITS
+from scripts.utils.git_utils import get_git_hash
+from scripts.utils.logger import log_info, log_success, log_warning, setup_logging
+
+RESOURCES = ("n_samples", "n_estimators")
+SCORINGS = ("log_loss", "auc")
+
+# Default search spaces: parameter -> candidate values
+SEARCH_SPACES: Dict[str, Dict[str, list]] = {
+    "rf": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 4, 6, 8, 12, 16],
+        "min_samples_leaf": [1, 2, 5, 10, 20, 50],
+        "max_features": ["sqrt", "log2", 0.5, 1.0],
+    },
+    "logreg": {
+        "C": [float(c) for c in np.logspace(-3, 2, 11)],
+        "class_weight": [None, "balanced"],
+    },
+}
+# Largest forest grown when trees are the halving resource
+DEFAULT_MAX_ESTIMATORS = 400
+
+TRACE_COLUMNS = [
+    "round",
+    "candidate",
+    "resource",
+    "params",
+    "folds",
+    "auc",
+    "log_loss",
+    "fit_seconds",
+]
+
+
+def _schedule(
+    n_candidates: int, max_resource: int, min_resource: int, eta: int
+) -> List[int]:
+    """
+    Resource per round: growing by eta up to max_resource, with as many
+    rounds as it takes to halve the candidates down to one.
+    """
+    n_rounds = 1 + int(math.floor(math.log(max(n_candidates, 1), eta) + 1e-9))
+    return [
+        max(min_resource, int(math.ceil(max_resource / eta ** (n_rounds - 1 - i))))
+        for i in range(n_rounds)
+    ]
+
+
+def _fit_candidate_fold(
+    path: Path,
+    fold: int,
+    candidate: int,
+    model,
+    max_train_rows: Optional[int],
+) -> Tuple[int, Dict[str, Any]]:
+    metrics, _ = fit_fold(path, fold, model, max_train_rows)
+    return candidate, metrics
+
+
+def successive_halving(
+    X,
+    y,
+    groups,
+    algorithm: str = "rf",
+    search_space: Optional[Dict[str, list]] = None,
+    resource: str = "n_samples",
+    n_candidates: int = 27,
+    eta: int = 3,
+    min_resource: Optional[int] = None,
+    max_resource: Optional[int] = None,
+    scoring: str = "log_loss",
+    n_splits: int = DEFAULT_CV_SPLITS,
+    splitter: str = "stratified_group",
+    n_jobs: int = 1,
+    budget_seconds: Optional[float] = None,
+    random_state: int = 42,
+    cache_dir: str = DEFAULT_CV_CACHE_DIR,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    Successive-halving search for `algorithm`'s hyperparameters.
+
+    :param resource: "n_samples" trains each fold on a subset of its rows;
+        "n_estimators" (forests only) grows more trees.
+    :param scoring: Mean fold "log_loss" (lower is better) or "auc".
+    :param budget_seconds: Wall-clock budget; once exceeded, no further fits
+        start and the best fully evaluated candidate so far wins.
+    :return: The best parameters (including the final resource for
+        n_estimators) and the search trace, one row per candidate and round
+        (TRACE_COLUMNS plus `selected`, marking the winning evaluation).
+    """
+    if resource not in RESOURCES:
+        raise ValueError(f"Unknown resource: {resource!r}. Valid: {RESOURCES}")
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring: {scoring!r}. Valid: {SCORINGS}")
+    if resource == "n_estimators" and algorithm != "rf":
+        raise ValueError("The n_estimators resource needs a forest (rf).")
+    deadline = None if budget_seconds is None else time.perf_counter() + budget_seconds
+    space = dict(search_space or SEARCH_SPACES[algorithm])
+    X = np.ascontiguousarray(X, dtype=float)
+    y = np.asarray(y, dtype=np.int64)
+    path = fold_cache(X, y, groups, n_splits, splitter, random_state, cache_dir)
+
+    if resource == "n_estimators":
+        space.pop("n_estimators", None)
+        max_resource = max_resource or DEFAULT_MAX_ESTIMATORS
+        min_resource = min_resource or 10
+    else:
+        max_resource = max_resource or len(y) * (n_splits - 1) // n_splits
+        min_resource = min_resource or min(max_resource, 20 * n_splits)
+    grid_size = math.prod(len(values) for values in space.values())
+    candidates = list(
+        ParameterSampler(
+            space, n_iter=min(n_candidates, grid_size), random_state=random_state
+        )
+    )
+    schedule = _schedule(len(candidates), max_resource, min_resource, eta)
+    outer, inner = split_budget(n_jobs, n_splits * len(candidates))
+
+    alive = list(range(len(candidates)))
+    trace: List[Dict[str, Any]] = []
+    best: Optional[int] = None
+    sign = 1.0 if scoring == "auc" else -1.0
+    with parallel_config(backend="loky", inner_max_num_threads=inner):
+        for round_, amount in enumerate(schedule):
+            models = []
+            for c in alive:
+                params = dict(candidates[c])
+                if resource == "n_estimators":
+                    params["n_estimators"] = amount
+                model = make_model(algorithm, random_state, **params)
+                if "n_jobs" in model.get_params():
+                    model.set_params(n_jobs=inner)
+                models.append((c, model))
+            rows = None if resource == "n_estimators" else amount
+            jobs = (
+                delayed(_fit_candidate_fold)(path, fold, c, model, rows)
+                for c, model in models
+                for fold in range(n_splits)
+            )
+            fold_metrics: Dict[int, List[Dict[str, Any]]] = {c: [] for c in alive}
+            out_of_time = False
+            results = Parallel(n_jobs=outer, return_as="generator")(jobs)
+            with warnings.catch_warnings():
+                # Closing the generator early cancels the remaining fits
+                warnings.filterwarnings("ignore", message=".*cancelled")
+                for c, metrics in results:
+                    fold_metrics[c].append(metrics)
+                    if deadline is not None and time.perf_counter() > deadline:
+                        out_of_time = True
+                        break
+                results.close()
+
+            scores = {}
+            for c, folds in fold_metrics.items():
+                if not folds:
+                    continue
+                frame = pd.DataFrame(folds)
+                trace.append(
+                    {
+                        "round": round_,
+                        "candidate": c,
+                        "resource": amount,
+                        "params": json.dumps(candidates[c], default=str),
+                        "folds": len(frame),
+                        "auc": frame["auc"].mean(),
+                        "log_loss": frame["log_loss"].mean(),
+                        "fit_seconds": frame["fit_seconds"].sum(),
+                    }
+                )
+                if len(frame) == n_splits:
+                    scores[c] = sign * frame[scoring].mean()
+            if scores:
+                ranked = sorted(scores, key=lambda c: scores[c], reverse=True)
+                best = ranked[0]
+                alive = ranked[: max(1, int(math.ceil(len(ranked) / eta)))]
+                log_info(
+                    f"Round {round_}: {len(scores)} candidates at "
+                    f"{resource}={amount}, best {scoring}={sign * scores[best]:.4f}"
+                )
+            if out_of_time:
+                log_warning("Wall-clock budget exhausted; stopping the search.")
+                break
+
+    if best is None:
+        raise RuntimeError("No candidate was fully evaluated within the budget.")
+    trace_df = pd.DataFrame(trace, columns=TRACE_COLUMNS)
+    # The best candidate's evaluation at the largest resource it completed
+    selected = trace_df.index[
+        (trace_df["candidate"] == best) & (trace_df["folds"] == n_splits)
+    ][-1]
+    trace_df["selected"] = trace_df.index == selected
+    best_params = dict(candidates[best])
+    if resource == "n_estimators":
+        best_params["n_estimators"] = int(cast(int, trace_df.at[selected, "resource"]))
+    return best_params, trace_df
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+
+    df = load_training_data(args)
+    if args.feature_groups:
+        store = FeatureStore(args.feature_store)
+        df = store.join(df, args.feature_groups, as_of=args.as_of)
+    X, y, groups = prepare_training_data(df)
+    search_space = None
+    if args.search_space:
+        with open(args.search_space) as f:
+            search_space = json.load(f)
+
+    start = time.perf_counter()
+    best_params, trace = successive_halving(
+        X,
+        y,
+        groups,
+        algorithm=args.algorithm,
+        search_space=search_space,
+        resource=args.resource,
+        n_candidates=args.n_candidates,
+        eta=args.eta,
+        min_resource=args.min_resource,
+        max_resource=args.max_resource,
+        scoring=args.scoring,
+        n_splits=args.n_splits,
+        splitter=args.cv,
+        n_jobs=args.n_jobs,
+        budget_seconds=args.budget_seconds,
+        cache_dir=args.cv_cache_dir,
+    )
+    model = make_model(args.algorithm, **best_params)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=args.n_jobs)
+    model.fit(X, y)
+    best = trace[trace["selected"]].iloc[0]
+    log_info(
+        f"Best parameters: {best_params} "
+        f"(CV AUC={best['auc']:.3f}, log-loss={best['log_loss']:.4f})"
+    )
+
+    meta = {
+        "timestamp": datetime.now().isoformat(),
+        "git_hash": get_git_hash(),
+        "model_type": type(model).__name__,
+        "features": list(X.columns),
+        "algorithm": args.algorithm,
+        "train_rows": len(X),
+        "best_params": best_params,
+        "search": {
+            "resource": args.resource,
+            "scoring": args.scoring,
+            "eta": args.eta,
+            "candidates": args.n_candidates,
+            "rounds": int(trace["round"].max()) + 1,
+            "fits": int(trace["folds"].sum()),
+            "budget_seconds": args.budget_seconds,
+            "wall_seconds": time.perf_counter() - start,
+        },
+        "auc": float(best["auc"]),
+        "log_loss": float(best["log_loss"]),
+    }
+    output_path = Path(args.output_model)
+    trace_path = output_path.with_suffix(".trace.csv")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if not args.dry_run:
+        joblib.dump(model, output_path)
+        log_success(f"Saved model to {args.output_model}")
+        with open(output_path.with_suffix(".json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        log_success(f"Saved metadata to {output_path.with_suffix('.json')}")
+        trace.to_csv(trace_path, index=False)
+        log_success(f"Saved search trace to {trace_path}")
@@ -1,17 +1,27 @@
 # src/scripts/pipeline/build_odds_features.py
 
+from typing import Optional, Sequence
+
 import numpy as np
 import pandas as pd
 
 from scripts.utils.logger import log_info
-from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.schema import (
+    enforce_schema,
+    event_time_columns,
+    normalize_columns,
+)
 
 
-def build_odds_features(df: pd.DataFrame) -> pd.DataFrame:
+def build_odds_features(
+    df: pd.DataFrame, extra_features: Optional[Sequence[pd.DataFrame]] = None
+) -> pd.DataFrame:
     """
     Adds implied probability and bookmaker margin features to a DataFrame.
 
     :param df: The input DataFrame, expected to contain 'ltp_player_1' and 'ltp_player_2' columns.
+    :param extra_features: Optional per-match feature tables keyed by match_id
+        (e.g. tick features) to left-join onto the result.
     :return: A new DataFrame with added feature columns.
     """
     df = normalize_columns(df)
@@ -33,7 +43,14 @@ def build_odds_features(df: pd.DataFrame) -> pd.DataFrame:
         ]:
             df[col] = np.nan
         log_info("Missing LTP columns; filled features with NaN.")
-    return enforce_schema(df, schema_name="features")
+
+    extra_cols: list = event_time_columns(df)
+    for extra in extra_features or []:
+        new_cols = [c for c in extra.columns if c != "match_id"]
+        df = df.drop(columns=[c for c in new_cols if c in df.columns])
+        df = df.merge(extra, on="match_id", how="left")
+        extra_cols.extend(new_cols)
+    return enforce_schema(df, schema_name="features", extra_columns=extra_cols)
 
 
 def main_cli():
@@ -12,10 +12,38 @@ from scripts.utils.constants import (
     DEFAULT_MAX_ODDS,
 )
 from scripts.utils.logger import log_info
-from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.schema import (
+    enforce_schema,
+    event_time_columns,
+    normalize_columns,
+)
 from scripts.utils.validation import validate_value_bets
 
 
+def value_bet_mask(
+    expected_value,
+    confidence,
+    odds,
+    odds_margin=None,
+    ev_threshold: float = DEFAULT_EV_THRESHOLD,
+    confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    max_odds: float = DEFAULT_MAX_ODDS,
+    max_margin: float = DEFAULT_MAX_MARGIN,
+):
+    """
+    Value-bet filter on EV, confidence, odds and (optionally) margin.
+    Works on Series or numpy arrays alike.
+    """
+    mask = (
+        (expected_value >= ev_threshold)
+        & (confidence >= confidence_threshold)
+        & (odds <= max_odds)
+    )
+    if odds_margin is not None:
+        mask &= odds_margin <= max_margin
+    return mask
+
+
 def detect_value_bets(
     df: pd.DataFrame,
     ev_threshold: float = DEFAULT_EV_THRESHOLD,
@@ -37,16 +65,21 @@ def detect_value_bets(
     if "confidence_score" not in df.columns and "predicted_prob" in df.columns:
         df["confidence_score"] = df["predicted_prob"]
 
-    mask = (
-        (df["expected_value"] >= ev_threshold)
-        & (df["confidence_score"] >= confidence_threshold)
-        & (df["odds"] <= max_odds)
+    mask = value_bet_mask(
+        df["expected_value"],
+        df["confidence_score"],
+        df["odds"],
+        df["odds_margin"] if "odds_margin" in df.columns else None,
+        ev_threshold=ev_threshold,
+        confidence_threshold=confidence_threshold,
+        max_odds=max_odds,
+        max_margin=max_margin,
     )
-    if "odds_margin" in df.columns:
-        mask &= df["odds_margin"] <= max_margin
 
     df_filtered = df[mask].copy()
-    return enforce_schema(df_filtered, "value_bets")
+    return enforce_schema(
+        df_filtered, "value_bets", extra_columns=event_time_columns(df_filtered)
+    )
 
 
 def main_cli():
@@ -28,18 +28,22 @@ def assign_selection_ids(
     market_map = build_market_runner_map(snapshots_df)
 
     matches_df = matches_df.copy()
-    matches_df["selection_id_1"] = matches_df.apply(
-        lambda r: match_player_to_selection_id(
-            market_map, r["market_id"], r["player_1"]
-        ),
-        axis=1,
-    )
-    matches_df["selection_id_2"] = matches_df.apply(
-        lambda r: match_player_to_selection_id(
-            market_map, r["market_id"], r["player_2"]
-        ),
-        axis=1,
-    )
+    for side in (1, 2):
+        col = f"selection_id_{side}"
+        looked_up = pd.Series(
+            [
+                match_player_to_selection_id(market_map, market, player)
+                for market, player in zip(
+                    matches_df["market_id"], matches_df[f"player_{side}"]
+                )
+            ],
+            index=matches_df.index,
+            dtype=object,
+        )
+        # Matches built from the market catalog already carry selection ids
+        if col in matches_df.columns:
+            looked_up = looked_up.fillna(matches_df[col])
+        matches_df[col] = looked_up
     return enforce_schema(matches_df, "matches_with_ids")
 
 
@@ -1,21 +1,55 @@
 # src/scripts/pipeline/merge_final_ltps_into_matches.py
 
+from typing import Optional, Sequence
+
+import numpy as np
 import pandas as pd
 
+from scripts.utils.constants import DEFAULT_PRE_OFF_OFFSETS_MIN
 from scripts.utils.logger import log_info
 from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.time_utils import to_epoch_ms
+
+MERGE_MODES = {"final", "asof"}
+
+
+def asof_price_columns(offsets_min: Sequence[int]) -> list:
+    """
+    Column names written by the as-of merge, e.g. 'ltp_player_1_15m'.
+    """
+    return [f"ltp_player_{side}_{offset}m" for offset in offsets_min for side in (1, 2)]
 
 
 def merge_final_ltps(
-    matches_df: pd.DataFrame, snapshots_df: pd.DataFrame
+    matches_df: pd.DataFrame,
+    snapshots_df: pd.DataFrame,
+    mode: str = "final",
+    offsets_min: Optional[Sequence[int]] = None,
+    assume_sorted: bool = False,
 ) -> pd.DataFrame:
     """
     Finds the last traded price (LTP) for each selection and merges it into the matches DataFrame.
 
+    In "asof" mode, prices are instead taken as of `market_time - offset` for
+    every offset in `offsets_min` (see `merge_asof_ltps`).
+
     :param matches_df: DataFrame of matches with selection_id.
     :param snapshots_df: DataFrame of raw snapshot data containing LTPs over time.
+    :param mode: "final" (last price, including in-play) or "asof" (pre-off prices).
+    :param offsets_min: Minutes before the off for "asof" mode.
+    :param assume_sorted: Caller guarantees snapshots are ordered by timestamp.
     :return: The matches_df with a 'final_ltp' column added.
     """
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {mode!r}. Valid modes: {MERGE_MODES}")
+    if mode == "asof":
+        return merge_asof_ltps(
+            matches_df,
+            snapshots_df,
+            offsets_min=offsets_min or DEFAULT_PRE_OFF_OFFSETS_MIN,
+            assume_sorted=assume_sorted,
+        )
+
     matches_df = normalize_columns(matches_df)
     snapshots_df = normalize_columns(snapshots_df)
     final_snaps = (
@@ -33,6 +67,96 @@ def merge_final_ltps(
     return enforce_schema(df_merged, "merged_matches")
 
 
+def merge_asof_ltps(
+    matches_df: pd.DataFrame,
+    snapshots_df: pd.DataFrame,
+    offsets_min: Sequence[int] = DEFAULT_PRE_OFF_OFFSETS_MIN,
+    assume_sorted: bool = False,
+) -> pd.DataFrame:
+    """
+    Attach the last traded price of each player as of `market_time - offset`
+    for several offsets in a single sorted as-of join.
+
+    All (match, player, offset) lookups are stacked into one query frame and
+    joined against the tick table with `pd.merge_asof` keyed by
+    (market_id, selection_id). Only the timestamp column has to be ordered, and
+    parser output already is, so the tick table is sorted only when it is not
+    monotonic (or never, with `assume_sorted=True`).
+
+    `ltp_player_1/2` hold the price at the smallest offset (closest to the off).
+
+    :param matches_df: Matches with market_id, market_time, selection_id_1/2.
+    :param snapshots_df: Ticks with market_id, selection_id, timestamp, ltp.
+    :param offsets_min: Minutes before the scheduled off.
+    :param assume_sorted: Skip the monotonicity check and sort.
+    :return: merged_matches schema plus one column per (player, offset).
+    """
+    matches_df = normalize_columns(matches_df).reset_index(drop=True)
+    snapshots_df = normalize_columns(snapshots_df)
+    offsets_min = sorted(set(int(o) for o in offsets_min))
+
+    ticks = snapshots_df.loc[
+        snapshots_df["ltp"].notna() & snapshots_df["selection_id"].notna(),
+        ["timestamp", "market_id", "selection_id", "ltp"],
+    ]
+    ticks = ticks.assign(
+        timestamp=to_epoch_ms(ticks["timestamp"]),
+        selection_id=ticks["selection_id"].astype("int64"),
+    )
+    if not assume_sorted and not ticks["timestamp"].is_monotonic_increasing:
+        log_info("Snapshots not ordered by timestamp; sorting before as-of join.")
+        ticks = ticks.sort_values("timestamp", kind="stable")
+
+    off_ms = to_epoch_ms(matches_df["market_time"]).to_numpy()
+    n_rows, n_offsets = len(matches_df), len(offsets_min)
+    queries = []
+    for side in (1, 2):
+        queries.append(
+            pd.DataFrame(
+                {
+                    "row": np.repeat(np.arange(n_rows), n_offsets),
+                    "column": np.tile(
+                        [f"ltp_player_{side}_{o}m" for o in offsets_min], n_rows
+                    ),
+                    "market_id": np.repeat(
+                        matches_df["market_id"].to_numpy(), n_offsets
+                    ),
+                    "selection_id": np.repeat(
+                        matches_df[f"selection_id_{side}"].to_numpy(), n_offsets
+                    ),
+                    "timestamp": (
+                        np.repeat(off_ms, n_offsets)
+                        - np.tile(np.array(offsets_min) * 60_000, n_rows)
+                    ),
+                }
+            )
+        )
+    query_df = pd.concat(queries, ignore_index=True).dropna(subset=["selection_id"])
+    query_df = query_df.astype({"selection_id": "int64", "timestamp": "int64"})
+    if query_df["market_id"].dtype != ticks["market_id"].dtype:
+        query_df["market_id"] = query_df["market_id"].astype(str)
+        ticks = ticks.assign(market_id=ticks["market_id"].astype(str))
+
+    joined = pd.merge_asof(
+        query_df.sort_values("timestamp", kind="stable"),
+        ticks,
+        on="timestamp",
+        by=["market_id", "selection_id"],
+        direction="backward",
+    )
+    prices = joined.pivot(index="row", columns="column", values="ltp")
+
+    price_cols = asof_price_columns(offsets_min)
+    df_merged = matches_df.join(prices.reindex(columns=price_cols))
+    df_merged["ltp_player_1"] = df_merged[f"ltp_player_1_{offsets_min[0]}m"]
+    df_merged["ltp_player_2"] = df_merged[f"ltp_player_2_{offsets_min[0]}m"]
+    log_info(
+        f"Attached as-of prices at {offsets_min} min before the off "
+        f"for {n_rows} matches from {len(ticks)} ticks."
+    )
+    return enforce_schema(df_merged, "merged_matches", extra_columns=price_cols)
+
+
 def main_cli():
     import argparse
 
@@ -40,13 +164,32 @@ def main_cli():
     parser.add_argument("--matches_csv", required=True)
     parser.add_argument("--snapshots_csv", required=True)
     parser.add_argument("--output_csv", required=True)
+    parser.add_argument("--mode", choices=sorted(MERGE_MODES), default="final")
+    parser.add_argument(
+        "--offsets_min",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_PRE_OFF_OFFSETS_MIN),
+        help="Minutes before the off at which to take prices (asof mode).",
+    )
+    parser.add_argument(
+        "--assume_sorted",
+        action="store_true",
+        help="Snapshots are already ordered by timestamp; skip the sort check.",
+    )
     parser.add_argument("--overwrite", action="store_true")
     parser.add_argument("--dry_run", action="store_true")
     parser.add_argument("--verbose", action="store_true")
     args = parser.parse_args()
     df_matches = pd.read_csv(args.matches_csv)
     df_snaps = pd.read_csv(args.snapshots_csv)
-    result = merge_final_ltps(df_matches, df_snaps)
+    result = merge_final_ltps(
+        df_matches,
+        df_snaps,
+        mode=args.mode,
+        offsets_min=args.offsets_min,
+        assume_sorted=args.assume_sorted,
+    )
     if not args.dry_run:
         result.to_csv(args.output_csv, index=False)
         log_info(f"Merged matches written to {args.output_csv}")
@@ -1,53 +1,102 @@
 # src/scripts/pipeline/predict_win_probs.py
 
+from typing import Dict
+
 import pandas as pd
 
+from scripts.modeling.model_cache import load_model
 from scripts.utils.logger import log_info
-from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.schema import (
+    enforce_schema,
+    event_time_columns,
+    normalize_columns,
+)
 
+DEFAULT_FEATURES = [
+    "implied_prob_1",
+    "implied_prob_2",
+    "implied_prob_diff",
+    "odds_margin",
+]
 
-def predict_win_probs(model, df: pd.DataFrame, features=None) -> pd.DataFrame:
+
+def _score(model, df: pd.DataFrame, features=None) -> pd.DataFrame:
     """
-    Adds win probability predictions to the input DataFrame.
+    Rows with all model features present, with a predicted_prob column.
     """
     df = normalize_columns(df)
     if features is None:
-        features = getattr(
-            model,
-            "feature_names_in_",
-            ["implied_prob_1", "implied_prob_2", "implied_prob_diff", "odds_margin"],
-        )
+        features = getattr(model, "feature_names_in_", DEFAULT_FEATURES)
     missing = [f for f in features if f not in df.columns]
     for f in missing:
         df[f] = pd.NA
-    df_valid = df.dropna(subset=features)
+    df_valid = df.dropna(subset=features).copy()
     if df_valid.empty:
-        empty_df = pd.DataFrame(
-            columns=enforce_schema(pd.DataFrame(), "predictions").columns
-        )
-        return enforce_schema(empty_df, "predictions")
+        return df_valid.assign(predicted_prob=pd.Series(dtype=float))
     if hasattr(model, "predict_proba"):
         df_valid["predicted_prob"] = model.predict_proba(df_valid[features])[:, 1]
     else:
         df_valid["predicted_prob"] = model.predict(df_valid[features])
+    return df_valid
+
+
+def predict_win_probs(model, df: pd.DataFrame, features=None) -> pd.DataFrame:
+    """
+    Adds win probability predictions to the input DataFrame.
+    """
+    df_valid = _score(model, df, features)
+    times = event_time_columns(df_valid)
+    if df_valid.empty:
+        empty_df = pd.DataFrame(
+            columns=enforce_schema(pd.DataFrame(), "predictions", times).columns
+        )
+        return enforce_schema(empty_df, "predictions", times)
     log_info("Added predicted_prob column.")
-    return enforce_schema(df_valid, "predictions")
+    return enforce_schema(df_valid, "predictions", extra_columns=times)
+
+
+def predict_win_probs_batch(
+    model, frames: Dict[str, pd.DataFrame], features=None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Score feature frames from several labels in a single model call and split
+    the predictions back per label.
+
+    :param frames: Feature DataFrames keyed by label.
+    :return: Predictions ("predictions" schema) keyed by label.
+    """
+    if not frames:
+        return {}
+    combined = pd.concat(
+        [normalize_columns(df).assign(_label=label) for label, df in frames.items()],
+        ignore_index=True,
+    )
+    scored = _score(model, combined, features)
+    log_info(f"Scored {len(scored)} rows from {len(frames)} labels in one call.")
+    by_label = dict(tuple(scored.groupby("_label", sort=False)))
+    return {
+        label: enforce_schema(
+            by_label.get(label, scored.iloc[0:0]).reset_index(drop=True),
+            "predictions",
+            extra_columns=event_time_columns(scored),
+        )
+        for label in frames
+    }
 
 
 def main_cli():
     import argparse
 
-    import joblib
-
     parser = argparse.ArgumentParser(description="Predict win probabilities")
     parser.add_argument("--model_file", required=True)
     parser.add_argument("--input_csv", required=True)
     parser.add_argument("--output_csv", required=True)
+    parser.add_argument("--mmap_mode", choices=["r", "r+", "c"], default=None)
     parser.add_argument("--overwrite", action="store_true")
     parser.add_argument("--dry_run", action="store_true")
     parser.add_argument("--verbose", action="store_true")
     args = parser.parse_args()
-    model = joblib.load(args.model_file)
+    model = load_model(args.model_file, mmap_mode=args.mmap_mode)
     df = pd.read_csv(args.input_csv)
     result = predict_win_probs(model, df)
     if not args.dry_run:
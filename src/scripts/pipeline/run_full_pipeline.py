@@ -1,18 +1,46 @@
 import traceback
 from pathlib import Path
 
-import joblib
 import pandas as pd
 
+from scripts.features.elo import EloEngine, compute_elo_features
+from scripts.features.player_form import (
+    compute_form_features,
+    load_or_build_form_tables,
+)
+from scripts.features.sackmann import (
+    file_signatures,
+    sackmann_files,
+    signatures_digest,
+)
+from scripts.features.store import FeatureStore
+from scripts.features.tick_features import compute_tick_features
+from scripts.modeling.model_cache import load_model
+from scripts.pipeline.predict_win_probs import predict_win_probs_batch
 from scripts.pipeline.stages import STAGE_FUNCS
 from scripts.utils.config import load_config
 from scripts.utils.constants import (
     DEFAULT_CONFIDENCE_THRESHOLD,
+    DEFAULT_ELO_STATE_DIR,
     DEFAULT_EV_THRESHOLD,
+    DEFAULT_FEATURE_STORE_DIR,
+    DEFAULT_FORM_STATE_DIR,
+    DEFAULT_FORM_WINDOW,
+    DEFAULT_IDENTITY_DB,
+    DEFAULT_LATE_MONEY_WINDOW_MIN,
     DEFAULT_MAX_MARGIN,
     DEFAULT_MAX_ODDS,
+    DEFAULT_MODEL_REGISTRY_DIR,
+    DEFAULT_MOMENTUM_WINDOW_MIN,
+    DEFAULT_SACKMANN_GLOB,
 )
 from scripts.utils.logger import log_error, log_info, log_success, log_warning
+from scripts.utils.player_identity import (
+    PlayerIdentityStore,
+    PlayerResolver,
+    build_sackmann_roster,
+    load_alias_map,
+)
 
 
 def resolve_stage_paths(label_cfg, working_dir):
@@ -24,6 +52,7 @@ def resolve_stage_paths(label_cfg, working_dir):
     label = label_cfg["label"]
     all_keys = [
         "snapshots_csv",
+        "catalog_csv",
         "matches_csv",
         "matches_with_ids_csv",
         "merged_matches_csv",
@@ -42,6 +71,157 @@ def resolve_stage_paths(label_cfg, working_dir):
     return paths
 
 
+def resolve_sackmann_ids(label_cfg, matches_df):
+    """
+    Attach sackmann_id_1/2 to matches via the persistent identity store,
+    falling back to the label's Sackmann roster and alias file.
+    """
+    roster = {}
+    if label_cfg.get("sackmann_csv") and Path(label_cfg["sackmann_csv"]).exists():
+        roster = build_sackmann_roster(pd.read_csv(label_cfg["sackmann_csv"]))
+    alias_map = None
+    if label_cfg.get("alias_csv"):
+        alias_map = load_alias_map(label_cfg["alias_csv"])
+    with PlayerIdentityStore(
+        label_cfg.get("identity_db", DEFAULT_IDENTITY_DB)
+    ) as store:
+        resolver = PlayerResolver(
+            roster,
+            store,
+            alias_map=alias_map,
+            fuzzy=label_cfg.get("fuzzy_match", True),
+        )
+        return resolver.resolve_matches(matches_df)
+
+
+def history_start_date(label_cfg, matches_df):
+    """
+    Date Elo and form features are taken as of: the label's start_date, or
+    else the day of its earliest market_time. Sackmann dates every match with
+    its tournament start, so per-match dates would leak later rounds.
+    """
+    if label_cfg.get("start_date"):
+        return label_cfg["start_date"]
+    if "market_time" not in matches_df.columns:
+        raise ValueError(
+            f"{label_cfg['label']}: elo/form features need a start_date or "
+            "market_time column."
+        )
+    times = pd.to_datetime(matches_df["market_time"], utc=True, errors="coerce")
+    if times.isna().all():
+        raise ValueError(
+            f"{label_cfg['label']}: elo/form features need a start_date; "
+            "no market_time could be parsed."
+        )
+    start_date = times.min().tz_localize(None).normalize().date().isoformat()
+    log_warning(
+        f"{label_cfg['label']}: no start_date configured; taking Elo and form "
+        f"features as of the earliest market_time, {start_date}."
+    )
+    return start_date
+
+
+def build_extra_features(label_cfg, merged_df, resolved_paths):
+    """
+    Optional per-match feature tables enabled in the label config:
+    `tick_features` (tick history), `elo_features` (Elo ratings) and
+    `form_features` (rolling form and head-to-head).
+
+    Each group is read from the feature store (`feature_store`, set to null to
+    disable) and only computed for matches it does not hold yet. Elo and form
+    features are taken as of history_start_date.
+    """
+    store_dir = label_cfg.get("feature_store", DEFAULT_FEATURE_STORE_DIR)
+    store = FeatureStore(store_dir) if store_dir else None
+
+    def feature_group(group, matches_df, compute, definition, params, available_at):
+        if store is None:
+            return compute(matches_df)
+        return store.materialize(
+            group,
+            matches_df,
+            compute,
+            definition,
+            params=params,
+            available_at=available_at,
+        )
+
+    extra_features = []
+    tour = label_cfg.get("tour", "atp")
+    sackmann_glob = label_cfg.get(
+        "sackmann_glob", DEFAULT_SACKMANN_GLOB.format(tour=tour)
+    )
+    resolved_df = None
+    if label_cfg.get("elo_features", False) or label_cfg.get("form_features", False):
+        start_date = history_start_date(label_cfg, merged_df)
+        resolved_df = resolve_sackmann_ids(label_cfg, merged_df)
+    if label_cfg.get("tick_features", False):
+        params = {
+            "late_window_min": label_cfg.get(
+                "late_window_min", DEFAULT_LATE_MONEY_WINDOW_MIN
+            ),
+            "momentum_window_min": label_cfg.get(
+                "momentum_window_min", DEFAULT_MOMENTUM_WINDOW_MIN
+            ),
+        }
+        extra_features.append(
+            feature_group(
+                "tick",
+                merged_df,
+                lambda todo: compute_tick_features(
+                    pd.read_csv(resolved_paths["snapshots_csv"]),
+                    todo,
+                    assume_sorted=label_cfg.get("snapshots_sorted", False),
+                    **params,
+                ),
+                compute_tick_features,
+                params,
+                available_at=None,
+            )
+        )
+    if label_cfg.get("elo_features", False):
+        state_dir = Path(label_cfg.get("elo_state_dir", DEFAULT_ELO_STATE_DIR)) / tour
+        engine = EloEngine.load(state_dir)
+        if engine.update_from_files(sackmann_glob):
+            engine.save(state_dir)
+        surface = label_cfg.get("surface")
+        extra_features.append(
+            feature_group(
+                "elo",
+                resolved_df,
+                lambda todo: compute_elo_features(
+                    todo, engine, surface=surface, as_of=start_date
+                ),
+                compute_elo_features,
+                {**engine.params, "surface": surface, "sources": engine.source_digest},
+                available_at=start_date,
+            )
+        )
+    if label_cfg.get("form_features", False):
+        window = label_cfg.get("form_window", DEFAULT_FORM_WINDOW)
+        form, h2h = load_or_build_form_tables(
+            sackmann_glob,
+            Path(label_cfg.get("form_state_dir", DEFAULT_FORM_STATE_DIR)) / tour,
+            window=window,
+        )
+        extra_features.append(
+            feature_group(
+                "form",
+                resolved_df,
+                lambda todo: compute_form_features(todo, form, h2h, as_of=start_date),
+                compute_form_features,
+                {
+                    "window": window,
+                    "sources": signatures_digest(
+                        file_signatures(sackmann_files(sackmann_glob))
+                    ),
+                },
+                available_at=start_date,
+            )
+        )
+    return extra_features
+
+
 def run_pipeline_for_label(
     label_cfg,
     stages,
@@ -99,7 +279,13 @@ def run_pipeline_for_label(
                 log_info(f"[DRY-RUN] Would write to {output_path}")
                 result = None
             elif stage == "predict":
-                model = joblib.load(input_paths["model_file"])
+                model = load_model(
+                    input_paths["model_file"],
+                    mmap_mode=label_cfg.get("model_mmap_mode"),
+                    registry_dir=label_cfg.get(
+                        "model_registry", DEFAULT_MODEL_REGISTRY_DIR
+                    ),
+                )
                 features_df = pd.read_csv(input_paths["features_csv"])
                 result = fn(model, features_df)
             elif stage == "detect":
@@ -119,6 +305,22 @@ def run_pipeline_for_label(
                     max_odds=max_odds,
                     max_margin=max_margin,
                 )
+            elif stage == "merge":
+                matches_df = pd.read_csv(input_paths["matches_with_ids_csv"])
+                snapshots_df = pd.read_csv(input_paths["snapshots_csv"])
+                result = fn(
+                    matches_df,
+                    snapshots_df,
+                    mode=label_cfg.get("ltp_mode", "final"),
+                    offsets_min=label_cfg.get("ltp_offsets_min"),
+                    assume_sorted=label_cfg.get("snapshots_sorted", False),
+                )
+            elif stage == "features":
+                merged_df = pd.read_csv(input_paths["merged_matches_csv"])
+                extra_features = build_extra_features(
+                    label_cfg, merged_df, resolved_paths
+                )
+                result = fn(merged_df, extra_features=extra_features)
             else:
                 input_dfs = [pd.read_csv(p) for k, p in input_paths.items()]
                 result = fn(*input_dfs)
@@ -141,6 +343,60 @@ def run_pipeline_for_label(
         log_success(f"🎉 Pipeline finished successfully for label: {label}")
     else:
         log_error(f"💔 Pipeline failed for label: {label}")
+    return pipeline_ok
+
+
+def run_batch_predict(label_cfgs, working_dir, dry_run=False, overwrite=False):
+    """
+    Predict stage for several labels at once: features from all labels that
+    share a model file are scored in one call and split back per label.
+    Returns the labels whose predictions are available.
+    """
+    pending = {}
+    done = []
+    for label_cfg in label_cfgs:
+        label = label_cfg["label"]
+        paths = resolve_stage_paths(label_cfg, working_dir)
+        if "model_file" not in paths:
+            log_error(f"❌ Missing input 'model_file' for stage 'predict' ({label})")
+            continue
+        if not overwrite and not dry_run and paths["predictions_csv"].exists():
+            log_info(f"Skipping predict for {label}: output file already exists.")
+            done.append(label)
+            continue
+        if not dry_run and not paths["features_csv"].exists():
+            log_error(f"❌ Missing input 'features_csv' for stage 'predict' ({label})")
+            continue
+        key = (
+            paths["model_file"],
+            label_cfg.get("model_mmap_mode"),
+            label_cfg.get("model_registry", DEFAULT_MODEL_REGISTRY_DIR),
+        )
+        pending.setdefault(key, []).append((label, paths))
+
+    for (model_file, mmap_mode, registry_dir), entries in pending.items():
+        if dry_run:
+            for label, paths in entries:
+                log_info(f"[DRY-RUN] Would write to {paths['predictions_csv']}")
+            continue
+        try:
+            model = load_model(
+                model_file, mmap_mode=mmap_mode, registry_dir=registry_dir
+            )
+            frames = {
+                label: pd.read_csv(paths["features_csv"]) for label, paths in entries
+            }
+            predictions = predict_win_probs_batch(model, frames)
+        except Exception as e:
+            log_error(f"❌ Batch predict failed for model {model_file}: {e}")
+            continue
+        for label, paths in entries:
+            output_path = paths["predictions_csv"]
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            predictions[label].to_csv(output_path, index=False)
+            log_success(f"✅ Stage 'predict' complete. Output: {output_path}")
+            done.append(label)
+    return done
 
 
 def main(
@@ -152,6 +408,7 @@ def main(
     verbose=False,
     json_logs=False,
     working_dir="data/processed",
+    batch_predict=False,
 ):
     # This function is now the main entry point called by the unified CLI
     app_cfg = load_config(config)
@@ -171,19 +428,35 @@ def main(
     if only:
         log_warning(f"Running only a subset of stages: {only}")
 
-    for label_cfg in labels_to_run:
-        if not label_cfg.get("label"):
-            if not batch:
-                log_error("❌ No 'label' found in pipeline config. Exiting.")
-            continue
+    labels_to_run = [cfg for cfg in labels_to_run if cfg.get("label")]
+    if not labels_to_run and not batch:
+        log_error("❌ No 'label' found in pipeline config. Exiting.")
+        return
 
+    run_kwargs = dict(
+        dry_run=dry_run,
+        overwrite=overwrite,
+        verbose=verbose,
+        json_logs=json_logs,
+        only=only,
+    )
+    if not batch_predict or "predict" not in stages:
+        for label_cfg in labels_to_run:
+            run_pipeline_for_label(label_cfg, stages, working_dir, **run_kwargs)
+        return
+
+    # Run every label up to the predict stage, score all labels together,
+    # then run the remaining stages per label
+    split = stages.index("predict")
+    ready = [
+        label_cfg
+        for label_cfg in labels_to_run
+        if run_pipeline_for_label(label_cfg, stages[:split], working_dir, **run_kwargs)
+    ]
+    if not only or "predict" in only:
+        predicted = set(run_batch_predict(ready, working_dir, dry_run, overwrite))
+        ready = [cfg for cfg in ready if cfg["label"] in predicted]
+    for label_cfg in ready:
         run_pipeline_for_label(
-            label_cfg,
-            stages,
-            working_dir,
-            dry_run,
-            overwrite,
-            verbose,
-            json_logs,
-            only=only,
+            label_cfg, stages[split + 1 :], working_dir, **run_kwargs
         )
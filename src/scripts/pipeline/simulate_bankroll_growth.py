@@ -1,33 +1,209 @@
 # src/scripts/pipeline/simulate_bankroll_growth.py
 
 import argparse
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from scripts.utils.betting_math import add_ev_and_kelly
-from scripts.utils.constants import DEFAULT_INITIAL_BANKROLL
-from scripts.utils.logger import log_info
-from scripts.utils.schema import enforce_schema, normalize_columns
+from scripts.utils.betting_math import add_ev_and_kelly, bet_returns
+from scripts.utils.constants import (
+    DEFAULT_FLAT_STAKE,
+    DEFAULT_INITIAL_BANKROLL,
+    DEFAULT_KELLY_MAX_EXPOSURE,
+    DEFAULT_KELLY_WINDOW_FREQ,
+    DEFAULT_SETTLE_AFTER_MIN,
+)
+from scripts.utils.event_simulation import exposure_summary, simulate_events
+from scripts.utils.kelly import simultaneous_kelly_windows
+from scripts.utils.logger import log_info, log_warning
+from scripts.utils.schema import (
+    enforce_schema,
+    normalize_columns,
+    patch_winner_column,
+)
+from scripts.utils.simulation import (
+    SIMULATION_COLUMNS,
+    running_drawdown,
+    simulate_bankroll_path,
+)
+from scripts.utils.time_utils import to_epoch_ms
+
+STRATEGIES = ("kelly", "flat", "simultaneous")
+
+
+def simultaneous_windows(
+    df: pd.DataFrame, window_col: str, window_freq: Optional[str]
+) -> pd.Series:
+    """
+    Window key of each bet for the simultaneous strategy: the `window_freq`
+    period of its `window_col` timestamp, or the raw value when `window_freq`
+    is None.
+    """
+    if not window_freq:
+        return df[window_col]
+    times = pd.to_datetime(to_epoch_ms(df[window_col]), unit="ms", utc=True)
+    return times.dt.floor(window_freq).set_axis(df.index)
+
+
+def _simulate_simultaneous(
+    df: pd.DataFrame,
+    initial_bankroll: float,
+    window_col: str,
+    window_freq: Optional[str],
+    max_exposure: float,
+    initial_peak: float,
+) -> pd.DataFrame:
+    """
+    Stake each window of concurrent bets (see simultaneous_windows) with
+    simultaneous Kelly fractions of the bankroll at the window's start; the
+    window settles as a whole.
+    """
+    if window_col in df.columns:
+        df = df.sort_values(window_col, kind="stable").reset_index(drop=True)
+        windows = simultaneous_windows(df, window_col, window_freq).to_numpy()
+    else:
+        log_warning(f"No '{window_col}' column: treating every bet as its own window.")
+        windows = np.arange(len(df))
+    fractions = simultaneous_kelly_windows(
+        df["predicted_prob"], df["odds"], windows, max_exposure=max_exposure
+    )
+    _, window_idx = np.unique(windows, return_inverse=True)
+    returns = bet_returns(fractions, df["odds"], df["winner"])
+    growth = 1.0 + np.bincount(window_idx, weights=returns)
+    start = (initial_bankroll * np.r_[1.0, np.cumprod(growth)[:-1]])[window_idx]
+    pnl = returns * start
+    # Running bankroll within a window as its bets settle, in row order
+    within = pd.Series(pnl).groupby(window_idx).cumsum().to_numpy()
+    peak, drawdown = running_drawdown(start + within, initial_peak)
+    df["kelly_fraction"] = fractions
+    df.insert(0, "bankroll", start)
+    return df.assign(
+        stake=fractions * start,
+        pnl=pnl,
+        bankroll_after=start + within,
+        peak=peak,
+        drawdown=drawdown,
+    )
+
+
+def _simulate_event_driven(
+    df: pd.DataFrame,
+    initial_bankroll: float,
+    flat_stake: Optional[float],
+    max_stake: Optional[float],
+    placed_col: str,
+    settled_col: str,
+    settle_after_min: float,
+) -> pd.DataFrame:
+    """
+    Place each bet at `placed_col`, lock its stake until `settled_col` (or
+    `settle_after_min` later when unknown) and size it from the available
+    balance (see scripts.utils.event_simulation).
+    """
+    if placed_col not in df.columns:
+        raise ValueError(f"Event-driven simulation needs a '{placed_col}' column.")
+    placed = to_epoch_ms(df[placed_col]).to_numpy()
+    settled = placed + int(settle_after_min * 60_000)
+    if settled_col in df.columns:
+        known = df[settled_col].notna().to_numpy()
+        settled[known] = to_epoch_ms(df.loc[known, settled_col]).to_numpy()
+    per_bet, timeline = simulate_events(
+        placed,
+        settled,
+        df["odds"],
+        df["winner"] == 1,
+        fractions=df["kelly_fraction"],
+        initial_bankroll=initial_bankroll,
+        flat_stake=flat_stake,
+        max_stake=max_stake,
+    )
+    summary = exposure_summary(timeline)
+    log_info("Exposure: " + ", ".join(f"{k}={v:.4g}" for k, v in summary.items()))
+    df = df.reset_index(drop=True)
+    df[per_bet.columns] = per_bet.to_numpy()
+    return df
 
 
 def simulate_bankroll_growth(
-    df: pd.DataFrame, initial_bankroll: float = DEFAULT_INITIAL_BANKROLL
+    df: pd.DataFrame,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    strategy: str = "kelly",
+    window_col: str = "market_time",
+    window_freq: Optional[str] = DEFAULT_KELLY_WINDOW_FREQ,
+    max_exposure: float = DEFAULT_KELLY_MAX_EXPOSURE,
+    flat_stake: float = DEFAULT_FLAT_STAKE,
+    max_stake: Optional[float] = None,
+    initial_peak: Optional[float] = None,
+    event_driven: bool = False,
+    placed_col: str = "market_time",
+    settled_col: str = "settled_time",
+    settle_after_min: float = DEFAULT_SETTLE_AFTER_MIN,
 ) -> pd.DataFrame:
     """
     Simulate bankroll growth from value bet DataFrame.
+
+    `bankroll` is the bankroll before each bet; stake, pnl, bankroll_after,
+    the running peak and drawdown come from the vectorised kernels in
+    scripts.utils.simulation.
+
+    :param strategy: "kelly" stakes each bet's kelly_fraction of the running
+        bankroll (capped at `max_stake` if given); "flat" stakes `flat_stake`;
+        "simultaneous" treats bets in the same `window_freq` period of
+        `window_col` (by default the calendar day of market_time) as
+        concurrent and sizes them jointly (see scripts.utils.kelly).
+    :param window_freq: pandas frequency of the simultaneous windows, or None
+        to group bets by exact `window_col` values.
+    :param max_exposure: Cap on the total fraction staked per window for the
+        simultaneous strategy.
+    :param initial_peak: Peak to measure drawdown from when continuing an
+        earlier simulation.
+    :param event_driven: For "kelly" and "flat", place bets at `placed_col`
+        and lock stakes until `settled_col` instead of settling each bet
+        before the next; adds exposure and open_bets columns.
     """
-    df = normalize_columns(df)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy!r}. Valid: {STRATEGIES}")
+    df = patch_winner_column(normalize_columns(df))
     df_metrics = add_ev_and_kelly(df)
-    df_metrics = df_metrics.copy()
-    df_metrics.insert(0, "bankroll", initial_bankroll)
-    for idx in df_metrics.index[1:]:
-        prev_bank = df_metrics.at[idx - 1, "bankroll"]
-        kelly = df_metrics.at[idx - 1, "kelly_fraction"]
-        bet_amount = prev_bank * kelly
-        outcome = df_metrics.at[idx - 1, "winner"]
-        odds = df_metrics.at[idx - 1, "odds"]
-        pnl = bet_amount * (odds - 1) * outcome - bet_amount * (1 - outcome)
-        df_metrics.at[idx, "bankroll"] = prev_bank + pnl
+    if event_driven:
+        if strategy == "simultaneous":
+            raise ValueError("Event-driven mode supports 'kelly' and 'flat' only.")
+        df_metrics = _simulate_event_driven(
+            df_metrics,
+            initial_bankroll,
+            flat_stake if strategy == "flat" else None,
+            max_stake,
+            placed_col,
+            settled_col,
+            settle_after_min,
+        )
+        return enforce_schema(
+            df_metrics,
+            schema_name="simulations",
+            extra_columns=["exposure", "open_bets"],
+        )
+    if strategy == "simultaneous":
+        df_metrics = _simulate_simultaneous(
+            df_metrics,
+            initial_bankroll,
+            window_col,
+            window_freq,
+            max_exposure,
+            initial_bankroll if initial_peak is None else initial_peak,
+        )
+        return enforce_schema(df_metrics, schema_name="simulations")
+    path = simulate_bankroll_path(
+        df_metrics["odds"],
+        df_metrics["winner"] == 1,
+        fractions=df_metrics["kelly_fraction"],
+        initial_bankroll=initial_bankroll,
+        flat_stake=flat_stake if strategy == "flat" else None,
+        max_stake=max_stake,
+        initial_peak=initial_peak,
+    )
+    df_metrics = df_metrics.reset_index(drop=True)
+    df_metrics[SIMULATION_COLUMNS] = path.to_numpy()
     return enforce_schema(df_metrics, schema_name="simulations")
 
 
@@ -41,12 +217,76 @@ def main_cli():
         default=DEFAULT_INITIAL_BANKROLL,
         help="The starting bankroll for the simulation.",
     )
+    parser.add_argument("--strategy", choices=STRATEGIES, default="kelly")
+    parser.add_argument(
+        "--window_col",
+        default="market_time",
+        help="Timestamp column grouping concurrent bets (simultaneous strategy).",
+    )
+    parser.add_argument(
+        "--window_freq",
+        default=DEFAULT_KELLY_WINDOW_FREQ,
+        help="Period of --window_col forming one window, e.g. D or 6h; "
+        "'none' groups by exact values.",
+    )
+    parser.add_argument(
+        "--max_exposure",
+        type=float,
+        default=DEFAULT_KELLY_MAX_EXPOSURE,
+        help="Maximum total fraction staked per window (simultaneous strategy).",
+    )
+    parser.add_argument(
+        "--flat_stake",
+        type=float,
+        default=DEFAULT_FLAT_STAKE,
+        help="Stake per bet for the flat strategy.",
+    )
+    parser.add_argument(
+        "--max_stake",
+        type=float,
+        default=None,
+        help="Cap on any single Kelly stake.",
+    )
+    parser.add_argument(
+        "--event_driven",
+        action="store_true",
+        help="Lock stakes from placement until settlement (kelly/flat).",
+    )
+    parser.add_argument(
+        "--placed_col",
+        default="market_time",
+        help="Placement time column for event-driven simulation.",
+    )
+    parser.add_argument(
+        "--settled_col",
+        default="settled_time",
+        help="Settlement time column for event-driven simulation.",
+    )
+    parser.add_argument(
+        "--settle_after_min",
+        type=float,
+        default=DEFAULT_SETTLE_AFTER_MIN,
+        help="Minutes to settlement for bets without a settled time.",
+    )
     parser.add_argument("--overwrite", action="store_true")
     parser.add_argument("--dry_run", action="store_true")
     parser.add_argument("--verbose", action="store_true")
     args = parser.parse_args()
     df = pd.read_csv(args.input_csv)
-    result = simulate_bankroll_growth(df, initial_bankroll=args.initial_bankroll)
+    result = simulate_bankroll_growth(
+        df,
+        initial_bankroll=args.initial_bankroll,
+        strategy=args.strategy,
+        window_col=args.window_col,
+        window_freq=None if args.window_freq.lower() == "none" else args.window_freq,
+        max_exposure=args.max_exposure,
+        flat_stake=args.flat_stake,
+        max_stake=args.max_stake,
+        event_driven=args.event_driven,
+        placed_col=args.placed_col,
+        settled_col=args.settled_col,
+        settle_after_min=args.settle_after_min,
+    )
     if not args.dry_run:
         result.to_csv(args.output_csv, index=False)
         log_info(f"Simulation written to {args.output_csv}")
@@ -0,0 +1,233 @@
+"""
+Incremental season simulation from a per-strategy checkpoint.
+
+Each strategy keeps <state_dir>/<name>.json (bankroll, peak and drawdown
+after the last processed bet, that bet's key, the number of bets processed
+and a digest of them) next to <name>.csv, the season's simulation rows so
+far. A new run orders all bets, checks that the first n_bets still hash to
+the saved digest and simulates only the bets after them, starting from the
+saved bankroll and peak. If earlier inputs or the strategy parameters
+changed, the season is rebuilt from scratch.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from scripts.pipeline.simulate_bankroll_growth import (
+    simulate_bankroll_growth,
+    simultaneous_windows,
+)
+from scripts.utils.constants import (
+    DEFAULT_FLAT_STAKE,
+    DEFAULT_INITIAL_BANKROLL,
+    DEFAULT_KELLY_MAX_EXPOSURE,
+    DEFAULT_KELLY_WINDOW_FREQ,
+    DEFAULT_SIMULATION_STATE_DIR,
+)
+from scripts.utils.file_utils import load_dataframes
+from scripts.utils.logger import log_info, log_success, log_warning, setup_logging
+from scripts.utils.schema import normalize_columns, patch_winner_column
+
+# Inputs that determine a bet's simulated outcome
+DIGEST_COLUMNS = ["match_id", "market_time", "predicted_prob", "odds", "winner"]
+
+
+def _ordered_bets(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bets in simulation order: by market_time when available, else as given.
+    """
+    df = patch_winner_column(normalize_columns(df))
+    if "market_time" in df.columns:
+        df = df.sort_values("market_time", kind="stable")
+    return df.reset_index(drop=True)
+
+
+def bets_digest(df: pd.DataFrame) -> str:
+    """
+    Order-sensitive hash of the columns that affect the simulation.
+    """
+    cols = [c for c in DIGEST_COLUMNS if c in df.columns]
+    hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def _bet_key(row: pd.Series) -> list:
+    return [str(row.get("market_time")), str(row.get("match_id"))]
+
+
+def load_checkpoint(state_dir: str, name: str) -> Optional[Dict[str, Any]]:
+    """
+    Saved checkpoint for `name`, or None when there is none (or its
+    simulation rows are missing).
+    """
+    path = Path(state_dir)
+    if not (path / f"{name}.json").exists() or not (path / f"{name}.csv").exists():
+        return None
+    with open(path / f"{name}.json") as f:
+        return json.load(f)
+
+
+def _save(
+    state_dir: str,
+    name: str,
+    checkpoint: Dict[str, Any],
+    rows: pd.DataFrame,
+    append: bool,
+) -> None:
+    path = Path(state_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    rows.to_csv(
+        path / f"{name}.csv",
+        mode="a" if append else "w",
+        header=not append,
+        index=False,
+    )
+    with open(path / f"{name}.json", "w") as f:
+        json.dump(checkpoint, f, indent=2)
+
+
+def _resume_point(
+    bets: pd.DataFrame, checkpoint: Optional[Dict[str, Any]], params: Dict[str, Any]
+) -> int:
+    """
+    Number of leading bets covered by a still-valid checkpoint (0 to rebuild).
+    """
+    if checkpoint is None:
+        return 0
+    n = checkpoint["n_bets"]
+    if checkpoint["params"] != params:
+        log_warning("Simulation parameters changed; rebuilding the season.")
+        return 0
+    if len(bets) < n or bets_digest(bets.iloc[:n]) != checkpoint["digest"]:
+        log_warning("Earlier bets changed since the checkpoint; rebuilding.")
+        return 0
+    if (
+        params["strategy"] == "simultaneous"
+        and params["window_col"] in bets.columns
+        and 0 < n < len(bets)
+        and simultaneous_windows(
+            bets.iloc[n - 1 : n + 1], params["window_col"], params["window_freq"]
+        ).nunique()
+        == 1
+    ):
+        log_warning("New bets join the last simulated window; rebuilding.")
+        return 0
+    return n
+
+
+def simulate_season(
+    df: pd.DataFrame,
+    state_dir: str = DEFAULT_SIMULATION_STATE_DIR,
+    name: Optional[str] = None,
+    strategy: str = "kelly",
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    flat_stake: float = DEFAULT_FLAT_STAKE,
+    max_stake: Optional[float] = None,
+    window_col: str = "market_time",
+    window_freq: Optional[str] = DEFAULT_KELLY_WINDOW_FREQ,
+    max_exposure: float = DEFAULT_KELLY_MAX_EXPOSURE,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Simulate the season's bets with simulate_bankroll_growth, resuming from
+    the checkpoint named `name` (defaults to the strategy) when it is still
+    valid, and save the updated checkpoint.
+
+    :param df: All of the season's bets so far (old and new).
+    :return: The season's simulation rows and the number of bets simulated
+        in this run.
+    """
+    name = name or strategy
+    params = {
+        "strategy": strategy,
+        "initial_bankroll": initial_bankroll,
+        "flat_stake": flat_stake,
+        "max_stake": max_stake,
+        "window_col": window_col,
+        "window_freq": window_freq,
+        "max_exposure": max_exposure,
+    }
+    bets = _ordered_bets(df)
+    checkpoint = load_checkpoint(state_dir, name)
+    start = _resume_point(bets, checkpoint, params)
+    if start and checkpoint is not None:
+        bankroll, peak = checkpoint["bankroll"], checkpoint["peak"]
+        previous = pd.read_csv(Path(state_dir) / f"{name}.csv")
+    else:
+        bankroll, peak = initial_bankroll, initial_bankroll
+        previous = None
+
+    new_bets = bets.iloc[start:]
+    if new_bets.empty:
+        log_info(f"Season simulation '{name}' is up to date ({start} bets).")
+        return previous if previous is not None else new_bets, 0
+    simulated = simulate_bankroll_growth(
+        new_bets,
+        initial_bankroll=bankroll,
+        strategy=strategy,
+        window_col=window_col,
+        window_freq=window_freq,
+        max_exposure=max_exposure,
+        flat_stake=flat_stake,
+        max_stake=max_stake,
+        initial_peak=peak,
+    )
+    last = simulated.iloc[-1]
+    _save(
+        state_dir,
+        name,
+        {
+            "params": params,
+            "n_bets": len(bets),
+            "digest": bets_digest(bets),
+            "last_key": _bet_key(bets.iloc[-1]),
+            "bankroll": float(last["bankroll_after"]),
+            "peak": float(last["peak"]),
+            "drawdown": float(last["drawdown"]),
+        },
+        simulated,
+        append=previous is not None,
+    )
+    log_info(
+        f"Simulated {len(simulated)} new bets for '{name}' "
+        f"({'resumed after ' + str(start) if start else 'from scratch'})."
+    )
+    season = (
+        simulated
+        if previous is None
+        else pd.concat([previous, simulated], ignore_index=True)
+    )
+    return season, len(simulated)
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    df = load_dataframes(args.input_glob)
+    if args.rebuild:
+        for suffix in (".json", ".csv"):
+            (Path(args.state_dir) / f"{args.name or args.strategy}{suffix}").unlink(
+                missing_ok=True
+            )
+    season, _ = simulate_season(
+        df,
+        state_dir=args.state_dir,
+        name=args.name,
+        strategy=args.strategy,
+        initial_bankroll=args.initial_bankroll,
+        flat_stake=args.flat_stake,
+        max_stake=args.max_stake,
+        window_col=args.window_col,
+        window_freq=None if args.window_freq.lower() == "none" else args.window_freq,
+        max_exposure=args.max_exposure,
+    )
+    if len(season):
+        log_info(f"Season bankroll: {season['bankroll_after'].iloc[-1]:.2f}")
+    if args.output_csv:
+        season.to_csv(args.output_csv, index=False)
+        log_success(f"Saved season simulation to {args.output_csv}")
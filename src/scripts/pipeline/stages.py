@@ -15,7 +15,7 @@ from scripts.pipeline.simulate_bankroll_growth import simulate_bankroll_growth
 STAGE_FUNCS = {
     "build": {
         "fn": build_matches_from_snapshots,
-        "input_keys": ["snapshots_csv"],
+        "input_keys": ["snapshots_csv", "catalog_csv"],
         "output_key": "matches_csv",
     },
     "ids": {
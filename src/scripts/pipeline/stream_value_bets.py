@@ -0,0 +1,301 @@
+"""
+Incremental value-bet detection over live price ticks.
+
+StreamingValueBetDetector keeps per-selection state (model probability, latest
+price, whether a signal is live) and per-market overround, so each tick costs
+O(1). A selection enters when it passes the detect_value_bets thresholds and
+only exits once EV drops `ev_hysteresis` below the threshold (or odds/margin
+fail), so prices oscillating around the threshold do not flap. replay_ticks
+computes the same signals for a whole tick table with array operations.
+"""
+
+import glob
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.constants import (
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    DEFAULT_EV_HYSTERESIS,
+    DEFAULT_EV_THRESHOLD,
+    DEFAULT_MAX_MARGIN,
+    DEFAULT_MAX_ODDS,
+)
+from scripts.utils.logger import log_info, log_success, setup_logging
+from scripts.utils.schema import normalize_columns
+from scripts.utils.snapshot_parser import SnapshotParser
+
+SIGNAL_COLUMNS = [
+    "market_id",
+    "selection_id",
+    "timestamp",
+    "signal",
+    "odds",
+    "predicted_prob",
+    "expected_value",
+    "kelly_fraction",
+    "odds_margin",
+]
+
+_MIN_PROB = 1e-8
+
+
+def selection_probabilities(
+    predictions: pd.DataFrame, matches: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    One row per (market_id, selection_id) with its win probability: player_1
+    gets predicted_prob and player_2 its complement.
+
+    :param predictions: "predictions" schema (match_id, predicted_prob).
+    :param matches: Matches with match_id, market_id, selection_id_1/2.
+    """
+    merged = normalize_columns(predictions)[["match_id", "predicted_prob"]].merge(
+        matches[["match_id", "market_id", "selection_id_1", "selection_id_2"]],
+        on="match_id",
+    )
+    sides = [
+        merged.assign(selection_id=merged["selection_id_1"]),
+        merged.assign(
+            selection_id=merged["selection_id_2"],
+            predicted_prob=1 - merged["predicted_prob"],
+        ),
+    ]
+    probs = pd.concat(sides, ignore_index=True)[
+        ["market_id", "selection_id", "predicted_prob"]
+    ]
+    return probs.drop_duplicates(["market_id", "selection_id"], keep="last")
+
+
+class StreamingValueBetDetector:
+    """
+    Emits "enter" / "exit" signals as live prices move selections in and out
+    of value.
+
+    :param probabilities: market_id, selection_id, predicted_prob per runner
+        (see selection_probabilities). Ticks for other selections are ignored.
+    :param ev_hysteresis: A live signal is withdrawn only when EV falls below
+        ev_threshold - ev_hysteresis.
+    """
+
+    def __init__(
+        self,
+        probabilities: pd.DataFrame,
+        ev_threshold: float = DEFAULT_EV_THRESHOLD,
+        confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+        max_odds: float = DEFAULT_MAX_ODDS,
+        max_margin: float = DEFAULT_MAX_MARGIN,
+        ev_hysteresis: float = DEFAULT_EV_HYSTERESIS,
+    ):
+        self.ev_threshold = ev_threshold
+        self.exit_threshold = ev_threshold - ev_hysteresis
+        self.max_odds = max_odds
+        self.max_margin = max_margin
+        # (market_id, selection_id) -> [prob, confident, 1/ltp, live]
+        self._selections: Dict[tuple, list] = {}
+        # market_id -> [sum of 1/ltp over priced runners, priced, runners]
+        self._markets: Dict[Any, list] = {}
+        for market_id, selection_id, prob in probabilities[
+            ["market_id", "selection_id", "predicted_prob"]
+        ].itertuples(index=False):
+            prob = min(max(float(prob), _MIN_PROB), 1 - _MIN_PROB)
+            confident = prob >= confidence_threshold
+            self._selections[(market_id, selection_id)] = [prob, confident, 0.0, False]
+            self._markets.setdefault(market_id, [0.0, 0, 0])[2] += 1
+
+    def on_tick(
+        self, market_id, selection_id, ltp, timestamp=None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update state with one traded price; return a signal dict when the
+        selection enters or leaves value, else None.
+        """
+        state = self._selections.get((market_id, selection_id))
+        if state is None or ltp is None or ltp <= 1:
+            return None
+        market = self._markets[market_id]
+        inverse = 1.0 / ltp
+        if state[2] == 0.0:
+            market[1] += 1
+        market[0] += inverse - state[2]
+        state[2] = inverse
+        margin = market[0] if market[1] == market[2] else None
+
+        prob = state[0]
+        expected_value = prob * (ltp - 1) - (1 - prob)
+        if state[3]:
+            if not (
+                expected_value < self.exit_threshold
+                or ltp > self.max_odds
+                or (margin is not None and margin > self.max_margin)
+            ):
+                return None
+            state[3] = False
+            signal = "exit"
+        else:
+            if not (
+                state[1]
+                and expected_value >= self.ev_threshold
+                and ltp <= self.max_odds
+                and (margin is None or margin <= self.max_margin)
+            ):
+                return None
+            state[3] = True
+            signal = "enter"
+        return {
+            "market_id": market_id,
+            "selection_id": selection_id,
+            "timestamp": timestamp,
+            "signal": signal,
+            "odds": ltp,
+            "predicted_prob": prob,
+            "expected_value": expected_value,
+            "kelly_fraction": expected_value / (ltp - 1),
+            "odds_margin": np.nan if margin is None else margin,
+        }
+
+    def run(self, ticks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Feed tick rows (SnapshotParser "ltp_only"/"full" rows) through
+        on_tick and yield the signals.
+        """
+        on_tick = self.on_tick
+        for tick in ticks:
+            signal = on_tick(
+                tick["market_id"],
+                tick["selection_id"],
+                tick.get("ltp"),
+                tick.get("timestamp"),
+            )
+            if signal is not None:
+                yield signal
+
+
+def replay_ticks(
+    ticks: pd.DataFrame,
+    probabilities: pd.DataFrame,
+    ev_threshold: float = DEFAULT_EV_THRESHOLD,
+    confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    max_odds: float = DEFAULT_MAX_ODDS,
+    max_margin: float = DEFAULT_MAX_MARGIN,
+    ev_hysteresis: float = DEFAULT_EV_HYSTERESIS,
+) -> pd.DataFrame:
+    """
+    Vectorised equivalent of running StreamingValueBetDetector over `ticks`
+    in row order: returns the same signals as a DataFrame.
+
+    Entry and exit conditions are mutually exclusive, so the live state is
+    the last entry/exit event forward-filled within each selection, and
+    signals are the ticks where that state changes.
+    """
+    probs = probabilities[["market_id", "selection_id", "predicted_prob"]]
+    probs = probs.drop_duplicates(["market_id", "selection_id"], keep="last")
+    # Integer codes per selection and market keep the group-bys cheap
+    keys = pd.MultiIndex.from_frame(probs[["market_id", "selection_id"]])
+    market_code, markets = pd.factorize(probs["market_id"])
+    runners = np.bincount(market_code)
+
+    odds = pd.to_numeric(ticks["ltp"], errors="coerce").to_numpy(dtype=float)
+    code = keys.get_indexer(
+        pd.MultiIndex.from_arrays([ticks["market_id"], ticks["selection_id"]])
+    )
+    valid = (code >= 0) & (odds > 1)
+    if not valid.any():
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    code, odds = code[valid], odds[valid]
+    prob = np.clip(
+        probs["predicted_prob"].to_numpy(dtype=float)[code], _MIN_PROB, 1 - _MIN_PROB
+    )
+    market = market_code[code]
+
+    # Ticks grouped by selection, in time order within each selection
+    by_selection = np.argsort(code, kind="stable")
+    sorted_code = code[by_selection]
+    starts = np.r_[True, sorted_code[1:] != sorted_code[:-1]]
+    inverse = 1.0 / odds
+    previous = np.empty_like(inverse)
+    previous[by_selection] = np.r_[0.0, inverse[by_selection][:-1]]
+    first = np.zeros(len(code), dtype=bool)
+    first[by_selection] = starts
+    delta = pd.Series(inverse - np.where(first, 0.0, previous))
+    margin = delta.groupby(market, sort=False).cumsum().to_numpy()
+    priced = pd.Series(first).groupby(market, sort=False).cumsum().to_numpy()
+    margin_known = priced == runners[market]
+
+    expected_value = prob * (odds - 1) - (1 - prob)
+    enter = (
+        (prob >= confidence_threshold)
+        & (expected_value >= ev_threshold)
+        & (odds <= max_odds)
+        & (~margin_known | (margin <= max_margin))
+    )
+    exit_ = (
+        (expected_value < ev_threshold - ev_hysteresis)
+        | (odds > max_odds)
+        | (margin_known & (margin > max_margin))
+    )
+    # Live state: last entry (1) / exit (0) event per selection, initially 0
+    event = np.where(enter, 1.0, np.where(exit_, 0.0, np.nan))[by_selection]
+    event[starts & np.isnan(event)] = 0.0
+    last_event = np.where(np.isnan(event), 0, np.arange(len(event)))
+    live_sorted = event[np.maximum.accumulate(last_event)]
+    was_live = np.where(starts, 0.0, np.r_[0.0, live_sorted[:-1]])
+    live = np.empty_like(live_sorted)
+    live[by_selection] = live_sorted
+    changed = np.zeros(len(code), dtype=bool)
+    changed[by_selection] = live_sorted != was_live
+
+    rows = np.flatnonzero(valid)[changed]
+    signals = pd.DataFrame(
+        {
+            "market_id": ticks["market_id"].to_numpy()[rows],
+            "selection_id": ticks["selection_id"].to_numpy()[rows],
+            "timestamp": ticks["timestamp"].to_numpy()[rows],
+            "signal": np.where(live[changed] == 1.0, "enter", "exit"),
+            "odds": odds[changed],
+            "predicted_prob": prob[changed],
+            "expected_value": expected_value[changed],
+            "kelly_fraction": expected_value[changed] / (odds[changed] - 1),
+            "odds_margin": np.where(margin_known, margin, np.nan)[changed],
+        }
+    )
+    return signals
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    probabilities = selection_probabilities(
+        pd.read_csv(args.predictions_csv),
+        pd.read_csv(args.matches_csv, dtype={"market_id": str}),
+    )
+    thresholds = {
+        "ev_threshold": args.ev_threshold,
+        "confidence_threshold": args.confidence_threshold,
+        "max_odds": args.max_odds,
+        "max_margin": args.max_margin,
+        "ev_hysteresis": args.ev_hysteresis,
+    }
+    files = sorted(glob.glob(args.snapshots_glob))
+    log_info(f"Replaying {len(files)} snapshot files ({args.engine} engine)")
+    parser = SnapshotParser(mode="ltp_only")
+
+    def ticks() -> Iterator[Dict[str, Any]]:
+        for path in files:
+            yield from parser.iter_file(path)
+
+    if args.engine == "stream":
+        detector = StreamingValueBetDetector(probabilities, **thresholds)
+        rows: List[Dict[str, Any]] = list(detector.run(ticks()))
+        signals = pd.DataFrame(rows, columns=SIGNAL_COLUMNS)
+    else:
+        signals = replay_ticks(pd.DataFrame(list(ticks())), probabilities, **thresholds)
+    log_info(f"{(signals['signal'] == 'enter').sum()} entry signals")
+    if args.dry_run:
+        log_info(f"[DRY-RUN] Would write {len(signals)} signals to {args.output_csv}")
+        return
+    signals.to_csv(args.output_csv, index=False)
+    log_success(f"Saved {len(signals)} signals to {args.output_csv}")
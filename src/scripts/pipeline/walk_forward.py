@@ -0,0 +1,417 @@
+"""
+Walk-forward backtest across tournaments.
+
+Each input file is one tournament's labeled feature table (model features,
+odds and the 0/1 winner). Tournaments are ordered by start date and fold k
+trains a win-probability model on every tournament that ended before
+tournament k started, so no fold sees results from its own or a concurrent
+tournament. The fold's predictions go through value-bet detection and the
+out-of-sample bets of all folds are simulated as one season.
+
+Folds run in worker processes that memory-map one cached copy of the
+feature matrix. Fitted models are cached under a key derived from their
+training rows, algorithm and parameters: folds with the same training
+tournaments share one fit, and a rerun after adding a tournament only fits
+the new fold.
+"""
+
+import glob
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_config
+from sklearn.metrics import log_loss, roc_auc_score
+
+from scripts.modeling.cross_validation import split_budget
+from scripts.modeling.train_eval_model import make_model
+from scripts.pipeline.detect_value_bets import detect_value_bets
+from scripts.pipeline.predict_win_probs import DEFAULT_FEATURES
+from scripts.pipeline.simulate_bankroll_growth import simulate_bankroll_growth
+from scripts.utils.constants import (
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    DEFAULT_EV_THRESHOLD,
+    DEFAULT_FLAT_STAKE,
+    DEFAULT_INITIAL_BANKROLL,
+    DEFAULT_MAX_MARGIN,
+    DEFAULT_MAX_ODDS,
+    DEFAULT_WALK_FORWARD_CACHE_DIR,
+)
+from scripts.utils.logger import log_info, log_success, log_warning, setup_logging
+from scripts.utils.schema import normalize_columns, patch_winner_column
+from scripts.utils.time_utils import to_epoch_ms
+
+# Sequential staking only: detected bets carry no market windows
+STRATEGIES = ("kelly", "flat")
+DATE_COLUMNS = ("market_time", "match_date", "date")
+# Derived from a previous model's probability; recomputed after predicting
+DERIVED_COLUMNS = [
+    "expected_value",
+    "kelly_fraction",
+    "kelly_stake",
+    "confidence_score",
+]
+SIMULATED_COLUMNS = ["bankroll", "stake", "pnl", "bankroll_after", "peak", "drawdown"]
+SUMMARY_COLUMNS = [
+    "tournament",
+    "start",
+    "end",
+    "train_tournaments",
+    "train_rows",
+    "test_rows",
+    "auc",
+    "log_loss",
+    "bets",
+    "staked",
+    "pnl",
+    "roi",
+    "bankroll_after",
+    "model_cached",
+    "fit_seconds",
+]
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    df = normalize_columns(pd.read_csv(path))
+    # Aliasing can duplicate a column (e.g. actual_winner names next to a 0/1
+    # winner); the later one is the pipeline's own
+    df = df.loc[:, ~df.columns.duplicated(keep="last")]
+    if "match_id" not in df.columns and "market_id" in df.columns:
+        df["match_id"] = df["market_id"].astype(str)
+    return patch_winner_column(df)
+
+
+def load_tournaments(
+    pattern: str, date_col: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Read one tournament per file matching `pattern`.
+
+    :param date_col: Column dating each row; defaults to the first of
+        DATE_COLUMNS present.
+    :return: The tournaments in start order (tournament, path, start and end
+        as epoch ms, rows) and all rows with a `tournament_code` pointing
+        into that table and their date as epoch ms in `time_ms`.
+    """
+    tables = []
+    for path in sorted(glob.glob(pattern)):
+        df = _read_table(path)
+        col = date_col or next((c for c in DATE_COLUMNS if c in df.columns), None)
+        if col is None or col not in df.columns:
+            raise ValueError(f"{path} has no date column (tried {DATE_COLUMNS}).")
+        times = to_epoch_ms(df[col])
+        tables.append(
+            (
+                {
+                    "tournament": Path(path).stem,
+                    "path": path,
+                    "start": int(times.min()),
+                    "end": int(times.max()),
+                    "rows": len(df),
+                },
+                df.assign(time_ms=times.to_numpy()),
+            )
+        )
+    if not tables:
+        raise FileNotFoundError(f"No files found matching glob pattern: {pattern}")
+    tables.sort(key=lambda t: (t[0]["start"], t[0]["tournament"]))
+    tournaments = pd.DataFrame([info for info, _ in tables])
+    rows = pd.concat(
+        [df.assign(tournament_code=code) for code, (_, df) in enumerate(tables)],
+        ignore_index=True,
+    )
+    return tournaments, rows
+
+
+def walk_forward_folds(
+    tournaments: pd.DataFrame, min_train_tournaments: int = 1
+) -> List[Tuple[int, np.ndarray]]:
+    """
+    (test tournament, training tournaments) per fold: every tournament that
+    ended strictly before the test tournament started.
+    """
+    start = tournaments["start"].to_numpy()
+    end = tournaments["end"].to_numpy()
+    folds = []
+    for k in range(len(tournaments)):
+        train = np.flatnonzero(end < start[k])
+        if len(train) >= min_train_tournaments:
+            folds.append((k, train))
+    return folds
+
+
+def table_cache(
+    rows: pd.DataFrame, features: Sequence[str], cache_dir: str
+) -> Tuple[Path, List[str]]:
+    """
+    Directory holding X.npy (features, NaN where missing), y.npy and
+    codes.npy (tournament codes) for these rows, created on first use; and
+    one content digest per tournament.
+    """
+    X = np.ascontiguousarray(rows[list(features)].to_numpy(dtype=float))
+    y = rows["winner"].to_numpy(dtype=np.int64)
+    codes = rows["tournament_code"].to_numpy(dtype=np.int64)
+    digests = []
+    for code in range(int(codes.max()) + 1):
+        digest = hashlib.sha256()
+        for array in (X[codes == code], y[codes == code]):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digests.append(digest.hexdigest()[:16])
+    key = hashlib.sha256("|".join([*digests, *features]).encode()).hexdigest()[:16]
+    path = Path(cache_dir) / "tables" / key
+    if (path / "codes.npy").exists():
+        log_info(f"Reusing cached feature table in {path}")
+        return path, digests
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "X.npy", X)
+    np.save(path / "y.npy", y)
+    # Written last: its presence marks a complete cache entry
+    np.save(path / "codes.npy", codes)
+    return path, digests
+
+
+def _fit_predict(
+    path: Path,
+    train_codes: np.ndarray,
+    test_codes: List[int],
+    model,
+    model_path: Path,
+) -> Tuple[Dict[int, Tuple[np.ndarray, np.ndarray]], float, bool]:
+    """
+    Fit `model` on the training tournaments (or load it from `model_path`)
+    and predict each test tournament: {code: (row indices, probabilities)}.
+    """
+    X = np.load(path / "X.npy", mmap_mode="r")
+    codes = np.load(path / "codes.npy")
+    valid = ~np.isnan(X).any(axis=1)
+    start = time.perf_counter()
+    cached = model_path.exists()
+    if cached:
+        model = joblib.load(model_path)
+    else:
+        y = np.load(path / "y.npy")
+        train = np.flatnonzero(np.isin(codes, train_codes) & valid)
+        model.fit(X[train], y[train])
+        partial = model_path.with_suffix(".tmp")
+        joblib.dump(model, partial)
+        partial.replace(model_path)
+    fit_seconds = time.perf_counter() - start
+    predictions = {}
+    for code in test_codes:
+        test = np.flatnonzero((codes == code) & valid)
+        prob = model.predict_proba(X[test])[:, 1] if len(test) else np.empty(0)
+        predictions[code] = (test, prob)
+    return predictions, fit_seconds, cached
+
+
+def walk_forward(
+    pattern: str,
+    features: Optional[Sequence[str]] = None,
+    algorithm: str = "rf",
+    params: Optional[Dict[str, Any]] = None,
+    min_train_tournaments: int = 1,
+    date_col: Optional[str] = None,
+    ev_threshold: float = DEFAULT_EV_THRESHOLD,
+    confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    max_odds: float = DEFAULT_MAX_ODDS,
+    max_margin: float = DEFAULT_MAX_MARGIN,
+    strategy: str = "kelly",
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    flat_stake: float = DEFAULT_FLAT_STAKE,
+    max_stake: Optional[float] = None,
+    n_jobs: int = 1,
+    random_state: int = 42,
+    cache_dir: str = DEFAULT_WALK_FORWARD_CACHE_DIR,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Walk-forward backtest of the predict -> detect -> simulate chain over
+    the tournaments in `pattern` (see load_tournaments).
+
+    :param features: Model features; defaults to the predict stage's.
+    :param params: Hyperparameters passed to make_model.
+    :param min_train_tournaments: Skip folds with fewer earlier tournaments.
+    :return: The out-of-sample bet ledger (value bets of every fold with
+        their tournament, placed_at time and simulated stake, pnl and
+        bankroll, in placed_at order) and one summary row per fold (SUMMARY_COLUMNS).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy!r}. Valid: {STRATEGIES}")
+    features = list(features or DEFAULT_FEATURES)
+    params = dict(params or {})
+    tournaments, rows = load_tournaments(pattern, date_col)
+    missing = [c for c in [*features, "winner", "odds"] if c not in rows.columns]
+    if missing:
+        raise ValueError(f"Tournament tables lack columns: {missing}")
+    path, digests = table_cache(rows, features, cache_dir)
+    models_dir = Path(cache_dir) / "models"
+    models_dir.mkdir(parents=True, exist_ok=True)
+
+    # Folds with the same training tournaments share one model
+    by_model: Dict[str, Tuple[np.ndarray, List[int]]] = {}
+    labels = rows["winner"].to_numpy()
+    codes = rows["tournament_code"].to_numpy()
+    for k, train in walk_forward_folds(tournaments, min_train_tournaments):
+        if len(np.unique(labels[np.isin(codes, train)])) < 2:
+            log_warning(f"Skipping {tournaments.at[k, 'tournament']}: one class only.")
+            continue
+        spec = json.dumps(
+            {
+                "train": [digests[c] for c in train],
+                "features": features,
+                "algorithm": algorithm,
+                "params": params,
+                "random_state": random_state,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        key = hashlib.sha256(spec.encode()).hexdigest()[:16]
+        by_model.setdefault(key, (train, []))[1].append(k)
+    if not by_model:
+        raise ValueError("No fold has earlier tournaments to train on.")
+
+    outer, inner = split_budget(n_jobs, len(by_model))
+    start = time.perf_counter()
+    with parallel_config(backend="loky", inner_max_num_threads=inner):
+        results = Parallel(n_jobs=outer)(
+            delayed(_fit_predict)(
+                path,
+                train,
+                tests,
+                make_model(algorithm, random_state, **params),
+                models_dir / f"{key}.joblib",
+            )
+            for key, (train, tests) in by_model.items()
+        )
+    fits = sum(not cached for _, _, cached in results)
+    log_info(
+        f"{sum(len(t) for _, t in by_model.values())} folds with {len(by_model)} "
+        f"models ({fits} fitted, {len(by_model) - fits} cached) in "
+        f"{time.perf_counter() - start:.2f}s ({outer} parallel x {inner} threads)."
+    )
+
+    bets, summary = [], []
+    for (train, _), (predictions, fit_seconds, cached) in zip(
+        by_model.values(), results
+    ):
+        for k, (test, prob) in predictions.items():
+            scored = rows.iloc[test].drop(columns=DERIVED_COLUMNS, errors="ignore")
+            scored = scored.assign(predicted_prob=prob)
+            y = scored["winner"].to_numpy()
+            tradable = scored[scored["odds"] > 1]
+            detected = (
+                detect_value_bets(
+                    tradable,
+                    ev_threshold=ev_threshold,
+                    confidence_threshold=confidence_threshold,
+                    max_odds=max_odds,
+                    max_margin=max_margin,
+                )
+                if len(tradable)
+                else tradable.iloc[0:0]
+            )
+            bets.append(
+                detected.assign(
+                    tournament=tournaments.at[k, "tournament"],
+                    placed_at=pd.to_datetime(
+                        rows.loc[detected.index, "time_ms"].to_numpy(), unit="ms"
+                    ),
+                )
+            )
+            summary.append(
+                {
+                    "code": k,
+                    "tournament": tournaments.at[k, "tournament"],
+                    "start": pd.Timestamp(tournaments.at[k, "start"], unit="ms"),
+                    "end": pd.Timestamp(tournaments.at[k, "end"], unit="ms"),
+                    "train_tournaments": len(train),
+                    "train_rows": int(np.isin(codes, train).sum()),
+                    "test_rows": len(test),
+                    "auc": (
+                        roc_auc_score(y, prob) if len(np.unique(y)) > 1 else np.nan
+                    ),
+                    "log_loss": (
+                        log_loss(y, prob, labels=[0, 1]) if len(y) else np.nan
+                    ),
+                    "model_cached": cached,
+                    "fit_seconds": fit_seconds,
+                }
+            )
+
+    order = sorted(range(len(summary)), key=lambda i: summary[i]["code"])
+    frames = [bets[i] for i in order]
+    ledger = pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+    # Bets of concurrent tournaments compound in the order they were placed
+    ledger = ledger.sort_values("placed_at", kind="stable", ignore_index=True)
+    summary_df = pd.DataFrame([summary[i] for i in order]).drop(columns="code")
+    if len(ledger):
+        simulated = simulate_bankroll_growth(
+            ledger,
+            initial_bankroll=initial_bankroll,
+            strategy=strategy,
+            flat_stake=flat_stake,
+            max_stake=max_stake,
+        )
+        ledger[SIMULATED_COLUMNS] = simulated[SIMULATED_COLUMNS].to_numpy()
+    else:
+        ledger = ledger.reindex(columns=[*ledger.columns, *SIMULATED_COLUMNS])
+    per_tournament = ledger.groupby("tournament", sort=False).agg(
+        bets=("stake", "size"),
+        staked=("stake", "sum"),
+        pnl=("pnl", "sum"),
+        bankroll_after=("bankroll_after", "last"),
+    )
+    summary_df = summary_df.join(per_tournament, on="tournament")
+    summary_df["bets"] = summary_df["bets"].fillna(0).astype(int)
+    summary_df[["staked", "pnl"]] = summary_df[["staked", "pnl"]].fillna(0.0)
+    summary_df["roi"] = summary_df["pnl"] / summary_df["staked"].where(
+        summary_df["staked"] > 0
+    )
+    summary_df["bankroll_after"] = summary_df["bankroll_after"].ffill()
+    summary_df["bankroll_after"] = summary_df["bankroll_after"].fillna(initial_bankroll)
+    return ledger, summary_df[SUMMARY_COLUMNS]
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    ledger, summary = walk_forward(
+        args.input_glob,
+        features=args.features,
+        algorithm=args.algorithm,
+        params=json.loads(args.params) if args.params else None,
+        min_train_tournaments=args.min_train_tournaments,
+        date_col=args.date_col,
+        ev_threshold=args.ev_threshold,
+        confidence_threshold=args.confidence_threshold,
+        max_odds=args.max_odds,
+        max_margin=args.max_margin,
+        strategy=args.strategy,
+        initial_bankroll=args.initial_bankroll,
+        flat_stake=args.flat_stake,
+        max_stake=args.max_stake,
+        n_jobs=args.n_jobs,
+        cache_dir=args.cache_dir,
+    )
+    log_info(f"Walk-forward summary:\n{summary.to_string(index=False)}")
+    staked = summary["staked"].sum()
+    log_info(
+        f"{len(ledger)} out-of-sample bets over {len(summary)} tournaments: "
+        f"pnl {summary['pnl'].sum():.2f}"
+        + (f", ROI {summary['pnl'].sum() / staked:.2%}" if staked > 0 else "")
+    )
+    if args.output_csv:
+        Path(args.output_csv).parent.mkdir(parents=True, exist_ok=True)
+        ledger.to_csv(args.output_csv, index=False)
+        log_success(f"Saved bet ledger to {args.output_csv}")
+    if args.summary_csv:
+        Path(args.summary_csv).parent.mkdir(parents=True, exist_ok=True)
+        summary.to_csv(args.summary_csv, index=False)
+        log_success(f"Saved fold summary to {args.summary_csv}")
@@ -0,0 +1,146 @@
+"""
+Local load generator for the scoring service: concurrent keep-alive clients
+measuring latency percentiles and throughput.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from scripts.utils.constants import DEFAULT_SERVE_PORT
+from scripts.utils.logger import log_info, setup_logging
+
+
+async def _open(host: str, port: int, unix_socket: Optional[str]):
+    if unix_socket:
+        return await asyncio.open_unix_connection(unix_socket)
+    return await asyncio.open_connection(host, port)
+
+
+async def _request(reader, writer, method: str, path: str, body: bytes = b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    payload = json.loads(await reader.readexactly(length))
+    return status, payload
+
+
+async def _client(
+    host: str,
+    port: int,
+    unix_socket: Optional[str],
+    bodies: List[bytes],
+    latencies: List[float],
+) -> int:
+    reader, writer = await _open(host, port, unix_socket)
+    errors = 0
+    try:
+        for body in bodies:
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, "POST", "/score", body)
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+    finally:
+        writer.close()
+    return errors
+
+
+async def run_load_test(
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_SERVE_PORT,
+    unix_socket: Optional[str] = None,
+    concurrency: int = 16,
+    requests_per_client: int = 200,
+    rows_per_request: int = 1,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Fire `concurrency` clients, each sending `requests_per_client` sequential
+    requests of `rows_per_request` random rows, and summarise the results.
+    """
+    reader, writer = await _open(host, port, unix_socket)
+    _, health = await _request(reader, writer, "GET", "/health")
+    writer.close()
+    features = health["features"]
+    batches_before = health["batches"]
+
+    rng = np.random.default_rng(seed)
+
+    def body() -> bytes:
+        rows = [
+            {
+                **dict(zip(features, rng.uniform(0.05, 0.95, len(features)))),
+                "odds": float(rng.uniform(1.2, 6.0)),
+            }
+            for _ in range(rows_per_request)
+        ]
+        return json.dumps({"rows": rows}).encode()
+
+    workload = [
+        [body() for _ in range(requests_per_client)] for _ in range(concurrency)
+    ]
+    latencies: List[float] = []
+    started = time.perf_counter()
+    errors = await asyncio.gather(
+        *(_client(host, port, unix_socket, b, latencies) for b in workload)
+    )
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await _open(host, port, unix_socket)
+    _, health = await _request(reader, writer, "GET", "/health")
+    writer.close()
+
+    n_requests = len(latencies)
+    latency_ms = np.asarray(latencies) * 1000
+    batches = health["batches"] - batches_before
+    return {
+        "requests": n_requests,
+        "rows": n_requests * rows_per_request,
+        "errors": int(sum(errors)),
+        "seconds": elapsed,
+        "requests_per_sec": n_requests / elapsed,
+        "rows_per_sec": n_requests * rows_per_request / elapsed,
+        "p50_ms": float(np.percentile(latency_ms, 50)),
+        "p95_ms": float(np.percentile(latency_ms, 95)),
+        "p99_ms": float(np.percentile(latency_ms, 99)),
+        "mean_rows_per_batch": n_requests * rows_per_request / max(batches, 1),
+    }
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    summary = asyncio.run(
+        run_load_test(
+            host=args.host,
+            port=args.port,
+            unix_socket=args.unix_socket,
+            concurrency=args.concurrency,
+            requests_per_client=args.requests,
+            rows_per_request=args.rows_per_request,
+        )
+    )
+    log_info(
+        f"{summary['requests']} requests ({summary['errors']} errors) in "
+        f"{summary['seconds']:.2f}s: {summary['requests_per_sec']:.0f} req/s, "
+        f"{summary['rows_per_sec']:.0f} rows/s"
+    )
+    log_info(
+        f"Latency p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms "
+        f"p99={summary['p99_ms']:.3f}ms; "
+        f"{summary['mean_rows_per_batch']:.1f} rows per model call"
+    )
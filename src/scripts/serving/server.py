@@ -0,0 +1,309 @@
+"""
+Long-lived local scoring service: an asyncio HTTP server that keeps the model
+in memory and micro-batches concurrent requests into single predict_proba calls.
+
+Endpoints (HTTP/1.1, keep-alive):
+  GET  /health  -> {"status": "ok", "features": [...]}
+  POST /score   <- {"rows": [{<feature>: value, ..., "odds": 2.1}, ...]}
+                -> {"results": [{"predicted_prob", "expected_value",
+                                 "kelly_fraction", "value_bet"}, ...]}
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.modeling.model_cache import load_model
+from scripts.modeling.numpy_export import NumpyModel
+from scripts.pipeline.detect_value_bets import value_bet_mask
+from scripts.pipeline.predict_win_probs import DEFAULT_FEATURES
+from scripts.utils.betting_math import ev_and_kelly
+from scripts.utils.constants import (
+    DEFAULT_SERVE_MAX_BATCH,
+    DEFAULT_SERVE_MAX_WAIT_MS,
+    DEFAULT_SERVE_PORT,
+)
+from scripts.utils.logger import log_info, log_warning, setup_logging
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Server Error"}
+
+
+class MicroBatcher:
+    """
+    Collects rows from concurrent requests and scores them together.
+
+    A batch takes every queued request, up to `max_batch` rows, and then
+    waits at most `max_wait_ms` after its first request for more. With the
+    default wait of 0 a lone request is scored immediately, while requests
+    arriving during a predict_proba call are scored together in the next one.
+    Each request awaits a future resolved with its own slice of the results.
+    """
+
+    def __init__(
+        self,
+        model,
+        features: Sequence[str],
+        max_batch: int = DEFAULT_SERVE_MAX_BATCH,
+        max_wait_ms: float = DEFAULT_SERVE_MAX_WAIT_MS,
+        thresholds: Optional[Dict[str, float]] = None,
+    ):
+        self.model = model
+        self.features = list(features)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.thresholds = thresholds or {}
+        # sklearn models fitted on DataFrames expect named columns
+        self._named_input = not isinstance(model, NumpyModel) and hasattr(
+            model, "feature_names_in_"
+        )
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows_scored = 0
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        X = np.array(
+            [[row.get(f, np.nan) for f in self.features] for row in rows],
+            dtype=float,
+        ).reshape(len(rows), len(self.features))
+        odds = np.array([row.get("odds", np.nan) for row in rows], dtype=float)
+        margin = np.array([row.get("odds_margin", np.nan) for row in rows], dtype=float)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, odds, margin, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            # Let handlers that are ready enqueue before the batch is cut
+            await asyncio.sleep(0)
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                n_rows += len(item[0])
+            self._score_batch(batch)
+
+    def _score_batch(self, batch: List[Tuple]) -> None:
+        try:
+            X = np.vstack([item[0] for item in batch])
+            results = self._results(
+                X,
+                np.concatenate([item[1] for item in batch]),
+                np.concatenate([item[2] for item in batch]),
+            )
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows_scored += len(X)
+        start = 0
+        for item in batch:
+            end = start + len(item[0])
+            if not item[3].done():
+                item[3].set_result(results[start:end])
+            start = end
+
+    def _results(
+        self, X: np.ndarray, odds: np.ndarray, margin: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        valid = ~np.isnan(X).any(axis=1)
+        prob = np.full(len(X), np.nan)
+        if valid.any():
+            inputs = X[valid]
+            if self._named_input:
+                inputs = pd.DataFrame(inputs, columns=self.features)
+            prob[valid] = self.model.predict_proba(inputs)[:, 1]
+        expected_value, kelly = ev_and_kelly(prob, odds)
+        is_value = value_bet_mask(
+            expected_value,
+            prob,
+            odds,
+            np.where(np.isnan(margin), -np.inf, margin),
+            **self.thresholds,
+        )
+        return [
+            {
+                "predicted_prob": _json_float(p),
+                "expected_value": _json_float(ev),
+                "kelly_fraction": _json_float(k),
+                "value_bet": bool(v and ok),
+            }
+            for p, ev, k, v, ok in zip(prob, expected_value, kelly, is_value, valid)
+        ]
+
+
+def _json_float(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple]:
+    """
+    Parse one HTTP/1.1 request: (method, path, headers, body), or None at EOF.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def _response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+class ScoringServer:
+    """
+    Minimal HTTP front end for a MicroBatcher, on TCP or a Unix socket.
+    """
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await self._dispatch(method, path, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError) as e:
+            log_warning(f"Dropping connection: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple:
+        if method == "GET" and path == "/health":
+            return 200, {
+                "status": "ok",
+                "features": self.batcher.features,
+                "batches": self.batcher.batches,
+                "rows_scored": self.batcher.rows_scored,
+            }
+        if method != "POST" or path != "/score":
+            return 404, {"error": f"No route for {method} {path}"}
+        try:
+            payload = json.loads(body)
+            rows = payload["rows"] if isinstance(payload, dict) else payload
+            if isinstance(rows, dict):
+                rows = [rows]
+        except (ValueError, KeyError) as e:
+            return 400, {"error": f"Invalid request body: {e}"}
+        try:
+            return 200, {"results": await self.batcher.score(rows)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+
+async def serve(
+    model_file: str,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_SERVE_PORT,
+    unix_socket: Optional[str] = None,
+    max_batch: int = DEFAULT_SERVE_MAX_BATCH,
+    max_wait_ms: float = DEFAULT_SERVE_MAX_WAIT_MS,
+    thresholds: Optional[Dict[str, float]] = None,
+    ready: Optional[asyncio.Event] = None,
+) -> None:
+    """
+    Load the model once and serve requests until cancelled.
+    """
+    model = load_model(model_file)
+    features = list(getattr(model, "feature_names_in_", DEFAULT_FEATURES))
+    batcher = MicroBatcher(model, features, max_batch, max_wait_ms, thresholds)
+    batcher.start()
+    server = ScoringServer(batcher)
+    if unix_socket:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_socket)
+        log_info(f"Scoring service listening on unix:{unix_socket}")
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        log_info(f"Scoring service listening on http://{host}:{port}")
+    log_info(f"Model features: {features}")
+    if ready is not None:
+        ready.set()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main_cli(args):
+    """
+    Wrapper function to be called from the main CLI entrypoint.
+    """
+    setup_logging(level="DEBUG" if args.verbose else "INFO", json_logs=args.json_logs)
+    thresholds = {
+        "ev_threshold": args.ev_threshold,
+        "confidence_threshold": args.confidence_threshold,
+        "max_odds": args.max_odds,
+        "max_margin": args.max_margin,
+    }
+    started = time.perf_counter()
+    try:
+        asyncio.run(
+            serve(
+                args.model_file,
+                host=args.host,
+                port=args.port,
+                unix_socket=args.unix_socket,
+                max_batch=args.max_batch,
+                max_wait_ms=args.max_wait_ms,
+                thresholds=thresholds,
+            )
+        )
+    except KeyboardInterrupt:
+        log_info(f"Scoring service stopped after {time.perf_counter() - started:.0f}s")
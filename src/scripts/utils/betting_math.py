@@ -1,26 +1,160 @@
 """
 Betting-related mathematical utilities.
+
+The array kernels take array-likes (or scalars) of win probabilities and
+decimal odds and, like numpy ufuncs, accept an optional preallocated float
+`out` array that is written in place and returned. Commission is the
+exchange's cut of net winnings (e.g. 0.05 for Betfair's 5%).
 """
 
+from typing import Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
 
+def _clipped_prob(prob, min_prob: float) -> np.ndarray:
+    return np.clip(np.asarray(prob, dtype=float), min_prob, 1 - min_prob)
+
+
+def _output(out: Optional[np.ndarray], *inputs) -> np.ndarray:
+    """
+    `out`, or a new float array of the inputs' broadcast shape.
+    """
+    if out is not None:
+        return out
+    return np.empty(np.broadcast_shapes(*(np.shape(x) for x in inputs)))
+
+
+def net_odds(
+    odds, commission: float = 0.0, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Net winnings per unit staked on a winning back bet, after commission.
+    """
+    odds = np.asarray(odds, dtype=float)
+    result = _output(out, odds)
+    np.subtract(odds, 1.0, out=result)
+    if commission:
+        np.multiply(result, 1.0 - commission, out=result)
+    return result
+
+
+def expected_value(
+    prob,
+    odds,
+    commission: float = 0.0,
+    min_prob: float = 1e-8,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Expected profit per unit staked: prob * net_odds - (1 - prob).
+    """
+    prob = _clipped_prob(prob, min_prob)
+    result = net_odds(odds, commission, out=_output(out, prob, odds))
+    np.multiply(prob, result, out=result)
+    np.subtract(result, 1 - prob, out=result)
+    return result
+
+
+def kelly_fraction(
+    prob,
+    odds,
+    commission: float = 0.0,
+    fraction: float = 1.0,
+    max_fraction: Optional[float] = None,
+    min_prob: float = 1e-8,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Kelly stake as a fraction of bankroll: EV / net_odds, scaled by
+    `fraction` (e.g. 0.5 for half Kelly). Negative values mean "do not bet";
+    with `max_fraction` the result is clipped to [0, max_fraction].
+    """
+    result = expected_value(prob, odds, commission, min_prob, out=out)
+    np.divide(result, net_odds(odds, commission), out=result)
+    if fraction != 1.0:
+        np.multiply(result, fraction, out=result)
+    if max_fraction is not None:
+        np.clip(result, 0.0, max_fraction, out=result)
+    return result
+
+
+def compute_kelly_stake_capped(
+    prob,
+    odds,
+    bankroll: float = 1.0,
+    cap: float = 0.05,
+    *,
+    fraction: float = 1.0,
+    commission: float = 0.0,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Fractional Kelly stake, clipped to [0, cap] of `bankroll`. Odds that pay
+    nothing (net odds <= 0) get no stake.
+    """
+    paid = net_odds(odds, commission) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = kelly_fraction(
+            prob, odds, commission, fraction, max_fraction=cap, out=out
+        )
+    np.copyto(result, 0.0, where=~paid)
+    if bankroll != 1.0:
+        np.multiply(result, bankroll, out=result)
+    return result
+
+
+def bet_returns(
+    stake,
+    odds,
+    won,
+    commission: float = 0.0,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Profit of back bets: stake * net_odds when won, -stake when lost and 0
+    for unsettled bets (`won` is NaN).
+    """
+    stake = np.asarray(stake, dtype=float)
+    won = np.asarray(won, dtype=float)
+    result = net_odds(odds, commission, out=_output(out, stake, odds, won))
+    np.multiply(result, stake, out=result)
+    np.copyto(result, np.negative(stake), where=won == 0)
+    np.copyto(result, 0.0, where=np.isnan(won))
+    return result
+
+
+def ev_and_kelly(
+    prob, odds, min_prob: float = 1e-8, commission: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expected value per unit staked and full Kelly fraction for backing at
+    decimal `odds` with win probability `prob` (array-likes).
+    """
+    ev = expected_value(prob, odds, commission, min_prob)
+    return ev, ev / net_odds(odds, commission)
+
+
 def add_ev_and_kelly(
     df: pd.DataFrame,
     prob_col: str = "predicted_prob",
     odds_col: str = "odds",
     min_prob: float = 1e-8,
     fillna: bool = True,
+    commission: float = 0.0,
 ) -> pd.DataFrame:
     """
     Add expected value (EV) and Kelly fraction columns to the DataFrame.
     Assumes that higher prob_col means higher likelihood of win for that bet.
+    Only the two new columns are written (NaN results become 0 when
+    `fillna`); the input frame is left unchanged.
     """
-    df = df.copy()
-    prob = df[prob_col].clip(lower=min_prob, upper=1 - min_prob)
-    odds = df[odds_col]
-    df["expected_value"] = prob * (odds - 1) - (1 - prob)
-    df["kelly_fraction"] = (prob * (odds - 1) - (1 - prob)) / (odds - 1)
+    ev, kelly = ev_and_kelly(df[prob_col], df[odds_col], min_prob, commission)
     if fillna:
-        df.fillna(0, inplace=True)
+        ev[np.isnan(ev)] = 0.0
+        kelly[np.isnan(kelly)] = 0.0
+    df = df.copy(deep=False)
+    df["expected_value"] = ev
+    df["kelly_fraction"] = kelly
     return df
@@ -6,6 +6,62 @@ DEFAULT_EV_THRESHOLD: float = 0.05
 DEFAULT_CONFIDENCE_THRESHOLD: float = 0.55
 DEFAULT_MAX_ODDS: float = 7.0
 DEFAULT_MAX_MARGIN: float = 1.15
+# EV must fall this far below the threshold before a live signal is withdrawn
+DEFAULT_EV_HYSTERESIS: float = 0.01
 DEFAULT_INITIAL_BANKROLL: float = 1000.0
+DEFAULT_FLAT_STAKE: float = 10.0
+
+# Simultaneous Kelly: windows up to this many bets enumerate all outcomes,
+# larger ones use Monte Carlo samples; total stake per window is capped
+DEFAULT_KELLY_EXACT_MAX_BETS: int = 10
+DEFAULT_KELLY_SAMPLES: int = 4096
+DEFAULT_KELLY_MAX_EXPOSURE: float = 0.95
+# Bets whose window column falls in the same period (a pandas frequency, here
+# the calendar day) form one simultaneous window
+DEFAULT_KELLY_WINDOW_FREQ: str = "D"
+
+# Event-driven simulation: bets without a known settled time settle this many
+# minutes after they are placed
+DEFAULT_SETTLE_AFTER_MIN: float = 180.0
+DEFAULT_SIMULATION_STATE_DIR: str = "data/simulation_state"
 
 CURRENCY_SYMBOL: str = "£"
+
+DEFAULT_IDENTITY_DB: str = "data/player_identity.sqlite"
+DEFAULT_FUZZY_MATCH_SCORE: float = 85.0
+
+# Minutes before the scheduled off at which as-of prices are taken
+DEFAULT_PRE_OFF_OFFSETS_MIN: tuple = (60, 15, 5)
+
+# Tick feature windows (minutes before the off)
+DEFAULT_LATE_MONEY_WINDOW_MIN: float = 30.0
+DEFAULT_MOMENTUM_WINDOW_MIN: float = 15.0
+
+# Player-strength features
+DEFAULT_ELO_RATING: float = 1500.0
+DEFAULT_ELO_STATE_DIR: str = "data/elo"
+DEFAULT_SACKMANN_GLOB: str = "data/tennis_{tour}/{tour}_matches_*.csv"
+DEFAULT_FORM_WINDOW: int = 10
+DEFAULT_FORM_STATE_DIR: str = "data/form"
+
+DEFAULT_FEATURE_STORE_DIR: str = "data/feature_store"
+
+# Deduplicated training table built from the processed value bets
+DEFAULT_TRAINING_DATASET: str = "data/training/value_bets.csv.gz"
+DEFAULT_DATASET_CHUNK_ROWS: int = 100_000
+
+# Local model registry: versions kept per model name
+DEFAULT_MODEL_REGISTRY_DIR: str = "models/registry"
+DEFAULT_REGISTRY_MAX_VERSIONS: int = 5
+
+# Grouped cross-validation for model evaluation
+DEFAULT_CV_SPLITS: int = 5
+DEFAULT_CV_CACHE_DIR: str = "data/cache/cv_folds"
+
+# Walk-forward backtest: cached feature tables and per-fold models
+DEFAULT_WALK_FORWARD_CACHE_DIR: str = "data/cache/walk_forward"
+
+# Local scoring service
+DEFAULT_SERVE_PORT: int = 8765
+DEFAULT_SERVE_MAX_BATCH: int = 256
+DEFAULT_SERVE_MAX_WAIT_MS: float = 0.0
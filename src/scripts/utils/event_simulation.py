@@ -0,0 +1,169 @@
+"""
+Event-driven bankroll simulation with overlapping bets.
+
+Bets are placed in time order and their stake is locked until they settle,
+so each stake is sized from the balance available at placement rather than
+from a bankroll in which every earlier bet has already settled. Pending
+settlements sit in a heap keyed by settled time; before each placement all
+settlements due by then are applied (a bet settling at the same instant as
+another is placed releases its funds first).
+"""
+
+import heapq
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.betting_math import net_odds
+from scripts.utils.constants import DEFAULT_INITIAL_BANKROLL
+
+EXPOSURE_COLUMNS = [
+    "time",
+    "event",
+    "bet",
+    "balance",
+    "exposure",
+    "open_bets",
+    "equity",
+    "peak",
+    "drawdown",
+]
+
+
+def simulate_events(
+    placed,
+    settled,
+    odds,
+    won,
+    fractions=None,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    flat_stake: Optional[float] = None,
+    max_stake: Optional[float] = None,
+    commission: float = 0.0,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simulate bets that lock their stake from placement until settlement.
+
+    :param placed: Placement time per bet (any orderable numbers, e.g. epoch
+        ms). Ties are placed in input order.
+    :param settled: Settlement time per bet; clipped to be no earlier than
+        placement.
+    :param fractions: Stake per bet as a fraction of the available balance.
+        Ignored when `flat_stake` is given.
+    :param flat_stake: Fixed stake per bet, never more than the balance.
+    :param max_stake: Cap on any single stake.
+    :return: Per bet, in input order: available balance at placement
+        (bankroll), stake, pnl, exposure and open_bets right after placement,
+        and equity (balance plus locked stakes) right after its settlement
+        with the running peak and drawdown at that point; and the event
+        timeline (EXPOSURE_COLUMNS), one row per placement and settlement.
+    """
+    placed = np.asarray(placed)
+    n = len(placed)
+    settled = np.maximum(np.asarray(settled), placed)
+    gross = 1.0 + net_odds(odds, commission)
+    gross[~np.asarray(won, dtype=bool)] = 0.0
+    if flat_stake is None:
+        fractions = np.broadcast_to(np.asarray(fractions, dtype=float), (n,))
+        fraction_of = np.maximum(fractions, 0.0).tolist()
+    cap = np.inf if max_stake is None else float(max_stake)
+    # Plain lists keep the per-event work in the loop cheap
+    placed_at, settled_at, payout = placed.tolist(), settled.tolist(), gross.tolist()
+    stake = [0.0] * n
+    bankroll = [0.0] * n
+
+    # Event log: time, 1 = place / 0 = settle, bet, balance, exposure, open
+    times, kinds, bets = [], [], []
+    balances, exposures, opens = [], [], []
+    heap: list = []
+    heappush, heappop = heapq.heappush, heapq.heappop
+    balance, exposure, open_bets = float(initial_bankroll), 0.0, 0
+
+    def log(time, kind, bet):
+        times.append(time)
+        kinds.append(kind)
+        bets.append(bet)
+        balances.append(balance)
+        exposures.append(exposure)
+        opens.append(open_bets)
+
+    def settle_until(limit):
+        nonlocal balance, exposure, open_bets
+        while heap and heap[0][0] <= limit:
+            time, done = heappop(heap)
+            balance += stake[done] * payout[done]
+            open_bets -= 1
+            exposure = exposure - stake[done] if open_bets else 0.0
+            log(time, 0, done)
+
+    for bet in np.argsort(placed, kind="stable").tolist():
+        now = placed_at[bet]
+        settle_until(now)
+        bankroll[bet] = balance
+        wanted = flat_stake if flat_stake is not None else fraction_of[bet] * balance
+        amount = min(wanted, cap, balance)
+        stake[bet] = amount
+        balance -= amount
+        exposure += amount
+        open_bets += 1
+        heappush(heap, (settled_at[bet], bet))
+        log(now, 1, bet)
+    settle_until(np.inf)
+
+    timeline = pd.DataFrame(
+        {
+            "time": times,
+            "event": np.where(np.array(kinds, dtype=bool), "place", "settle"),
+            "bet": np.array(bets, dtype=np.int64),
+            "balance": balances,
+            "exposure": exposures,
+            "open_bets": np.array(opens, dtype=np.int64),
+        }
+    )
+    timeline["equity"] = timeline["balance"] + timeline["exposure"]
+    timeline["peak"] = np.maximum.accumulate(
+        np.maximum(timeline["equity"].to_numpy(), initial_bankroll)
+    )
+    timeline["drawdown"] = timeline["peak"] - timeline["equity"]
+
+    is_place = timeline["event"].to_numpy() == "place"
+    at_place = timeline[is_place].set_index("bet").reindex(np.arange(n))
+    at_settle = timeline[~is_place].set_index("bet").reindex(np.arange(n))
+    per_bet = pd.DataFrame(
+        {
+            "bankroll": bankroll,
+            "stake": stake,
+            "pnl": np.array(stake) * (gross - 1.0),
+            "exposure": at_place["exposure"].to_numpy(),
+            "open_bets": at_place["open_bets"].to_numpy(),
+            "bankroll_after": at_settle["equity"].to_numpy(),
+            "peak": at_settle["peak"].to_numpy(),
+            "drawdown": at_settle["drawdown"].to_numpy(),
+        }
+    )
+    return per_bet, timeline
+
+
+def exposure_summary(timeline: pd.DataFrame) -> Dict[str, float]:
+    """
+    Exposure-over-time metrics from a simulate_events timeline: peak locked
+    stake (absolute and as a fraction of equity), time-weighted mean exposure
+    fraction, most bets open at once, final equity and max drawdown.
+    """
+    if timeline.empty:
+        return {}
+    times = timeline["time"].to_numpy(dtype=float)
+    fraction = (timeline["exposure"] / timeline["equity"]).fillna(0.0).to_numpy()
+    durations = np.diff(times)
+    span = times[-1] - times[0]
+    return {
+        "max_exposure": float(timeline["exposure"].max()),
+        "max_exposure_fraction": float(fraction.max()),
+        "mean_exposure_fraction": (
+            float((fraction[:-1] * durations).sum() / span) if span > 0 else 0.0
+        ),
+        "max_open_bets": int(timeline["open_bets"].max()),
+        "final_equity": float(timeline["equity"].iloc[-1]),
+        "max_drawdown": float(timeline["drawdown"].max()),
+    }
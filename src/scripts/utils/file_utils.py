@@ -17,7 +17,7 @@ def load_dataframes(file_glob: str) -> pd.DataFrame:
     :param file_glob: Glob pattern for input CSV files.
     :return: A single concatenated DataFrame.
     """
-    files = glob.glob(file_glob)
+    files = sorted(glob.glob(file_glob))
     if not files:
         raise FileNotFoundError(f"No files found matching glob pattern: {file_glob}")
 
@@ -0,0 +1,268 @@
+"""
+Simultaneous Kelly staking for concurrent independent bets.
+
+For bets i placed together with win probabilities p_i and net odds b_i, the
+stakes f (as fractions of the bankroll) maximise expected log growth
+
+    E[log(1 + sum_i f_i * r_i)],   r_i = b_i if bet i wins else -1,
+
+subject to f_i >= 0 and sum_i f_i <= max_exposure. The expectation is exact
+(all 2^n outcomes) for small windows and a Monte Carlo average for large
+ones; many windows are solved at once by projected gradient ascent on
+padded (windows, outcomes, bets) arrays.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from scripts.utils.betting_math import net_odds
+from scripts.utils.constants import (
+    DEFAULT_KELLY_EXACT_MAX_BETS,
+    DEFAULT_KELLY_MAX_EXPOSURE,
+    DEFAULT_KELLY_SAMPLES,
+)
+
+# Upper bound on (windows x outcomes x bets) cells solved in one batch
+_BATCH_CELLS = 4_000_000
+
+
+def _project(v: np.ndarray, max_total: float) -> np.ndarray:
+    """
+    Row-wise Euclidean projection onto {f >= 0, sum(f) <= max_total}.
+    """
+    clipped = np.maximum(v, 0.0)
+    over = clipped.sum(axis=1) > max_total
+    if not over.any():
+        return clipped
+    # Rows above the cap go onto the simplex sum(f) == max_total
+    u = -np.sort(-v[over], axis=1)
+    excess = np.cumsum(u, axis=1) - max_total
+    ranks = np.arange(1, v.shape[1] + 1)
+    rho = (u - excess / ranks > 0).sum(axis=1) - 1
+    theta = excess[np.arange(len(u)), rho] / (rho + 1)
+    clipped[over] = np.maximum(v[over] - theta[:, None], 0.0)
+    return clipped
+
+
+def _outcomes(
+    prob: np.ndarray,
+    net: np.ndarray,
+    exact: bool,
+    n_samples: int,
+    rng: np.random.Generator,
+):
+    """
+    Per-window outcome returns (windows, outcomes, bets) and outcome weights
+    (windows, outcomes). Padded bets have prob 1 and net 0.
+    """
+    n_windows, n_bets = prob.shape
+    if exact:
+        bits = (np.arange(2**n_bets)[:, None] >> np.arange(n_bets)) & 1
+        wins = np.broadcast_to(bits.astype(bool), (n_windows, *bits.shape))
+        weights = np.where(wins, prob[:, None, :], 1 - prob[:, None, :]).prod(axis=2)
+    else:
+        wins = rng.random((n_windows, n_samples, n_bets)) < prob[:, None, :]
+        weights = np.full((n_windows, n_samples), 1.0 / n_samples)
+    # Bets with prob 1 (including padding) have no weighted loss outcomes
+    returns = np.where(wins | (prob[:, None, :] >= 1.0), net[:, None, :], -1.0)
+    return returns, weights
+
+
+def _growth(returns: np.ndarray, weights: np.ndarray, f: np.ndarray) -> np.ndarray:
+    """
+    Expected log growth per window; -inf/nan where a weighted outcome ruins.
+    """
+    wealth = 1.0 + np.einsum("wsb,wb->ws", returns, f)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (weights * np.log(wealth)).sum(axis=1)
+
+
+def _backtrack(
+    r: np.ndarray,
+    w: np.ndarray,
+    f: np.ndarray,
+    growth: np.ndarray,
+    direction: np.ndarray,
+    step: np.ndarray,
+    max_total: float,
+    min_step: float,
+):
+    """
+    Halve each window's step along `direction` until the projected point
+    raises expected log growth. Returns the new points, their growth, the
+    accepted steps and which windows improved.
+    """
+    best, best_growth = f.copy(), growth.copy()
+    step = step.copy()
+    pending = np.ones(len(f), dtype=bool)
+    while True:
+        idx = np.flatnonzero(pending & (step >= min_step))
+        if not len(idx):
+            break
+        candidate = _project(f[idx] + step[idx, None] * direction[idx], max_total)
+        candidate_growth = _growth(r[idx], w[idx], candidate)
+        improved = candidate_growth > growth[idx]
+        best[idx[improved]] = candidate[improved]
+        best_growth[idx[improved]] = candidate_growth[improved]
+        pending[idx[improved]] = False
+        step[idx[~improved]] *= 0.5
+    return best, best_growth, step, ~pending
+
+
+def _solve(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    max_total: float,
+    max_iter: int,
+    tol: float,
+) -> np.ndarray:
+    """
+    Projected Newton ascent with backtracking, batched over windows.
+
+    The Newton direction is taken over the bets that are staked or have a
+    positive gradient; when the exposure cap binds it is restricted to the
+    staked bets and to moves that keep total exposure fixed. Windows where
+    the Newton step cannot improve take a projected gradient step instead,
+    which lets bets enter or leave the staked set. Windows drop out of the
+    batch once an iteration moves them less than `tol`.
+    """
+    n_windows, _, n_bets = returns.shape
+    f = np.zeros((n_windows, n_bets))
+    growth = np.zeros(n_windows)
+    gradient_step = np.ones(n_windows)
+    active = np.arange(n_windows)
+    eye = np.eye(n_bets)
+    for _ in range(max_iter):
+        r, w, fa, ga = returns[active], weights[active], f[active], growth[active]
+        wealth = 1.0 + np.einsum("wsb,wb->ws", r, fa)
+        gradient = np.einsum("wsb,ws->wb", r, w / wealth)
+        curvature = np.matmul((r * (w / wealth**2)[:, :, None]).transpose(0, 2, 1), r)
+        capped = fa.sum(axis=1) >= max_total * (1 - 1e-9)
+        free = np.where(capped[:, None], fa > 0, (fa > 0) | (gradient > 0))
+        pair = free[:, :, None] & free[:, None, :]
+        curvature = np.where(pair, curvature, eye) + 1e-12 * eye
+        solved = np.linalg.solve(
+            curvature, np.stack([gradient * free, free.astype(float)], axis=2)
+        )
+        newton, ones = solved[..., 0], solved[..., 1]
+        # On the capped face, remove the component that changes exposure
+        shift = (newton * free).sum(axis=1) / np.maximum(
+            (ones * free).sum(axis=1), 1e-300
+        )
+        newton = np.where(capped[:, None], newton - shift[:, None] * ones, newton)
+
+        best, best_growth, _, improved = _backtrack(
+            r, w, fa, ga, newton, np.ones(len(active)), max_total, 1e-6
+        )
+        stalled = np.flatnonzero(~improved)
+        if len(stalled):
+            (
+                best[stalled],
+                best_growth[stalled],
+                steps,
+                moved_by_gradient,
+            ) = _backtrack(
+                r[stalled],
+                w[stalled],
+                fa[stalled],
+                ga[stalled],
+                gradient[stalled],
+                gradient_step[active[stalled]],
+                max_total,
+                1e-12,
+            )
+            gradient_step[active[stalled]] = np.where(
+                moved_by_gradient, steps * 2.0, steps
+            )
+
+        moved = np.abs(best - fa).max(axis=1)
+        f[active] = best
+        growth[active] = best_growth
+        active = active[moved >= tol]
+        if not len(active):
+            break
+    return f
+
+
+def simultaneous_kelly_windows(
+    prob,
+    odds,
+    windows,
+    commission: float = 0.0,
+    max_exposure: float = DEFAULT_KELLY_MAX_EXPOSURE,
+    exact_max_bets: int = DEFAULT_KELLY_EXACT_MAX_BETS,
+    n_samples: int = DEFAULT_KELLY_SAMPLES,
+    seed: Optional[int] = 0,
+    max_iter: int = 100,
+    tol: float = 1e-9,
+) -> np.ndarray:
+    """
+    Simultaneous Kelly stake fraction for every bet, treating bets that share
+    a `windows` label as placed together from the same bankroll.
+
+    Windows are bucketed by size (exact windows per bet count, Monte Carlo
+    windows padded to the largest) and each bucket is solved in batches.
+
+    :param prob: Win probability per bet.
+    :param odds: Decimal odds per bet.
+    :param windows: Window label per bet (e.g. a date or round).
+    :return: Stake fraction of the window's starting bankroll per bet.
+    """
+    prob = np.asarray(prob, dtype=float)
+    net = net_odds(odds, commission)
+    _, window_idx = np.unique(np.asarray(windows), return_inverse=True)
+    order = np.argsort(window_idx, kind="stable")
+    sizes = np.bincount(window_idx)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    position = np.empty(len(prob), dtype=np.int64)
+    position[order] = np.arange(len(prob)) - np.repeat(starts, sizes)
+    rng = np.random.default_rng(seed)
+
+    fractions = np.zeros(len(prob))
+    exact_sizes = [int(n) for n in np.unique(sizes) if n <= exact_max_bets]
+    buckets = [(sizes == n, n, True) for n in exact_sizes]
+    large = sizes > exact_max_bets
+    if large.any():
+        buckets.append((large, int(sizes[large].max()), False))
+    for selected, width, exact in buckets:
+        window_ids = np.flatnonzero(selected)
+        n_outcomes = 2**width if exact else n_samples
+        batch = max(1, _BATCH_CELLS // (n_outcomes * width))
+        for start in range(0, len(window_ids), batch):
+            ids = window_ids[start : start + batch]
+            bets = np.flatnonzero(np.isin(window_idx, ids))
+            rows = np.searchsorted(ids, window_idx[bets])
+            padded_prob = np.ones((len(ids), width))
+            padded_net = np.zeros((len(ids), width))
+            padded_prob[rows, position[bets]] = prob[bets]
+            padded_net[rows, position[bets]] = net[bets]
+            returns, weights = _outcomes(padded_prob, padded_net, exact, n_samples, rng)
+            f = _solve(returns, weights, max_exposure, max_iter, tol)
+            fractions[bets] = f[rows, position[bets]]
+    return fractions
+
+
+def simultaneous_kelly(
+    prob,
+    odds,
+    commission: float = 0.0,
+    max_exposure: float = DEFAULT_KELLY_MAX_EXPOSURE,
+    exact_max_bets: int = DEFAULT_KELLY_EXACT_MAX_BETS,
+    n_samples: int = DEFAULT_KELLY_SAMPLES,
+    seed: Optional[int] = 0,
+) -> np.ndarray:
+    """
+    Simultaneous Kelly stake fractions for one set of concurrent bets.
+    """
+    prob = np.asarray(prob, dtype=float)
+    return simultaneous_kelly_windows(
+        prob,
+        odds,
+        np.zeros(len(prob), dtype=np.int64),
+        commission=commission,
+        max_exposure=max_exposure,
+        exact_max_bets=exact_max_bets,
+        n_samples=n_samples,
+        seed=seed,
+    )
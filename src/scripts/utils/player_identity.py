@@ -0,0 +1,338 @@
+"""
+Persistent player identity store and Betfair-to-Sackmann name resolution.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from .constants import DEFAULT_FUZZY_MATCH_SCORE, DEFAULT_IDENTITY_DB
+from .logger import log_info
+
+# A resolved identity: (sackmann player_id, canonical player name)
+Identity = Tuple[int, str]
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS player_identity (
+    key_type    TEXT    NOT NULL,
+    key         TEXT    NOT NULL,
+    player_id   INTEGER NOT NULL,
+    player_name TEXT    NOT NULL,
+    confidence  REAL    NOT NULL,
+    provenance  TEXT    NOT NULL,
+    updated_at  TEXT    NOT NULL,
+    PRIMARY KEY (key_type, key)
+)
+"""
+
+_UPSERT = """
+INSERT INTO player_identity
+    (key_type, key, player_id, player_name, confidence, provenance, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key_type, key) DO UPDATE SET
+    player_id = excluded.player_id,
+    player_name = excluded.player_name,
+    confidence = excluded.confidence,
+    provenance = excluded.provenance,
+    updated_at = excluded.updated_at
+WHERE excluded.confidence >= player_identity.confidence
+"""
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalise a runner/player name for keying: casefold, strip dots and
+    collapse whitespace ("J. Sinner " -> "j sinner").
+    """
+    return " ".join(str(name).replace(".", " ").casefold().split())
+
+
+class PlayerIdentityStore:
+    """
+    SQLite-backed mapping from Betfair selection ids and runner name variants
+    to canonical Sackmann player ids, with confidence and provenance.
+
+    The whole table is read into memory on open, so lookups are dict hits;
+    writes are buffered and flushed on `flush()` / `close()`.
+    """
+
+    KEY_TYPES = {"selection_id", "name"}
+
+    def __init__(self, db_path: str = DEFAULT_IDENTITY_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute(_CREATE_TABLE)
+        self._cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._pending: list = []
+        rows = self._conn.execute(
+            "SELECT key_type, key, player_id, player_name, confidence, provenance "
+            "FROM player_identity"
+        )
+        for key_type, key, player_id, player_name, confidence, provenance in rows:
+            self._cache[(key_type, key)] = {
+                "player_id": player_id,
+                "player_name": player_name,
+                "confidence": confidence,
+                "provenance": provenance,
+            }
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __enter__(self) -> "PlayerIdentityStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _key(key_type: str, key: Any) -> Tuple[str, str]:
+        if key_type == "selection_id":
+            # Selection ids arrive as int, float (from CSV) or str
+            return key_type, str(int(float(key)))
+        return key_type, normalize_name(key)
+
+    def lookup(self, key_type: str, key: Any) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored identity record for a selection id or runner name.
+        """
+        if key_type not in self.KEY_TYPES:
+            raise ValueError(f"Unknown key type: {key_type!r}")
+        if key is None or pd.isna(key):
+            return None
+        return self._cache.get(self._key(key_type, key))
+
+    def record(
+        self,
+        key_type: str,
+        key: Any,
+        player_id: int,
+        player_name: str,
+        confidence: float,
+        provenance: str,
+    ) -> None:
+        """
+        Record an identity. An existing entry is only replaced by one of equal
+        or higher confidence.
+        """
+        if key_type not in self.KEY_TYPES:
+            raise ValueError(f"Unknown key type: {key_type!r}")
+        if key is None or pd.isna(key):
+            return
+        cache_key = self._key(key_type, key)
+        existing = self._cache.get(cache_key)
+        if existing is not None and existing["confidence"] > confidence:
+            return
+        entry = {
+            "player_id": int(player_id),
+            "player_name": player_name,
+            "confidence": float(confidence),
+            "provenance": provenance,
+        }
+        if existing == entry:
+            return
+        self._cache[cache_key] = entry
+        self._pending.append(
+            (
+                *cache_key,
+                entry["player_id"],
+                player_name,
+                entry["confidence"],
+                provenance,
+                datetime.now().isoformat(timespec="seconds"),
+            )
+        )
+
+    def flush(self) -> None:
+        """
+        Write buffered records to disk.
+        """
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(_UPSERT, self._pending)
+        log_info(f"Stored {len(self._pending)} player identities in {self.db_path}")
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+def load_alias_map(alias_csv: str) -> Dict[str, str]:
+    """
+    Load the hand-maintained alias file (columns: alias, standard).
+    """
+    df = pd.read_csv(alias_csv)
+    return dict(zip(df["alias"], df["standard"]))
+
+
+def build_sackmann_roster(sackmann_df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Build a mapping of Sackmann player name -> player_id from a matches table.
+    """
+    winners = sackmann_df[["winner_name", "winner_id"]].set_axis(
+        ["name", "player_id"], axis=1
+    )
+    losers = sackmann_df[["loser_name", "loser_id"]].set_axis(
+        ["name", "player_id"], axis=1
+    )
+    players = pd.concat([winners, losers]).dropna().drop_duplicates("name")
+    return dict(zip(players["name"], players["player_id"].astype(int)))
+
+
+class PlayerResolver:
+    """
+    Resolves Betfair runners to Sackmann players.
+
+    Resolution order: alias map, identity store (by selection_id, then by
+    name), exact roster match, fuzzy roster match. Every resolution is written
+    back to the store so repeat runs never re-score the same runner. Alias and
+    exact matches have confidence 1.0 and fuzzy ones their match score, so a
+    later alias or exact match replaces a fuzzy one.
+    """
+
+    def __init__(
+        self,
+        roster: Dict[str, int],
+        store: PlayerIdentityStore,
+        alias_map: Optional[Dict[str, str]] = None,
+        fuzzy: bool = True,
+        min_score: float = DEFAULT_FUZZY_MATCH_SCORE,
+    ):
+        self.store = store
+        self.fuzzy = fuzzy
+        self.min_score = min_score
+        self._names = {normalize_name(name): name for name in roster}
+        self._ids = {name: int(pid) for name, pid in roster.items()}
+        self._aliases = {normalize_name(k): v for k, v in (alias_map or {}).items()}
+        self._choices = list(self._names)
+
+    def resolve(self, name: Any, selection_id: Any = None) -> Optional[Identity]:
+        """
+        Resolve a single runner. Returns (player_id, player_name) or None.
+        """
+        key = None if name is None or pd.isna(name) else normalize_name(name)
+        alias = self._aliases.get(key) if key is not None else None
+        if alias is not None and normalize_name(alias) in self._names:
+            # The alias file overrides earlier resolutions of this runner
+            return self._record(
+                name, selection_id, self._names[normalize_name(alias)], 1.0, "alias"
+            )
+        for key_type, value in (("selection_id", selection_id), ("name", name)):
+            hit = self.store.lookup(key_type, value)
+            if hit is None or (hit["provenance"] == "fuzzy" and key in self._names):
+                # An exact roster match beats an earlier fuzzy one
+                continue
+            self._remember(name, selection_id, hit, hit["provenance"])
+            return hit["player_id"], hit["player_name"]
+        if key is None:
+            return None
+
+        if key in self._names:
+            return self._record(name, selection_id, self._names[key], 1.0, "exact")
+        if self.fuzzy and self._choices:
+            best = process.extractOne(
+                key, self._choices, scorer=fuzz.ratio, score_cutoff=self.min_score
+            )
+            if best is not None:
+                # Stored with its score, so aliases and exact matches replace it
+                return self._record(
+                    name, selection_id, self._names[best[0]], best[1] / 100.0, "fuzzy"
+                )
+        return None
+
+    def _record(
+        self,
+        name: Any,
+        selection_id: Any,
+        canonical: str,
+        confidence: float,
+        provenance: str,
+    ) -> Identity:
+        record: Dict[str, Any] = {
+            "player_id": self._ids[canonical],
+            "player_name": canonical,
+            "confidence": confidence,
+        }
+        self._remember(name, selection_id, record, provenance)
+        return self._ids[canonical], canonical
+
+    def _remember(
+        self, name: Any, selection_id: Any, record: Dict[str, Any], provenance: str
+    ) -> None:
+        for key_type, key in (("name", name), ("selection_id", selection_id)):
+            self.store.record(
+                key_type,
+                key,
+                record["player_id"],
+                record["player_name"],
+                record["confidence"],
+                provenance,
+            )
+
+    def resolve_frame(
+        self,
+        df: pd.DataFrame,
+        name_col: str,
+        selection_col: Optional[str] = None,
+        prefix: str = "player",
+    ) -> pd.DataFrame:
+        """
+        Resolve a column of runner names (and optional selection ids), adding
+        `<prefix>_id` and `<prefix>_name` columns. Each distinct runner is
+        resolved once.
+        """
+        cols = [name_col] + ([selection_col] if selection_col else [])
+        unique = df[cols].drop_duplicates()
+        resolved = [
+            self.resolve(row[0], row[1] if selection_col else None)
+            for row in unique.itertuples(index=False)
+        ]
+        unique[f"{prefix}_id"] = [r[0] if r else pd.NA for r in resolved]
+        unique[f"{prefix}_name"] = [r[1] if r else pd.NA for r in resolved]
+        self.store.flush()
+        n_missing = unique[f"{prefix}_id"].isna().sum()
+        if n_missing:
+            log_info(f"{n_missing} of {len(unique)} runners could not be resolved.")
+        return df.merge(unique, on=cols, how="left")
+
+    def resolve_matches(self, matches_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add `sackmann_id_1` / `sackmann_id_2` to a matches table using
+        player_1/2 and, when present, selection_id_1/2.
+        """
+        df = matches_df
+        for side in (1, 2):
+            sel_col = f"selection_id_{side}"
+            resolved = self.resolve_frame(
+                df[[f"player_{side}"] + ([sel_col] if sel_col in df else [])],
+                f"player_{side}",
+                sel_col if sel_col in df else None,
+                prefix=f"_resolved_{side}",
+            )
+            df = df.assign(
+                **{f"sackmann_id_{side}": resolved[f"_resolved_{side}_id"].to_numpy()}
+            )
+        return df
+
+
+def seed_store_from_aliases(
+    store: PlayerIdentityStore, alias_csv: str, roster: Dict[str, int]
+) -> int:
+    """
+    Import the hand-maintained alias file into the store. Returns the number of
+    aliases whose standard name exists in the roster.
+    """
+    count = 0
+    for alias, standard in load_alias_map(alias_csv).items():
+        if standard in roster:
+            store.record("name", alias, roster[standard], standard, 1.0, "alias_csv")
+            count += 1
+    store.flush()
+    return count
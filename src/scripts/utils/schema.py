@@ -3,7 +3,7 @@ Column normalization and schema enforcement.
 """
 
 import re
-from typing import Dict
+from typing import Dict, Optional, Sequence
 
 import pandas as pd
 
@@ -15,8 +15,13 @@ COLUMN_ALIASES: Dict[str, str] = {
     "prob": "predicted_prob",
     "ev": "expected_value",
     "actual_winner": "winner",
+    "settledtime": "settled_time",
 }
 
+# Market start and settlement, carried from the catalog to the value bets so
+# the event-driven simulator can lock each stake until its market settles
+EVENT_TIME_COLUMNS = ["market_time", "settled_time"]
+
 SCHEMAS: Dict[str, list] = {
     "features": [
         "match_id",
@@ -38,8 +43,30 @@ SCHEMAS: Dict[str, list] = {
         "confidence_score",
         "winner",
     ],
+    "matches": [
+        "match_id",
+        "market_id",
+        "market_time",
+        "settled_time",
+        "player_1",
+        "player_2",
+        "selection_id_1",
+        "selection_id_2",
+        "opening_ltp_1",
+        "opening_ltp_2",
+        "closing_ltp_1",
+        "closing_ltp_2",
+        "vwap_1",
+        "vwap_2",
+        "matched_volume_1",
+        "matched_volume_2",
+        "total_matched_volume",
+    ],
     "matches_with_ids": [
         "match_id",
+        "market_id",
+        "market_time",
+        "settled_time",
         "player_1",
         "player_2",
         "selection_id_1",
@@ -47,14 +74,30 @@ SCHEMAS: Dict[str, list] = {
     ],
     "merged_matches": [
         "match_id",
+        "market_id",
+        "market_time",
+        "settled_time",
         "player_1",
         "player_2",
         "selection_id_1",
         "selection_id_2",
         "final_ltp",
+        "ltp_player_1",
+        "ltp_player_2",
     ],
     "predictions": ["match_id", "player_1", "player_2", "predicted_prob"],
-    "simulations": ["match_id", "bankroll", "kelly_fraction", "winner", "odds"],
+    "simulations": [
+        "match_id",
+        "bankroll",
+        "kelly_fraction",
+        "winner",
+        "odds",
+        "stake",
+        "pnl",
+        "bankroll_after",
+        "peak",
+        "drawdown",
+    ],
 }
 
 
@@ -83,8 +126,8 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     if existing_aliases:
         df = df.rename(columns=existing_aliases)
 
-    # Merge odds_* columns into one 'odds'
-    odds_cols = [c for c in df.columns if c.startswith("odds_")]
+    # Merge odds_* columns into one 'odds' (odds_margin is a feature, not odds)
+    odds_cols = [c for c in df.columns if c.startswith("odds_") and c != "odds_margin"]
     if odds_cols:
         df["odds"] = df[odds_cols].bfill(axis=1).iloc[:, 0]
         df = df.drop(columns=odds_cols)
@@ -100,10 +143,15 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def enforce_schema(df: pd.DataFrame, schema_name: str) -> pd.DataFrame:
+def enforce_schema(
+    df: pd.DataFrame,
+    schema_name: str,
+    extra_columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
     """
     Ensure DataFrame has all columns for the schema.
-    Missing columns are added with NaN.
+    Missing columns are added with NaN. Any `extra_columns` are kept after
+    the schema columns.
     """
     if schema_name not in SCHEMAS:
         raise ValueError(f"Unknown schema: {schema_name}")
@@ -111,7 +159,9 @@ def enforce_schema(df: pd.DataFrame, schema_name: str) -> pd.DataFrame:
     # Ensure DataFrame columns are normalized before enforcement
     df = normalize_columns(df)
 
-    cols = SCHEMAS[schema_name]
+    cols = SCHEMAS[schema_name] + [
+        c for c in (extra_columns or []) if c not in SCHEMAS[schema_name]
+    ]
     for col in cols:
         if col not in df.columns:
             df[col] = pd.NA
@@ -119,6 +169,13 @@ def enforce_schema(df: pd.DataFrame, schema_name: str) -> pd.DataFrame:
     return df[cols]
 
 
+def event_time_columns(df: pd.DataFrame) -> list:
+    """
+    The EVENT_TIME_COLUMNS present in `df`, to keep as extra columns.
+    """
+    return [c for c in EVENT_TIME_COLUMNS if c in df.columns]
+
+
 def patch_winner_column(df: pd.DataFrame, winner_col: str = "winner") -> pd.DataFrame:
     """
     Patch winner column to be 0/1 integer type and fill missing with 0.
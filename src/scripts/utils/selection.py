@@ -13,10 +13,16 @@ def build_market_runner_map(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     """
     # Add an explicit type hint for the dictionary
     mapping: Dict[str, Dict[str, Any]] = {}
-    for _, row in df.iterrows():
-        market = row.get("market_id")
-        player = row.get("runner_name")
-        sel_id = row.get("selection_id")
+    if "market_id" not in df.columns or "runner_name" not in df.columns:
+        return mapping
+    # Tick tables repeat each runner many times; only distinct pairs matter
+    runners = df.dropna(subset=["market_id", "runner_name"]).drop_duplicates(
+        ["market_id", "runner_name"], keep="last"
+    )
+    sel_ids = runners.get("selection_id", pd.Series(None, index=runners.index))
+    for market, player, sel_id in zip(
+        runners["market_id"], runners["runner_name"], sel_ids
+    ):
         if market and player:
             mapping.setdefault(market, {})[player] = sel_id
     return mapping
@@ -0,0 +1,152 @@
+"""
+Vectorised bankroll simulation kernels.
+
+Proportional staking multiplies the bankroll by (1 + f * r) per bet, where r
+is the net odds on a win and -1 on a loss, so the path is a cumulative
+product. A stake cap (or a flat stake, i.e. a cap with f = 1) makes the
+update additive while the cap binds; the path is then built as alternating
+multiplicative and additive segments, each computed with cumprod / cumsum.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.betting_math import net_odds
+from scripts.utils.constants import DEFAULT_INITIAL_BANKROLL
+
+SIMULATION_COLUMNS = ["bankroll", "stake", "pnl", "bankroll_after", "peak", "drawdown"]
+
+# First segment length tried by the capped scan; doubled until it breaks
+_MIN_SEGMENT = 64
+
+
+def _capped_path(
+    fractions: np.ndarray, returns: np.ndarray, initial: float, cap: float
+) -> np.ndarray:
+    """
+    Bankroll before each bet when staking min(f * bankroll, cap).
+    """
+    n = len(returns)
+    before = np.empty(n)
+    bankroll, i = initial, 0
+    while i < n:
+        multiplicative = fractions[i] * bankroll <= cap
+        length = _MIN_SEGMENT
+        while True:
+            f, r = fractions[i : i + length], returns[i : i + length]
+            if multiplicative:
+                path = bankroll * np.cumprod(np.r_[1.0, 1.0 + f * r])
+            else:
+                path = bankroll + np.cumsum(np.r_[0.0, cap * r])
+            # First bet whose staking regime differs from this segment's
+            switched = np.flatnonzero((f * path[:-1] <= cap) != multiplicative)
+            if len(switched) or i + length >= n:
+                break
+            length *= 2
+        end = switched[0] if len(switched) else len(f)
+        before[i : i + end] = path[:end]
+        bankroll, i = path[end], i + end
+    return before
+
+
+def running_drawdown(bankroll_after, initial_peak: float):
+    """
+    Running peak (starting from `initial_peak`) and drawdown below it.
+    """
+    after = np.asarray(bankroll_after, dtype=float)
+    peak = np.maximum.accumulate(np.r_[initial_peak, after])[1:]
+    return peak, peak - after
+
+
+def simulate_bankroll_matrix(
+    odds,
+    won,
+    fractions,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    max_stakes=None,
+    commission: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bankroll paths of several staking strategies over the same bets, laid
+    out as (strategies, bets) arrays. Uncapped strategies share one cumprod
+    scan; capped ones use the segmented scan row by row.
+
+    :param fractions: Stake per bet as a fraction of the current bankroll,
+        shaped (strategies, bets) or broadcastable to it.
+    :param max_stakes: Cap on any single stake per strategy (inf for none).
+    :return: Bankroll before each bet, stake and pnl, each (strategies, bets).
+    """
+    returns = net_odds(odds, commission)
+    np.copyto(returns, -1.0, where=~np.asarray(won, dtype=bool))
+    fractions = np.atleast_2d(np.asarray(fractions, dtype=float))
+    fractions = np.broadcast_to(fractions, (fractions.shape[0], len(returns)))
+    caps = np.full(len(fractions), np.inf)
+    if max_stakes is not None:
+        caps[:] = max_stakes
+
+    bankroll = np.empty(fractions.shape)
+    free = np.isinf(caps)
+    growth = 1.0 + fractions[free] * returns
+    ones = np.ones((len(growth), 1))
+    bankroll[free] = (
+        initial_bankroll * np.cumprod(np.hstack([ones, growth]), axis=1)[:, :-1]
+    )
+    for row in np.flatnonzero(~free):
+        bankroll[row] = _capped_path(
+            fractions[row], returns, initial_bankroll, caps[row]
+        )
+    stake = np.minimum(fractions * bankroll, caps[:, None])
+    return bankroll, stake, stake * returns
+
+
+def simulate_bankroll_path(
+    odds,
+    won,
+    fractions=None,
+    initial_bankroll: float = DEFAULT_INITIAL_BANKROLL,
+    flat_stake: Optional[float] = None,
+    max_stake: Optional[float] = None,
+    commission: float = 0.0,
+    initial_peak: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Bankroll path of a sequence of back bets settled one after another.
+
+    :param fractions: Stake per bet as a fraction of the current bankroll
+        (proportional staking). Ignored when `flat_stake` is given.
+    :param flat_stake: Fixed stake per bet, never more than the bankroll.
+    :param max_stake: Cap on any single stake for proportional staking.
+    :param initial_peak: Peak to measure drawdown from, when continuing an
+        earlier run (defaults to the initial bankroll).
+    :return: Per bet: bankroll before the bet, stake, pnl, bankroll_after,
+        running peak and drawdown (peak - bankroll_after).
+    """
+    if flat_stake is not None:
+        fractions, max_stake = 1.0, flat_stake
+    bankroll, stake, pnl = (
+        path[0]
+        for path in simulate_bankroll_matrix(
+            odds,
+            won,
+            fractions,
+            initial_bankroll,
+            np.inf if max_stake is None else max_stake,
+            commission,
+        )
+    )
+    after = bankroll + pnl
+    peak, drawdown = running_drawdown(
+        after, initial_bankroll if initial_peak is None else initial_peak
+    )
+    return pd.DataFrame(
+        {
+            "bankroll": bankroll,
+            "stake": stake,
+            "pnl": pnl,
+            "bankroll_after": after,
+            "peak": peak,
+            "drawdown": drawdown,
+        }
+    )
@@ -1,7 +1,7 @@
 import bz2
 import json
 from pathlib import Path
-from typing import Any, Callable, Dict, List, TextIO
+from typing import Any, Callable, Dict, Iterator, List, TextIO
 
 
 class SnapshotParser:
@@ -29,11 +29,19 @@ class SnapshotParser:
         :param file_path: path to a .txt/.csv or .bz2 snapshot file
         :return: list of dicts containing the requested data for each mode
         """
+        return list(self.iter_file(file_path))
+
+    def iter_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of `parse_file` one at a time, in file order, without
+        holding the whole file in memory.
+        :param file_path: path to a .txt/.csv or .bz2 snapshot file
+        :return: iterator of dicts containing the requested data for each mode
+        """
         p = Path(file_path)
         # Add a type: ignore comment to resolve the final mypy error
         opener: Callable[..., TextIO] = bz2.open if p.suffix == ".bz2" else open  # type: ignore[assignment]
 
-        rows: List[Dict[str, Any]] = []
         with opener(file_path, "rt", encoding="utf-8") as f:
             for line in f:
                 try:
@@ -53,23 +61,23 @@ class SnapshotParser:
                         metadata_row: Dict[str, Any] = {
                             "market_id": market_id,
                             "market_time": md.get("marketTime"),
+                            "settled_time": md.get("settledTime"),
                             "market_name": md.get("name"),
                         }
                         for idx, runner in enumerate(md.get("runners", []), start=1):
                             metadata_row[f"runner_{idx}"] = runner.get("name")
-                        rows.append(metadata_row)
+                            metadata_row[f"selection_id_{idx}"] = runner.get("id")
+                        yield metadata_row
 
                     elif self.mode == "ltp_only":
                         for rc in change.get("rc", []):
                             if "ltp" in rc:
-                                rows.append(
-                                    {
-                                        "market_id": market_id,
-                                        "timestamp": publish_time,
-                                        "selection_id": rc.get("id"),
-                                        "ltp": rc.get("ltp"),
-                                    }
-                                )
+                                yield {
+                                    "market_id": market_id,
+                                    "timestamp": publish_time,
+                                    "selection_id": rc.get("id"),
+                                    "ltp": rc.get("ltp"),
+                                }
 
                     else:  # self.mode == "full"
                         for rc in change.get("rc", []):
@@ -87,6 +95,4 @@ class SnapshotParser:
                                 runner_row["best_available_to_back"] = rc["atb"]
                             if "atl" in rc:
                                 runner_row["best_available_to_lay"] = rc["atl"]
-                            rows.append(runner_row)
-
-        return rows
+                            yield runner_row
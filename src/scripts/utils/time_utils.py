@@ -0,0 +1,14 @@
+"""
+Timestamp conversion helpers.
+"""
+
+import pandas as pd
+
+
+def to_epoch_ms(values: pd.Series) -> pd.Series:
+    """
+    Convert Betfair timestamps (epoch ms or ISO strings) to int64 epoch ms.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("int64")
+    return pd.to_datetime(values, utc=True).astype("int64") // 1_000_000
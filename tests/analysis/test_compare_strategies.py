@@ -0,0 +1,77 @@
+# tests/analysis/test_compare_strategies.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.analysis.compare_strategies import compare_strategies, parse_strategies
+
+
+def _bets(n: int = 400, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i}" for i in range(n)],
+            "predicted_prob": rng.uniform(0.3, 0.8, n),
+            "odds": np.round(rng.uniform(1.3, 4.0, n), 2),
+            "winner": rng.integers(0, 2, n),
+        }
+    )
+
+
+def _loop(df, stake_fn, initial=1000.0):
+    """
+    Reference per-bet loop in the style of the old debug script.
+    """
+    bankroll, history = initial, []
+    for prob, odds, winner in df[["predicted_prob", "odds", "winner"]].itertuples(
+        index=False
+    ):
+        kelly = (prob * (odds - 1) - (1 - prob)) / (odds - 1)
+        bet = min(stake_fn(bankroll, kelly), bankroll)
+        bankroll += bet * (odds - 1) if winner == 1 else -bet
+        history.append(bankroll)
+    return np.array(history)
+
+
+def test_matrix_matches_per_strategy_loops():
+    """
+    Every strategy's curve matches a plain loop over the bets.
+    """
+    df = _bets()
+    table, curves = compare_strategies(
+        df, ["flat:25", "proportional:0.02", "kelly:0.01:0.02", "capped:0.5:40"]
+    )
+    expected = {
+        "flat:25": lambda b, k: 25.0,
+        "proportional:0.02": lambda b, k: 0.02 * b,
+        "kelly:0.01:0.02": lambda b, k: b * min(max(0.01 * k, 0.0), 0.02),
+        "capped:0.5:40": lambda b, k: min(b * min(max(0.5 * k, 0.0), 1.0), 40.0),
+    }
+    for strategy, stake_fn in expected.items():
+        np.testing.assert_allclose(curves[strategy], _loop(df, stake_fn))
+
+    row = table.set_index("strategy").loc["flat:25"]
+    assert row["bets"] == len(df)
+    assert row["staked"] == pytest.approx(25.0 * len(df))
+    assert row["final_bankroll"] == pytest.approx(curves["flat:25"].iloc[-1])
+    assert row["roi"] == pytest.approx(row["profit"] / row["staked"])
+
+
+def test_parse_strategies_expands_parameter_grids():
+    """
+    Comma-separated parameters expand into every combination.
+    """
+    parsed = parse_strategies(["kelly:0.25,0.5:0.02,0.05", "kelly:1"])
+    assert [s["strategy"] for s in parsed] == [
+        "kelly:0.25:0.02",
+        "kelly:0.25:0.05",
+        "kelly:0.5:0.02",
+        "kelly:0.5:0.05",
+        "kelly:1",
+    ]
+    assert parsed[-1]["max_fraction"] == 1.0
+    with pytest.raises(ValueError):
+        parse_strategies(["martingale:2"])
+    with pytest.raises(ValueError):
+        parse_strategies(["capped:0.5"])
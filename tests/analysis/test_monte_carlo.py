@@ -0,0 +1,104 @@
+# tests/analysis/test_monte_carlo.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.analysis.monte_carlo import simulate_paths, summarize_paths
+
+
+def _bets(n: int = 50, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i}" for i in range(n)],
+            "predicted_prob": rng.uniform(0.4, 0.7, n),
+            "odds": np.round(rng.uniform(1.8, 3.0, n), 2),
+            "winner": rng.integers(0, 2, n),
+        }
+    )
+
+
+def test_paths_reproducible_across_workers():
+    """
+    The same seed gives identical paths regardless of the number of workers.
+    """
+    df = _bets()
+    kwargs = dict(n_paths=1000, seed=7, chunk_cells=5000)
+    serial = simulate_paths(df, n_jobs=1, **kwargs)
+    parallel = simulate_paths(df, n_jobs=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 1000
+    assert not serial.equals(simulate_paths(df, n_jobs=1, n_paths=1000, seed=8))
+
+
+def test_certain_wins_give_deterministic_kelly_path():
+    """
+    With every bet won, each path compounds the capped Kelly stake.
+    """
+    df = pd.DataFrame({"predicted_prob": [0.6, 0.6], "odds": [2.0, 3.0]})
+    df["winner"] = 1
+    paths = simulate_paths(
+        df, n_paths=10, mode="bootstrap", max_fraction=0.1, initial_bankroll=100.0
+    )
+    # Kelly 0.2 and 0.4 capped at 0.1: bets grow the bankroll by 10% or 20%
+    assert (paths["final_bankroll"] >= 121.0 - 1e-9).all()
+    assert (paths["max_drawdown"] == 0).all()
+    assert paths["bets_to_double"].isna().all()
+
+
+def test_bootstrap_uses_actual_outcomes():
+    """
+    Bootstrap keeps each bet's recorded result: all-losing bets always lose.
+    """
+    df = _bets()
+    df["winner"] = 0
+    paths = simulate_paths(df, n_paths=200, mode="bootstrap", staking="flat")
+    assert np.allclose(paths["final_bankroll"], 1000.0 - 10.0 * len(df))
+
+
+def test_flat_staking_stops_at_ruin_and_summary_reports_it():
+    """
+    Flat staking stops once the bankroll cannot cover the stake, and those
+    paths count towards risk of ruin.
+    """
+    df = pd.DataFrame({"predicted_prob": [0.5] * 20, "odds": [2.0] * 20})
+    df["winner"] = 0
+    paths = simulate_paths(
+        df,
+        n_paths=100,
+        mode="bootstrap",
+        staking="flat",
+        flat_stake=30.0,
+        initial_bankroll=100.0,
+    )
+    assert np.allclose(paths["final_bankroll"], 10.0)
+    assert np.allclose(paths["max_drawdown"], 0.9)
+
+    summary = summarize_paths(paths, initial_bankroll=100.0).set_index("metric")
+    assert summary.loc["risk_of_ruin", "value"] == 1.0
+    assert summary.loc["prob_double", "value"] == 0.0
+
+
+@pytest.mark.parametrize("n_bets", [20, 100])
+def test_resample_supports_n_bets_different_from_df(n_bets):
+    """
+    Resample mode cycles the bet order to fill paths of any length.
+    """
+    df = _bets()
+    paths = simulate_paths(df, n_paths=1000, n_bets=n_bets, seed=3)
+    assert len(paths) == 1000
+    assert paths["final_bankroll"].notna().all()
+
+    # Certain losses under flat staking lose exactly n_bets stakes
+    df["predicted_prob"] = 0.0
+    flat = simulate_paths(df, n_paths=10, n_bets=n_bets, staking="flat")
+    assert np.allclose(flat["final_bankroll"], 1000.0 - 10.0 * n_bets)
+
+
+def test_unknown_mode_raises():
+    """
+    Invalid modes are rejected.
+    """
+    with pytest.raises(ValueError):
+        simulate_paths(_bets(), n_paths=10, mode="nope")
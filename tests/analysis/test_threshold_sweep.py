@@ -0,0 +1,90 @@
+# tests/analysis/test_threshold_sweep.py
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from scripts.analysis.threshold_sweep import parse_grid, sweep_thresholds
+from scripts.pipeline.detect_value_bets import detect_value_bets
+
+
+def _predictions(n: int = 300, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i}" for i in range(n)],
+            "market_time": pd.date_range("2024-01-01", periods=n, freq="h"),
+            "player_1": "A",
+            "player_2": "B",
+            "predicted_prob": rng.uniform(0.3, 0.9, n),
+            "odds": np.round(rng.uniform(1.2, 8.0, n), 2),
+            "odds_margin": np.round(rng.uniform(1.0, 1.25, n), 3),
+            "winner": rng.integers(0, 2, n),
+        }
+    )
+
+
+def test_sweep_matches_detect_value_bets_per_combination():
+    """
+    Bets, profit and max drawdown from the vectorised sweep match filtering
+    with detect_value_bets and walking the flat-stake P&L combination by
+    combination.
+    """
+    df = _predictions()
+    grids = ([0.0, 0.05, 0.2], [0.5, 0.6], [2.0, 4.0, 7.0], [1.1, 1.2])
+    surface = sweep_thresholds(df, *grids)
+    assert len(surface) == 3 * 2 * 3 * 2
+
+    for ev, conf, odds, margin in itertools.product(*grids):
+        bets = detect_value_bets(
+            df,
+            ev_threshold=ev,
+            confidence_threshold=conf,
+            max_odds=odds,
+            max_margin=margin,
+        )
+        pnl = np.where(bets["winner"] == 1, bets["odds"] - 1, -1.0)
+        cumulative = np.cumsum(pnl)
+        peak = np.maximum(np.maximum.accumulate(cumulative), 0.0)
+        expected_drawdown = (peak - cumulative).max(initial=0.0)
+
+        row = surface[
+            (surface["ev_threshold"] == ev)
+            & (surface["confidence_threshold"] == conf)
+            & (surface["max_odds"] == odds)
+            & (surface["max_margin"] == margin)
+        ].iloc[0]
+        assert row["bets"] == len(bets)
+        assert row["wins"] == int(bets["winner"].sum())
+        assert np.isclose(row["profit"], pnl.sum())
+        assert np.isclose(row["max_drawdown"], expected_drawdown)
+
+
+def test_parse_grid_ranges_and_lists():
+    """
+    Range specs include their stop value; list specs keep their values.
+    """
+    np.testing.assert_allclose(parse_grid("0:0.1:0.05"), [0.0, 0.05, 0.1])
+    np.testing.assert_allclose(parse_grid("2,3.5,inf"), [2.0, 3.5, np.inf])
+
+
+def test_rows_with_missing_ev_or_confidence_are_not_counted():
+    """
+    NaN would clear every threshold; such rows are left out of the sweep.
+    """
+    df = _predictions(n=40)
+    df["expected_value"] = df["predicted_prob"] * df["odds"] - 1
+    df["confidence_score"] = df["predicted_prob"]
+    clean = sweep_thresholds(df, [0.0, 0.1], [0.5], [10.0])
+
+    broken = df.copy()
+    broken.loc[0, "expected_value"] = np.nan
+    broken.loc[1, "confidence_score"] = np.nan
+    dropped = df.drop(index=[0, 1])
+    surface = sweep_thresholds(broken, [0.0, 0.1], [0.5], [10.0])
+
+    pd.testing.assert_frame_equal(
+        surface, sweep_thresholds(dropped, [0.0, 0.1], [0.5], [10.0])
+    )
+    assert (surface["bets"] <= clean["bets"]).all()
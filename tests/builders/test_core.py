@@ -0,0 +1,62 @@
+# tests/builders/test_core.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.builders.core import build_matches_from_snapshots, generate_match_ids
+
+
+def test_build_matches_from_snapshots():
+    """
+    Tests that catalog and ticks collapse to one row per market with
+    opening/closing/VWAP prices computed from pre-off ticks only.
+    """
+    off = pd.Timestamp("2023-01-16T10:00:00Z")
+    off_ms = off.value // 1_000_000
+    catalog = pd.DataFrame(
+        {
+            "market_id": ["1.1", "1.1"],
+            "market_time": [off.isoformat()] * 2,
+            # settledTime only appears in the definitions after settlement
+            "settledTime": [None, "2023-01-16T12:30:00Z"],
+            "market_name": ["Match Odds"] * 2,
+            "runner_1": ["A", "A"],
+            "runner_2": ["B", "B"],
+            "selection_id_1": [11, 11],
+            "selection_id_2": [22, 22],
+        }
+    )
+    ticks = pd.DataFrame(
+        {
+            "market_id": ["1.1"] * 6,
+            "timestamp": [off_ms - 300, off_ms - 300, off_ms - 200, off_ms - 100]
+            + [off_ms - 50, off_ms + 100],
+            "selection_id": [11, 22, 11, 11, 22, 11],
+            "ltp": [2.0, 1.9, 2.2, np.nan, 1.8, 1.01],
+            # tv is cumulative per runner; the last tick is in-play
+            "volume": [100.0, 50.0, 300.0, 400.0, 150.0, 9999.0],
+        }
+    )
+
+    result = build_matches_from_snapshots(ticks, catalog)
+
+    assert len(result) == 1
+    row = result.iloc[0]
+    assert (row["player_1"], row["player_2"]) == ("A", "B")
+    assert row["settled_time"] == "2023-01-16T12:30:00Z"
+    assert (row["opening_ltp_1"], row["closing_ltp_1"]) == (2.0, 2.2)
+    assert (row["opening_ltp_2"], row["closing_ltp_2"]) == (1.9, 1.8)
+    # Runner 1 traded 100 @ 2.0, 200 @ 2.2 and 100 @ the prevailing 2.2
+    assert np.isclose(row["vwap_1"], (100 * 2.0 + 300 * 2.2) / 400)
+    assert row["matched_volume_1"] == 400.0
+    assert row["total_matched_volume"] == 550.0
+    assert len(row["match_id"]) == 16
+
+
+def test_generate_match_ids_is_deterministic():
+    df = pd.DataFrame(
+        {"market_id": ["1.1", "1.2"], "player_1": ["A", "A"], "player_2": ["B", "B"]}
+    )
+    first, second = generate_match_ids(df), generate_match_ids(df.copy())
+    assert first.tolist() == second.tolist()
+    assert first.nunique() == 2
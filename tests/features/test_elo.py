@@ -0,0 +1,145 @@
+# tests/features/test_elo.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.features.elo import EloEngine, compute_elo_features
+from scripts.features.sackmann import prepare_sackmann_matches
+
+
+def _season(year: int, rng: np.random.Generator, n: int = 60) -> pd.DataFrame:
+    players = np.arange(100, 110)
+    pairs = np.array([rng.choice(players, 2, replace=False) for _ in range(n)])
+    return pd.DataFrame(
+        {
+            "tourney_id": [f"{year}-{i // 10}" for i in range(n)],
+            "tourney_date": [int(f"{year}{1 + i // 10:02d}01") for i in range(n)],
+            "surface": rng.choice(["Hard", "Clay", "Grass"], n),
+            "round": rng.choice(["R32", "R16", "QF"], n),
+            "match_num": np.arange(n),
+            "winner_id": pairs[:, 0],
+            "loser_id": pairs[:, 1],
+        }
+    )
+
+
+def test_incremental_update_matches_full_replay(tmp_path):
+    """
+    Tests that saving, reloading and applying a new season gives the same
+    ratings as processing all seasons in one go.
+    """
+    rng = np.random.default_rng(0)
+    season_1 = prepare_sackmann_matches(_season(2022, rng))
+    season_2 = prepare_sackmann_matches(_season(2023, rng))
+
+    full = EloEngine()
+    full.update(prepare_sackmann_matches(pd.concat([season_1, season_2])))
+
+    incremental = EloEngine()
+    incremental.update(season_1)
+    incremental.save(str(tmp_path))
+    incremental = EloEngine.load(str(tmp_path))
+    # Re-sending already processed matches must be a no-op
+    assert incremental.update(season_1) == 0
+    incremental.update(season_2)
+
+    for pid, code in full.player_codes.items():
+        other = incremental.player_codes[pid]
+        assert np.isclose(full.ratings[code], incremental.ratings[other])
+        assert np.allclose(
+            full.surface_ratings[code], incremental.surface_ratings[other]
+        )
+
+
+def test_elo_features_use_ratings_strictly_before_date():
+    """
+    Tests that a match's own result does not leak into its pre-match rating.
+    """
+    matches = prepare_sackmann_matches(
+        pd.DataFrame(
+            {
+                "tourney_id": ["t1"],
+                "tourney_date": [20230116],
+                "surface": ["Hard"],
+                "round": ["R128"],
+                "match_num": [1],
+                "winner_id": [1],
+                "loser_id": [2],
+            }
+        )
+    )
+    engine = EloEngine()
+    engine.update(matches)
+    features_df = pd.DataFrame(
+        {"match_id": ["a", "b"], "sackmann_id_1": [1, 1], "sackmann_id_2": [2, 2]}
+    )
+
+    on_day = compute_elo_features(features_df[:1], engine, as_of="2023-01-16")
+    after = compute_elo_features(features_df[1:], engine, as_of="2023-01-20")
+
+    assert on_day["elo_diff"].iloc[0] == 0
+    assert after["elo_diff"].iloc[0] > 0
+    assert after["surface_elo_diff"].iloc[0] > 0
+    assert after["elo_prob_1"].iloc[0] > 0.5
+
+
+def test_source_digest_changes_with_new_sackmann_files(tmp_path):
+    """
+    Tests that applying a newer Sackmann file changes the engine's source
+    digest, which versions the cached Elo features.
+    """
+    rng = np.random.default_rng(2)
+    _season(2022, rng).to_csv(tmp_path / "atp_matches_2022.csv", index=False)
+    engine = EloEngine()
+    engine.update_from_files(str(tmp_path / "atp_matches_*.csv"))
+    before = engine.source_digest
+    assert engine.update_from_files(str(tmp_path / "atp_matches_*.csv")) == 0
+    assert engine.source_digest == before
+
+    _season(2023, rng).to_csv(tmp_path / "atp_matches_2023.csv", index=False)
+    engine.update_from_files(str(tmp_path / "atp_matches_*.csv"))
+    assert engine.source_digest != before
+
+
+def test_save_load_keeps_players_added_within_capacity(tmp_path):
+    """
+    Tests that players added without growing the state arrays are saved, so
+    a reloaded engine maps every player to its own ratings.
+    """
+
+    def matches(date: int, pairs: list) -> pd.DataFrame:
+        return prepare_sackmann_matches(
+            pd.DataFrame(
+                {
+                    "tourney_id": f"t{date}",
+                    "tourney_date": date,
+                    "surface": "Hard",
+                    "round": "R32",
+                    "match_num": np.arange(len(pairs)),
+                    "winner_id": [w for w, _ in pairs],
+                    "loser_id": [loser for _, loser in pairs],
+                }
+            )
+        )
+
+    seasons = [
+        matches(20220101, [(1, 2), (3, 4)]),
+        matches(20220201, [(5, 6)]),
+        # Fits the capacity grown for players 5-6
+        matches(20220301, [(7, 8)]),
+        matches(20220401, [(9, 6), (1, 8)]),
+    ]
+    full = EloEngine()
+    for season in seasons:
+        full.update(season)
+
+    engine = EloEngine()
+    for season in seasons[:3]:
+        engine.update(season)
+    engine.save(str(tmp_path))
+    engine = EloEngine.load(str(tmp_path))
+    assert sorted(engine.player_codes) == list(range(1, 9))
+    engine.update(seasons[3])
+
+    for pid, code in full.player_codes.items():
+        assert np.isclose(full.ratings[code], engine.ratings[engine.player_codes[pid]])
@@ -0,0 +1,108 @@
+# tests/features/test_player_form.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.features.player_form import (
+    build_form_table,
+    build_h2h_table,
+    compute_form_features,
+    load_or_build_form_tables,
+)
+from scripts.features.sackmann import prepare_sackmann_matches
+
+
+def _raw_matches() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "tourney_id": ["t1", "t1", "t2", "t3"],
+            "tourney_date": [20230102, 20230102, 20230109, 20230116],
+            "surface": ["Hard"] * 4,
+            "round": ["R16", "QF", "R32", "R32"],
+            "match_num": [1, 2, 1, 1],
+            "winner_id": [1, 3, 2, 1],
+            "loser_id": [2, 1, 1, 3],
+            "w_ace": [5, 2, np.nan, 4],
+            "w_svpt": [50, 40, np.nan, 60],
+            "w_1stIn": [30, 25, np.nan, 40],
+            "w_1stWon": [24, 18, np.nan, 30],
+            "w_2ndWon": [12, 8, np.nan, 10],
+            "l_ace": [1, 3, np.nan, 2],
+            "l_svpt": [40, 45, np.nan, 55],
+            "l_1stIn": [20, 30, np.nan, 35],
+            "l_1stWon": [12, 20, np.nan, 22],
+            "l_2ndWon": [8, 6, np.nan, 9],
+        }
+    )
+
+
+def _matches() -> pd.DataFrame:
+    return prepare_sackmann_matches(_raw_matches())
+
+
+def test_form_table_matches_brute_force_window():
+    """
+    Tests that windowed cumulative sums agree with recomputing each row from
+    the player's last N matches, and that stat-less matches only count
+    towards the win rate.
+    """
+    form = build_form_table(_matches(), window=2).set_index(["player_id", "date"])
+
+    # Player 1: W (t1 R16), L (t1 QF) on 2023-01-02, L on 01-09, W on 01-16
+    day_one = form.loc[(1, pd.Timestamp("2023-01-02"))]
+    assert day_one["n_matches"] == 2
+    assert day_one["win_rate"] == 0.5
+    assert np.isclose(day_one["ace_rate"], (5 + 3) / (50 + 45))
+    assert np.isclose(day_one["return_won"], ((40 - 12 - 8) + (40 - 18 - 8)) / 80)
+
+    # Window of 2 on 01-09 covers the QF loss and the stat-less loss
+    second = form.loc[(1, pd.Timestamp("2023-01-09"))]
+    assert second["win_rate"] == 0
+    assert np.isclose(second["first_in"], 30 / 45)
+
+
+def test_form_features_are_taken_strictly_before_as_of():
+    """
+    Tests that features exclude the as-of date's own matches and that the
+    head-to-head record is mirrored for both sides.
+    """
+    matches = _matches()
+    form, h2h = build_form_table(matches, window=10), build_h2h_table(matches)
+    features_df = pd.DataFrame(
+        {"match_id": ["m"], "sackmann_id_1": [1], "sackmann_id_2": [2]}
+    )
+
+    features = compute_form_features(features_df, form, h2h, as_of="2023-01-09")
+
+    row = features.iloc[0]
+    assert row["form_n_matches_1"] == 2
+    assert row["form_n_matches_2"] == 1
+    assert row["days_since_last_1"] == 7
+    assert row["h2h_matches"] == 1
+    assert row["h2h_wins_1"] == 1
+    assert row["h2h_wins_2"] == 0
+
+
+def test_saved_tables_are_rebuilt_for_another_window(tmp_path):
+    """
+    Tests that saved tables are reused for the same window and sources, and
+    rebuilt when the window changes.
+    """
+    _raw_matches().to_csv(tmp_path / "atp_matches_2023.csv", index=False)
+    pattern, table_dir = str(tmp_path / "atp_matches_*.csv"), str(tmp_path / "form")
+    form, _ = load_or_build_form_tables(pattern, table_dir, window=1)
+    again, _ = load_or_build_form_tables(pattern, table_dir, window=1)
+    pd.testing.assert_frame_equal(again, form, check_dtype=False)
+
+    wider, _ = load_or_build_form_tables(pattern, table_dir, window=3)
+    expected = build_form_table(_matches(), window=3)
+    assert np.allclose(
+        wider["win_rate"].to_numpy(dtype=float),
+        expected["win_rate"].to_numpy(dtype=float),
+        equal_nan=True,
+    )
+    assert not np.allclose(
+        wider["win_rate"].to_numpy(dtype=float),
+        form["win_rate"].to_numpy(dtype=float),
+        equal_nan=True,
+    )
@@ -0,0 +1,92 @@
+# tests/features/test_store.py
+
+import importlib
+
+import pandas as pd
+
+from scripts.features.store import FeatureStore, feature_version
+
+
+def _compute_odds(matches: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"match_id": matches["match_id"], "implied_prob_1": 1 / matches["odds"]}
+    )
+
+
+def _matches() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "match_id": ["a", "b", "c"],
+            "market_time": pd.to_datetime(
+                ["2024-01-15 10:00", "2024-01-16 10:00", "2024-01-17 10:00"], utc=True
+            ),
+            "odds": [2.0, 4.0, 5.0],
+        }
+    )
+
+
+def test_materialize_only_computes_missing_matches(tmp_path):
+    """
+    Tests that stored rows are reused, new matches are appended, and a change
+    in parameters produces a new version.
+    """
+    store = FeatureStore(str(tmp_path))
+    calls = []
+
+    def compute(todo):
+        calls.append(list(todo["match_id"]))
+        return _compute_odds(todo)
+
+    matches = _matches()
+    store.materialize("odds", matches[:2], compute, _compute_odds, {"w": 1})
+    result = store.materialize("odds", matches, compute, _compute_odds, {"w": 1})
+
+    assert calls == [["a", "b"], ["c"]]
+    assert sorted(result["match_id"]) == ["a", "b", "c"]
+    assert feature_version("odds", _compute_odds, {"w": 1}) != feature_version(
+        "odds", _compute_odds, {"w": 2}
+    )
+    stored = store.read("odds")
+    assert stored["available_at"].dtype == "datetime64[ns]"
+    assert stored.set_index("match_id").loc["b", "implied_prob_1"] == 0.25
+
+
+def test_read_as_of_returns_latest_available_row(tmp_path):
+    """
+    Tests point-in-time retrieval when a match has rows from two dates.
+    """
+    store = FeatureStore(str(tmp_path))
+    rows = pd.DataFrame(
+        {
+            "match_id": ["a", "a", "b"],
+            "available_at": ["2024-01-01", "2024-01-10", "2024-01-05"],
+            "elo_diff": [10.0, 25.0, -5.0],
+        }
+    )
+    store.write("elo", "v1", rows)
+
+    early = store.read("elo", as_of="2024-01-06")
+    late = store.read("elo", as_of="2024-01-10")
+    joined = store.join(pd.DataFrame({"match_id": ["a"]}), ["elo"], as_of="2024-01-02")
+
+    assert early.set_index("match_id")["elo_diff"].to_dict() == {"a": 10.0, "b": -5.0}
+    assert late.set_index("match_id").loc["a", "elo_diff"] == 25.0
+    assert joined["elo_diff"].tolist() == [10.0]
+
+
+def test_version_changes_with_helpers_of_the_definition(tmp_path, monkeypatch):
+    """
+    Tests that editing code the definition calls, not only the definition
+    itself, gives a new version.
+    """
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module_path = tmp_path / "odds_features.py"
+    module_path.write_text(
+        "def _scale(x):\n    return x\n\n\ndef compute(df):\n    return _scale(df)\n"
+    )
+    module = importlib.import_module("odds_features")
+    before = feature_version("odds", module.compute)
+
+    module_path.write_text(module_path.read_text().replace("return x", "return 2 * x"))
+    module = importlib.reload(module)
+    assert feature_version("odds", module.compute) != before
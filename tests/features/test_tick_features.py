@@ -0,0 +1,53 @@
+# tests/features/test_tick_features.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.features.tick_features import compute_tick_features
+
+
+def test_compute_tick_features():
+    """
+    Tests drift, volatility, price changes, late money and momentum for a
+    single selection, and that in-play ticks are excluded.
+    """
+    off = pd.Timestamp("2023-01-16T10:00:00Z")
+    off_ms = off.value // 1_000_000
+    minute = 60_000
+    matches = pd.DataFrame(
+        {
+            "match_id": ["m1"],
+            "market_id": [1.5],
+            "market_time": [off.isoformat()],
+            "selection_id_1": [11],
+            "selection_id_2": [22],
+        }
+    )
+    ticks = pd.DataFrame(
+        {
+            "market_id": [1.5] * 5,
+            "selection_id": [11, 11, 11, 11, 11],
+            "timestamp": [
+                off_ms - 60 * minute,
+                off_ms - 40 * minute,
+                off_ms - 20 * minute,
+                off_ms - 5 * minute,
+                off_ms + 5 * minute,
+            ],
+            "ltp": [2.0, 2.0, 2.5, 2.2, 1.01],
+            "volume": [100.0, 200.0, 300.0, 500.0, 9000.0],
+        }
+    )
+
+    result = compute_tick_features(ticks, matches, late_window_min=30)
+    row = result.set_index("match_id").loc["m1"]
+
+    assert np.isclose(row["tick_drift_1"], np.log(2.2 / 2.0))
+    expected_vol = np.sqrt(np.log(2.5 / 2.0) ** 2 + np.log(2.2 / 2.5) ** 2)
+    assert np.isclose(row["tick_volatility_1"], expected_vol)
+    assert row["tick_n_price_changes_1"] == 2
+    assert np.isclose(row["tick_late_money_share_1"], 300 / 500)
+    assert np.isclose(row["tick_vwap_1"], (200 * 2.0 + 100 * 2.5 + 200 * 2.2) / 500)
+    # Momentum over the last 15 minutes: price at -20m (2.5) to close (2.2)
+    assert np.isclose(row["tick_momentum_1"], np.log(2.2 / 2.5))
+    assert np.isnan(row["tick_drift_2"])
@@ -0,0 +1,83 @@
+# tests/modeling/test_cross_validation.py
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from scripts.modeling.cross_validation import cross_validate_grouped, split_budget
+from scripts.modeling.train_eval_model import run_train_eval_model
+
+
+def _bets(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.2, 0.8, n)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i // 2}" for i in range(n)],
+            "player_1": "A",
+            "player_2": "B",
+            "predicted_prob": prob,
+            "odds": rng.uniform(1.5, 4.0, n),
+            "winner": (rng.random(n) < prob).astype(int),
+        }
+    )
+
+
+def test_folds_are_grouped_and_parallel_matches_serial(tmp_path):
+    """
+    Every row is scored out of fold exactly once, no match spans folds, and
+    two worker processes give the same metrics as one.
+    """
+    df = _bets()
+    X, y, groups = df[["predicted_prob", "odds"]], df["winner"], df["match_id"]
+    model = LogisticRegression()
+    serial, oof, timing = cross_validate_grouped(
+        model, X, y, groups, n_splits=4, cache_dir=str(tmp_path)
+    )
+    parallel, oof_parallel, _ = cross_validate_grouped(
+        model, X, y, groups, n_splits=4, n_jobs=2, cache_dir=str(tmp_path)
+    )
+
+    assert len(list(tmp_path.iterdir())) == 1  # second run reused the folds
+    assert not np.isnan(oof).any()
+    np.testing.assert_allclose(oof, oof_parallel)
+    pd.testing.assert_frame_equal(
+        serial.drop(columns=["fit_seconds", "predict_seconds"]),
+        parallel.drop(columns=["fit_seconds", "predict_seconds"]),
+    )
+    assert serial["test_rows"].sum() == len(df)
+    assert (serial["auc"] > 0.6).all()
+    assert timing["wall_seconds"] > 0
+
+    # Both rows of a match share one out-of-fold model
+    folds = np.load(next(tmp_path.iterdir()) / "folds.npz")
+    fold_of = np.empty(len(df), dtype=int)
+    for k in range(4):
+        fold_of[folds[f"test_{k}"]] = k
+    assert (pd.Series(fold_of).groupby(groups.to_numpy()).nunique() == 1).all()
+
+
+def test_budget_is_split_between_folds_and_models():
+    """
+    The core budget goes to folds first, leftover cores to each fold's model.
+    """
+    assert split_budget(8, 4) == (4, 2)
+    assert split_budget(2, 5) == (2, 1)
+    assert split_budget(1, 5) == (1, 1)
+
+
+def test_train_eval_reports_per_fold_metrics(tmp_path):
+    """
+    run_train_eval_model reports per-fold AUC/log-loss and fits the final
+    forest with the full core budget.
+    """
+    model, report, auc, meta = run_train_eval_model(
+        _bets(), n_splits=3, n_jobs=2, cache_dir=str(tmp_path)
+    )
+    assert isinstance(model, RandomForestClassifier)
+    assert model.n_jobs == 2
+    assert len(meta["cv_folds"]) == 3
+    assert auc == np.mean([f["auc"] for f in meta["cv_folds"]])
+    assert "log_loss" in meta["cv_folds"][0]
+    assert "precision" in report
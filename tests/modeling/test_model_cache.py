@@ -0,0 +1,30 @@
+# tests/modeling/test_model_cache.py
+
+import os
+
+import joblib
+from sklearn.linear_model import LogisticRegression
+
+from scripts.modeling.model_cache import clear_model_cache, load_model
+
+
+def test_load_model_is_cached_until_file_changes(tmp_path):
+    """
+    Tests that repeated loads return the cached object and that rewriting the
+    file invalidates the cache entry.
+    """
+    clear_model_cache()
+    path = tmp_path / "model.joblib"
+    joblib.dump(LogisticRegression(C=1.0), path)
+
+    first = load_model(str(path))
+    assert load_model(str(path)) is first
+
+    joblib.dump(LogisticRegression(C=2.0), path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = load_model(str(path))
+    assert reloaded is not first
+    assert reloaded.C == 2.0
+    assert load_model(str(path), mmap_mode="r").C == 2.0
@@ -0,0 +1,80 @@
+# tests/modeling/test_numpy_export.py
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from scripts.modeling.model_cache import clear_model_cache, load_model
+from scripts.modeling.numpy_export import (
+    _BLOCK_ROWS,
+    _FLAT_PAIRS,
+    save_numpy_model,
+)
+
+
+def _data(n: int = 400) -> tuple:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.normal(size=(n, 3)), columns=["implied_prob_1", "odds", "elo_diff"]
+    )
+    y = (X["implied_prob_1"] + 0.5 * rng.normal(size=n) > 0).astype(int)
+    return X, y
+
+
+def test_exported_forest_matches_sklearn(tmp_path):
+    """
+    Tests that the numpy forest evaluator reproduces sklearn's probabilities
+    exactly, including on features given in a different column order.
+    """
+    X, y = _data()
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+    path = tmp_path / "rf.npz"
+    save_numpy_model(model, str(path))
+    clear_model_cache()
+
+    exported = load_model(str(path))
+
+    np.testing.assert_array_equal(exported.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(
+        exported.predict_proba(X[X.columns[::-1]]), model.predict_proba(X)
+    )
+    np.testing.assert_array_equal(exported.predict(X), model.predict(X))
+    assert list(exported.feature_names_in_) == list(model.feature_names_in_)
+    assert list(exported.classes_) == [0, 1]
+
+
+def test_exported_forest_matches_sklearn_on_large_batches(tmp_path):
+    """
+    Tests the level-by-level path taken by batches above the flat-traversal
+    threshold, over more than one row block.
+    """
+    X, y = _data()
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+    path = tmp_path / "rf.npz"
+    save_numpy_model(model, str(path))
+    clear_model_cache()
+    exported = load_model(str(path))
+
+    large, _ = _data(n=9_000)
+    assert len(large) * 25 > _FLAT_PAIRS and len(large) > _BLOCK_ROWS
+    np.testing.assert_array_equal(
+        exported.predict_proba(large), model.predict_proba(large)
+    )
+
+
+def test_exported_logistic_regression_matches_sklearn(tmp_path):
+    """
+    Tests that the numpy logistic regression evaluator matches sklearn.
+    """
+    X, y = _data()
+    model = LogisticRegression().fit(X, y)
+    path = tmp_path / "logreg.npz"
+    save_numpy_model(model, str(path))
+    clear_model_cache()
+
+    exported = load_model(str(path))
+
+    np.testing.assert_allclose(
+        exported.predict_proba(X), model.predict_proba(X), rtol=1e-12
+    )
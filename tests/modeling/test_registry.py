@@ -0,0 +1,91 @@
+# tests/modeling/test_registry.py
+
+import json
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.modeling.model_cache import clear_model_cache, load_model
+from scripts.modeling.registry import ModelRegistry, resolve_model_ref
+from scripts.modeling.train_ev_filter_model import main_cli as train_filter_main
+
+
+def test_registry_evicts_least_recently_used_unaliased_versions(tmp_path):
+    """
+    Beyond max_versions the least recently used version goes, except those
+    an alias points at; a hit counts as use and moves latest.
+    """
+    registry = ModelRegistry(str(tmp_path), max_versions=2)
+    registry.put("m", "v1", {"w": 1}, {"n": 1})
+    registry.alias("m", "prod", "v1")
+    registry.put("m", "v2", {"w": 2}, {"n": 2})
+    registry.put("m", "v3", {"w": 3}, {"n": 3})
+    assert registry.versions("m") == ["v1", "v3"]
+    assert not (tmp_path / "m" / "v2.joblib").exists()
+
+    model, meta = registry.get("m", "v1")
+    assert model == {"w": 1} and meta["registry_version"] == "v1"
+    assert registry.resolve("m") == tmp_path / "m" / "v1.joblib"
+    registry.alias("m", "prod", "v3")
+    registry.put("m", "v4", {"w": 4}, {"n": 4})
+    assert registry.versions("m") == ["v3", "v4"]
+    assert registry.get("m", "v2") is None
+    with pytest.raises(KeyError):
+        resolve_model_ref("m@v2", str(tmp_path))
+
+
+def test_training_reuses_registered_model_and_alias_loads_it(tmp_path):
+    """
+    Retraining on unchanged data returns the registered model without
+    fitting; new data adds a version that ev_filter@latest resolves to.
+    """
+    rng = np.random.default_rng(0)
+    n = 200
+    prob = rng.uniform(0.3, 0.8, n)
+    odds = rng.uniform(1.5, 3.0, n)
+    bets = pd.DataFrame(
+        {
+            "match_id": [f"m{i}" for i in range(n)],
+            "player_1": "A",
+            "player_2": "B",
+            "odds": odds,
+            "predicted_prob": prob,
+            "expected_value": prob * odds - 1,
+            "winner": (rng.random(n) < prob).astype(int),
+        }
+    )
+    bets.to_csv(tmp_path / "bets.csv", index=False)
+    args = Namespace(
+        input_glob=str(tmp_path / "bets.csv"),
+        dataset=None,
+        output_model=None,
+        min_ev=-1.0,
+        incremental=False,
+        feature_groups=None,
+        registry=str(tmp_path / "registry"),
+        model_name="ev_filter",
+        max_versions=3,
+        retrain=False,
+        dry_run=False,
+    )
+    registry = ModelRegistry(args.registry)
+    train_filter_main(args)
+    (first,) = registry.versions("ev_filter")
+    meta_path = tmp_path / "registry" / "ev_filter" / f"{first}.json"
+    created = json.loads(meta_path.read_text())["timestamp"]
+
+    train_filter_main(args)
+    assert registry.versions("ev_filter") == [first]
+    assert json.loads(meta_path.read_text())["timestamp"] == created
+
+    bets.iloc[:150].to_csv(tmp_path / "bets.csv", index=False)
+    train_filter_main(args)
+    first_again, second = registry.versions("ev_filter")
+    assert first_again == first != second
+    clear_model_cache()
+    model = load_model("ev_filter@latest", registry_dir=args.registry)
+    assert model is load_model(str(registry.resolve("ev_filter", second)))
+    prob = model.predict_proba(bets[["predicted_prob", "odds", "expected_value"]])
+    assert prob.shape == (n, 2)
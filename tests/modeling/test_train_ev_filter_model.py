@@ -0,0 +1,166 @@
+# tests/modeling/test_train_ev_filter_model.py
+
+import json
+from argparse import Namespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.modeling import training_dataset
+from scripts.modeling.train_ev_filter_model import main_cli, update_ev_filter_model
+from scripts.modeling.training_dataset import build_training_dataset
+
+
+def _tournament(start: str, n: int = 200, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.2, 0.8, n)
+    odds = rng.uniform(1.5, 4.0, n)
+    return pd.DataFrame(
+        {
+            "match_id": [f"{start}-{i // 2}" for i in range(n)],
+            "market_time": pd.date_range(start, periods=n, freq="h").astype(str),
+            "player_1": "A",
+            "player_2": "B",
+            "predicted_prob": prob,
+            "odds": odds,
+            "expected_value": prob * odds - 1,
+            "winner": (rng.random(n) < prob).astype(int),
+        }
+    )
+
+
+def _args(tmp_path) -> Namespace:
+    return Namespace(
+        input_glob=str(tmp_path / "bets" / "*.csv"),
+        output_model=str(tmp_path / "model" / "ev_filter.pkl"),
+        min_ev=-1.0,
+        incremental=True,
+        feature_groups=None,
+        feature_store=None,
+        as_of=None,
+        dry_run=False,
+    )
+
+
+def test_incremental_cli_learns_only_new_tournaments(tmp_path):
+    """
+    Each run reads only files not yet in the watermark and updates the saved
+    model; an unchanged input set leaves it untouched.
+    """
+    (tmp_path / "bets").mkdir()
+    _tournament("2024-01-01").to_csv(tmp_path / "bets" / "t1.csv", index=False)
+    args = _args(tmp_path)
+    main_cli(args)
+    meta_path = tmp_path / "model" / "ev_filter.json"
+    first = json.loads(meta_path.read_text())
+    assert first["online"] and first["updates"] == 1
+    assert list(first["watermark"]["files"]) == [str(tmp_path / "bets" / "t1.csv")]
+
+    _tournament("2024-02-01", seed=2).to_csv(tmp_path / "bets" / "t2.csv", index=False)
+    main_cli(args)
+    second = json.loads(meta_path.read_text())
+    assert second["updates"] == 2
+    assert second["last_update_rows"] == 200 and second["train_rows"] == 400
+    # Learned key hashes live next to the model, not in the metadata
+    assert "row_keys" not in second["watermark"]
+    assert len(np.load(tmp_path / "model" / "ev_filter.keys.npy")) == 400
+    model = joblib.load(tmp_path / "model" / "ev_filter.pkl")
+    prob = model.predict_proba(_tournament("2024-03-01")[first["features"]].to_numpy())
+    assert prob.shape == (200, 2) and np.allclose(prob.sum(axis=1), 1.0)
+
+    main_cli(args)
+    assert json.loads(meta_path.read_text())["updates"] == 2
+
+
+def test_update_skips_rows_behind_the_watermark():
+    """
+    Rows at or before the watermark are not learned twice, and a model
+    trained on different features cannot be updated.
+    """
+    df = _tournament("2024-01-01")
+    model, meta, keys = update_ev_filter_model(df, min_ev=-1.0)
+    more = pd.concat([df.tail(50), _tournament("2024-02-01", n=30)])
+    model, meta, keys = update_ev_filter_model(
+        more, model, meta, min_ev=-1.0, learned_keys=keys
+    )
+    assert meta["last_update_rows"] == 30 and meta["train_rows"] == 230
+
+    # Rows placed earlier than learned ones are new bets all the same
+    model, meta, keys = update_ev_filter_model(
+        _tournament("2023-12-01", n=20), model, meta, min_ev=-1.0, learned_keys=keys
+    )
+    assert meta["last_update_rows"] == 20 and meta["train_rows"] == 250
+    assert len(keys) == 250
+
+    with pytest.raises(ValueError, match="Feature mismatch"):
+        update_ev_filter_model(
+            _tournament("2024-03-01").assign(elo_diff=0.0),
+            model,
+            meta,
+            min_ev=-1.0,
+            extra_features=["elo_diff"],
+            learned_keys=keys,
+        )
+
+
+def test_incremental_cli_records_overlapping_and_empty_files(tmp_path):
+    """
+    A file dated before already learned bets is learned, and a file with no
+    new bets is recorded rather than failing every later run.
+    """
+    (tmp_path / "bets").mkdir()
+    args = _args(tmp_path)
+    meta_path = tmp_path / "model" / "ev_filter.json"
+    _tournament("2024-01-10", n=50).to_csv(tmp_path / "bets" / "a.csv", index=False)
+    main_cli(args)
+    _tournament("2024-01-05", n=50, seed=2).to_csv(
+        tmp_path / "bets" / "b.csv", index=False
+    )
+    main_cli(args)
+    meta = json.loads(meta_path.read_text())
+    assert meta["last_update_rows"] == 50 and meta["train_rows"] == 100
+
+    _tournament("2024-01-10", n=50).to_csv(tmp_path / "bets" / "c.csv", index=False)
+    main_cli(args)
+    meta = json.loads(meta_path.read_text())
+    assert meta["last_update_rows"] == 0 and meta["train_rows"] == 100
+    assert str(tmp_path / "bets" / "c.csv") in meta["watermark"]["files"]
+    main_cli(args)
+    assert json.loads(meta_path.read_text())["updates"] == 3
+
+
+def test_incremental_dataset_reads_only_rows_of_changed_sources(tmp_path, monkeypatch):
+    """
+    After the dataset is rebuilt with a new source, rows from the sources
+    learned before are skipped without being read.
+    """
+    (tmp_path / "bets").mkdir()
+    dataset = str(tmp_path / "training.csv.gz")
+    args = _args(tmp_path)
+    args.input_glob, args.dataset = None, dataset
+    meta_path = tmp_path / "model" / "ev_filter.json"
+    _tournament("2024-01-01", n=60).to_csv(tmp_path / "bets" / "a.csv", index=False)
+    build_training_dataset(str(tmp_path / "bets" / "*.csv"), dataset)
+    main_cli(args)
+
+    _tournament("2024-02-01", n=40, seed=2).to_csv(
+        tmp_path / "bets" / "b.csv", index=False
+    )
+    build_training_dataset(str(tmp_path / "bets" / "*.csv"), dataset)
+    loaded = []
+    load = training_dataset.load_training_dataset
+
+    def spy(path, skip_rows=0):
+        df = load(path, skip_rows)
+        loaded.append(len(df))
+        return df
+
+    monkeypatch.setattr(
+        "scripts.modeling.train_ev_filter_model.load_training_dataset", spy
+    )
+    main_cli(args)
+    meta = json.loads(meta_path.read_text())
+    assert loaded == [40]
+    assert meta["last_update_rows"] == 40 and meta["train_rows"] == 100
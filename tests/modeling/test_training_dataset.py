@@ -0,0 +1,101 @@
+# tests/modeling/test_training_dataset.py
+
+import json
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+
+from scripts.modeling.train_eval_model import main_cli as train_eval_main
+from scripts.modeling.training_dataset import (
+    build_training_dataset,
+    load_training_dataset,
+)
+
+
+def _bets(n: int = 40, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.3, 0.7, n)
+    odds = rng.uniform(1.5, 3.5, n)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{seed}-{i}" for i in range(n)],
+            "player_1": [f"P{i}" for i in range(n)],
+            "player_2": "Q",
+            "odds": odds,
+            "predicted_prob": prob,
+            "expected_value": prob * odds - 1,
+            "winner": (rng.random(n) < prob).astype(int),
+        }
+    )
+
+
+def test_overlapping_files_are_deduplicated_across_chunks(tmp_path):
+    """
+    A bet repeated in a `_deduped` copy, in another chunk of the same file or
+    at the same price is kept once; a new price is a new bet.
+    """
+    raw = _bets()
+    pd.concat([raw, raw.head(5)]).to_csv(tmp_path / "vb_open.csv", index=False)
+    deduped = pd.concat([raw.head(20), raw.head(3).assign(odds=9.5)])
+    deduped.to_csv(tmp_path / "vb_open_deduped.csv", index=False)
+    output = str(tmp_path / "train" / "value_bets.csv.gz")
+
+    manifest = build_training_dataset(
+        str(tmp_path / "vb_*.csv"), output=output, chunk_rows=7
+    )
+    assert manifest["rows_read"] == 45 + 23
+    assert manifest["rows"] == 43 and manifest["duplicates"] == 25
+    df = load_training_dataset(output)
+    assert len(df) == 43 and not df.duplicated(["match_id", "odds"]).any()
+    assert df["odds"].dtype == np.float32 and df["winner"].dtype == np.int8
+    assert df["player_1"].dtype == "category"
+
+    again = build_training_dataset(str(tmp_path / "vb_*.csv"), output=output)
+    assert again["created"] == manifest["created"]
+
+
+def test_training_command_reads_the_dataset(tmp_path):
+    """
+    Without --input_glob, train-eval trains on the deduplicated table.
+    """
+    raw = _bets(200, seed=1)
+    for name in ("a.csv", "a_deduped.csv"):
+        raw.to_csv(tmp_path / name, index=False)
+    dataset = str(tmp_path / "value_bets.csv.gz")
+    build_training_dataset(str(tmp_path / "*.csv"), output=dataset)
+
+    output = tmp_path / "model.pkl"
+    train_eval_main(
+        Namespace(
+            input_glob=None,
+            dataset=dataset,
+            output_model=str(output),
+            algorithm="logreg",
+            n_splits=3,
+            cv="group",
+            n_jobs=1,
+            cv_cache_dir=str(tmp_path / "cv"),
+            feature_groups=None,
+            verbose=False,
+            json_logs=False,
+            dry_run=False,
+        )
+    )
+    meta = json.loads(output.with_suffix(".json").read_text())
+    assert meta["train_rows"] == 200
+
+
+def test_file_without_winner_is_skipped(tmp_path):
+    """
+    A matching file lacking the label column is skipped with a warning
+    instead of aborting the build.
+    """
+    _bets().to_csv(tmp_path / "vb_a.csv", index=False)
+    _bets(seed=1).drop(columns="winner").to_csv(tmp_path / "vb_b.csv", index=False)
+    output = str(tmp_path / "value_bets.csv.gz")
+
+    manifest = build_training_dataset(str(tmp_path / "vb_*.csv"), output=output)
+    assert manifest["rows"] == 40 and manifest["skipped"] == 40
+    assert manifest["files"][str(tmp_path / "vb_b.csv")]["new"] == 0
+    assert len(load_training_dataset(output)) == 40
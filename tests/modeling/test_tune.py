@@ -0,0 +1,122 @@
+# tests/modeling/test_tune.py
+
+import json
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.modeling.tune import _schedule, main_cli, successive_halving
+
+
+def _bets(n: int = 600, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prob = rng.uniform(0.2, 0.8, n)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i // 2}" for i in range(n)],
+            "player_1": "A",
+            "player_2": "B",
+            "predicted_prob": prob,
+            "odds": rng.uniform(1.5, 4.0, n),
+            "winner": (rng.random(n) < prob).astype(int),
+        }
+    )
+
+
+def test_schedule_grows_resource_by_eta():
+    """
+    27 candidates with eta=3 take four rounds ending at the full resource.
+    """
+    assert _schedule(27, 900, 10, 3) == [34, 100, 300, 900]
+    assert _schedule(27, 900, 200, 3) == [200, 200, 300, 900]
+    assert _schedule(1, 900, 10, 3) == [900]
+
+
+def test_halving_keeps_the_best_third_each_round(tmp_path):
+    """
+    Each round keeps ceil(n / eta) candidates on eta times more rows, and the
+    selected evaluation is the winner's at the largest resource.
+    """
+    df = _bets()
+    best, trace = successive_halving(
+        df[["predicted_prob", "odds"]],
+        df["winner"],
+        df["match_id"],
+        algorithm="logreg",
+        n_candidates=9,
+        n_splits=3,
+        cache_dir=str(tmp_path),
+    )
+    per_round = trace.groupby("round").agg(
+        candidates=("candidate", "size"), resource=("resource", "first")
+    )
+    assert per_round["candidates"].tolist() == [9, 3, 1]
+    assert per_round["resource"].tolist() == [60, 134, 400]
+    assert (trace["folds"] == 3).all()
+
+    selected = trace[trace["selected"]]
+    assert len(selected) == 1 and selected["round"].iloc[0] == 2
+    assert json.loads(selected["params"].iloc[0]) == best
+
+    # Survivors of round 0 are its lowest log-loss candidates
+    first = trace[trace["round"] == 0].nsmallest(3, "log_loss")
+    assert set(first["candidate"]) == set(trace[trace["round"] == 1]["candidate"])
+
+
+def test_zero_budget_raises_without_a_complete_candidate(tmp_path):
+    """
+    With no time to finish any candidate, the search reports failure.
+    """
+    df = _bets()
+    with pytest.raises(RuntimeError):
+        successive_halving(
+            df[["predicted_prob", "odds"]],
+            df["winner"],
+            df["match_id"],
+            algorithm="logreg",
+            n_candidates=3,
+            budget_seconds=0.0,
+            cache_dir=str(tmp_path),
+        )
+
+
+def test_cli_tunes_forest_trees_and_saves_trace(tmp_path):
+    """
+    With trees as the resource, the final forest gets the largest tree count;
+    the model, metadata and search trace are saved together.
+    """
+    _bets().to_csv(tmp_path / "bets.csv", index=False)
+    output = tmp_path / "models" / "tuned.pkl"
+    args = Namespace(
+        input_glob=str(tmp_path / "bets.csv"),
+        output_model=str(output),
+        algorithm="rf",
+        search_space=None,
+        resource="n_estimators",
+        n_candidates=4,
+        eta=2,
+        min_resource=None,
+        max_resource=20,
+        scoring="auc",
+        n_splits=3,
+        cv="group",
+        n_jobs=2,
+        budget_seconds=None,
+        cv_cache_dir=str(tmp_path / "cache"),
+        feature_groups=None,
+        feature_store=None,
+        as_of=None,
+        verbose=False,
+        json_logs=False,
+        dry_run=False,
+    )
+    main_cli(args)
+
+    meta = json.loads(output.with_suffix(".json").read_text())
+    assert meta["best_params"]["n_estimators"] == 20
+    assert meta["search"]["rounds"] == 3
+    trace = pd.read_csv(output.with_suffix(".trace.csv"))
+    assert trace["resource"].max() == 20
+    assert output.exists()
@@ -0,0 +1,55 @@
+# tests/pipeline/test_merge_final_ltps.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline.merge_final_ltps_into_matches import merge_final_ltps
+
+
+def test_merge_asof_ltps_takes_pre_off_prices():
+    """
+    Tests that as-of mode picks the last price at or before each offset and
+    ignores in-play trades after the off.
+    """
+    off = pd.Timestamp("2023-01-16T10:00:00Z")
+    off_ms = off.value // 1_000_000
+    minute = 60_000
+    matches = pd.DataFrame(
+        {
+            "match_id": ["m1"],
+            "market_id": ["1.2"],
+            "market_time": [off.isoformat()],
+            "player_1": ["A"],
+            "player_2": ["B"],
+            "selection_id_1": [11],
+            "selection_id_2": [22],
+        }
+    )
+    # Deliberately out of timestamp order to exercise the sort fallback
+    snapshots = pd.DataFrame(
+        {
+            "market_id": ["1.2"] * 6,
+            "selection_id": [11, 22, 11, 22, 11, 11],
+            "timestamp": [
+                off_ms - 30 * minute,
+                off_ms - 90 * minute,
+                off_ms - 70 * minute,
+                off_ms - 10 * minute,
+                off_ms - 1 * minute,
+                off_ms + 5 * minute,  # in-play, must be ignored
+            ],
+            "ltp": [1.8, 2.4, 1.9, 2.2, 1.7, 1.1],
+        }
+    )
+
+    result = merge_final_ltps(matches, snapshots, mode="asof", offsets_min=[60, 15, 0])
+
+    row = result.iloc[0]
+    assert row["ltp_player_1_60m"] == 1.9
+    assert row["ltp_player_1_15m"] == 1.8
+    assert row["ltp_player_1_0m"] == 1.7
+    assert row["ltp_player_2_60m"] == 2.4
+    assert row["ltp_player_2_0m"] == 2.2
+    # Primary prices come from the offset closest to the off
+    assert row["ltp_player_1"] == 1.7
+    assert np.isclose(row["ltp_player_2"], 2.2)
@@ -0,0 +1,39 @@
+# tests/pipeline/test_predict_win_probs.py
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from scripts.pipeline.predict_win_probs import (
+    predict_win_probs,
+    predict_win_probs_batch,
+)
+
+
+def test_batch_predictions_match_per_label_predictions():
+    """
+    Tests that scoring several labels in one call gives the same predictions
+    as scoring each label separately, including a label with no valid rows.
+    """
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(50, 2)), columns=["f1", "f2"])
+    model = LogisticRegression().fit(X, (X["f1"] > 0).astype(int))
+
+    def frame(n, prefix):
+        df = pd.DataFrame(rng.normal(size=(n, 2)), columns=["f1", "f2"])
+        df["match_id"] = [f"{prefix}{i}" for i in range(n)]
+        df["player_1"], df["player_2"] = "A", "B"
+        return df
+
+    frames = {"ao": frame(4, "a"), "rg": frame(3, "r"), "empty": frame(2, "e")}
+    frames["empty"]["f1"] = np.nan
+
+    batched = predict_win_probs_batch(model, frames)
+
+    assert list(batched) == ["ao", "rg", "empty"]
+    for label in ("ao", "rg"):
+        pd.testing.assert_frame_equal(
+            batched[label], predict_win_probs(model, frames[label])
+        )
+    assert batched["empty"].empty
+    assert list(batched["empty"].columns) == list(batched["ao"].columns)
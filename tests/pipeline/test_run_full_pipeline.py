@@ -0,0 +1,22 @@
+# tests/pipeline/test_run_full_pipeline.py
+
+import pandas as pd
+import pytest
+
+from scripts.pipeline.run_full_pipeline import history_start_date
+
+
+def test_history_start_date_falls_back_to_earliest_market_time():
+    """
+    Tests that a configured start_date wins, that the earliest market_time's
+    day is used otherwise, and that neither being available is an error.
+    """
+    matches = pd.DataFrame(
+        {"market_time": ["2024-01-16T09:00:00Z", "2024-01-14T23:30:00Z"]}
+    )
+    label_cfg = {"label": "ausopen_2024_atp", "start_date": "2024-01-12"}
+    assert history_start_date(label_cfg, matches) == "2024-01-12"
+    label_cfg = {"label": "ausopen_2024_atp"}
+    assert history_start_date(label_cfg, matches) == "2024-01-14"
+    with pytest.raises(ValueError, match="start_date"):
+        history_start_date(label_cfg, matches.drop(columns="market_time"))
@@ -0,0 +1,137 @@
+# tests/pipeline/test_simulate_bankroll_growth.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline.detect_value_bets import detect_value_bets
+from scripts.pipeline.simulate_bankroll_growth import simulate_bankroll_growth
+from scripts.utils.kelly import simultaneous_kelly
+
+
+def test_simultaneous_strategy_settles_windows_together():
+    """
+    Bets in a window are staked from the window's starting bankroll with
+    simultaneous Kelly fractions; the next window starts from the settled
+    bankroll.
+    """
+    df = pd.DataFrame(
+        {
+            "match_id": ["a", "b", "c"],
+            "market_time": ["2024-01-02", "2024-01-01", "2024-01-01"],
+            "predicted_prob": [0.6, 0.6, 0.55],
+            "odds": [2.0, 2.0, 2.2],
+            "winner": [1, 1, 0],
+        }
+    )
+
+    result = simulate_bankroll_growth(
+        df, initial_bankroll=100.0, strategy="simultaneous"
+    )
+
+    assert result["match_id"].tolist() == ["b", "c", "a"]
+    f = simultaneous_kelly([0.6, 0.55], [2.0, 2.2])
+    assert np.allclose(result["kelly_fraction"].iloc[:2], f)
+    assert np.allclose(result["kelly_fraction"].iloc[2], 0.2)
+    assert result["bankroll"].iloc[:2].tolist() == [100.0, 100.0]
+    assert np.isclose(result["bankroll"].iloc[2], 100.0 * (1 + f[0] - f[1]))
+
+
+def test_simultaneous_windows_default_to_the_calendar_day():
+    """
+    Bets starting at different times on the same day are one window and are
+    sized jointly; exact-value windows are still available.
+    """
+    df = pd.DataFrame(
+        {
+            "match_id": ["a", "b", "c"],
+            "market_time": [
+                "2024-01-01 11:30",
+                "2024-01-01 10:00",
+                "2024-01-02 09:00",
+            ],
+            "predicted_prob": [0.6, 0.55, 0.6],
+            "odds": [2.0, 2.2, 2.0],
+            "winner": [1, 0, 1],
+        }
+    )
+
+    result = simulate_bankroll_growth(
+        df, initial_bankroll=100.0, strategy="simultaneous"
+    )
+
+    assert result["match_id"].tolist() == ["b", "a", "c"]
+    f = simultaneous_kelly([0.55, 0.6], [2.2, 2.0])
+    assert np.allclose(result["kelly_fraction"].iloc[:2], f)
+    assert result["bankroll"].iloc[:2].tolist() == [100.0, 100.0]
+    assert np.isclose(result["bankroll"].iloc[2], 100.0 * (1 - f[0] + f[1]))
+
+    by_start = simulate_bankroll_growth(
+        df, initial_bankroll=100.0, strategy="simultaneous", window_freq=None
+    )
+    assert np.allclose(by_start["kelly_fraction"], [0.175, 0.2, 0.2])
+
+
+def test_event_driven_locks_stakes_until_settlement():
+    """
+    In event-driven mode concurrent flat bets are limited by the available
+    balance; bets without a settled time settle settle_after_min later.
+    """
+    df = pd.DataFrame(
+        {
+            "match_id": ["a", "b", "c"],
+            "market_time": [
+                "2024-01-01 10:00",
+                "2024-01-01 10:30",
+                "2024-01-01 20:00",
+            ],
+            "settled_time": ["2024-01-01 12:00", None, None],
+            "predicted_prob": [0.6, 0.6, 0.6],
+            "odds": [2.0, 2.0, 2.0],
+            "winner": [1, 0, 1],
+        }
+    )
+
+    result = simulate_bankroll_growth(
+        df,
+        initial_bankroll=15.0,
+        strategy="flat",
+        flat_stake=10.0,
+        event_driven=True,
+    )
+
+    assert result["stake"].tolist() == [10.0, 5.0, 10.0]
+    assert result["open_bets"].tolist() == [1, 2, 1]
+    assert result["bankroll"].tolist() == [15.0, 5.0, 20.0]
+    assert result["bankroll_after"].iloc[-1] == 30.0
+
+
+def test_event_driven_uses_settled_time_from_value_bets():
+    """
+    settled_time survives value-bet detection, so a stake is released when
+    its market settles rather than settle_after_min after the start.
+    """
+    predictions = pd.DataFrame(
+        {
+            "match_id": ["a", "b"],
+            "player_1": ["A", "B"],
+            "player_2": ["X", "Y"],
+            "market_time": ["2024-01-01 10:00", "2024-01-01 11:00"],
+            "settled_time": ["2024-01-01 10:45", "2024-01-01 12:30"],
+            "predicted_prob": [0.6, 0.6],
+            "odds": [2.0, 2.0],
+            "winner": [1, 1],
+        }
+    )
+    value_bets = detect_value_bets(predictions)
+    assert value_bets["settled_time"].tolist() == predictions["settled_time"].tolist()
+
+    result = simulate_bankroll_growth(
+        value_bets,
+        initial_bankroll=15.0,
+        strategy="flat",
+        flat_stake=10.0,
+        event_driven=True,
+    )
+    # The first bet settled at 10:45, before the second was placed
+    assert result["open_bets"].tolist() == [1, 1]
+    assert result["stake"].tolist() == [10.0, 10.0]
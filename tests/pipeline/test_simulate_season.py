@@ -0,0 +1,68 @@
+# tests/pipeline/test_simulate_season.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline.simulate_bankroll_growth import simulate_bankroll_growth
+from scripts.pipeline.simulate_season import load_checkpoint, simulate_season
+
+COLUMNS = ["bankroll", "stake", "pnl", "bankroll_after", "peak", "drawdown"]
+
+
+def _season(n: int = 120, seed: int = 2) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "match_id": [f"m{i}" for i in range(n)],
+            "market_time": pd.date_range("2024-01-01", periods=n, freq="6h").astype(
+                str
+            ),
+            "predicted_prob": rng.uniform(0.4, 0.8, n),
+            "odds": rng.uniform(1.5, 3.5, n),
+            "winner": rng.integers(0, 2, n),
+        }
+    )
+
+
+def test_new_bets_resume_from_checkpoint(tmp_path):
+    """
+    Appending a tournament simulates only its bets, and the season matches a
+    simulation of all bets from scratch.
+    """
+    season = _season()
+    _, n_first = simulate_season(season.iloc[:80], state_dir=str(tmp_path))
+    assert n_first == 80
+
+    # Later tournament lands; rows arrive in a different file order
+    result, n_new = simulate_season(
+        pd.concat([season.iloc[80:], season.iloc[:80]]), state_dir=str(tmp_path)
+    )
+    assert n_new == 40
+    expected = simulate_bankroll_growth(season)
+    np.testing.assert_allclose(result[COLUMNS], expected[COLUMNS])
+
+    checkpoint = load_checkpoint(str(tmp_path), "kelly")
+    assert checkpoint is not None
+    assert checkpoint["n_bets"] == 120
+    assert checkpoint["last_key"][1] == "m119"
+    assert np.isclose(checkpoint["bankroll"], expected["bankroll_after"].iloc[-1])
+
+    _, n_again = simulate_season(season, state_dir=str(tmp_path))
+    assert n_again == 0
+
+
+def test_changed_earlier_bets_trigger_rebuild(tmp_path):
+    """
+    A corrected result among already simulated bets fails the digest check
+    and the season is simulated from scratch.
+    """
+    season = _season()
+    simulate_season(season.iloc[:80], state_dir=str(tmp_path), strategy="flat")
+    season.loc[10, "winner"] = 1 - season.loc[10, "winner"]
+
+    result, n_simulated = simulate_season(
+        season, state_dir=str(tmp_path), strategy="flat"
+    )
+    assert n_simulated == 120
+    expected = simulate_bankroll_growth(season, strategy="flat")
+    np.testing.assert_allclose(result[COLUMNS], expected[COLUMNS])
@@ -0,0 +1,96 @@
+# tests/pipeline/test_stream_value_bets.py
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline.stream_value_bets import (
+    StreamingValueBetDetector,
+    replay_ticks,
+)
+from scripts.utils.snapshot_parser import SnapshotParser
+
+PROBS = pd.DataFrame(
+    {
+        "market_id": ["1.1", "1.1", "1.2", "1.2"],
+        "selection_id": [11, 12, 21, 22],
+        "predicted_prob": [0.6, 0.4, 0.7, 0.3],
+    }
+)
+
+
+def test_hysteresis_suppresses_flapping():
+    """
+    A selection enters at the EV threshold and only exits once EV falls
+    below threshold - hysteresis, however often it crosses the threshold.
+    """
+    detector = StreamingValueBetDetector(
+        PROBS, ev_threshold=0.05, confidence_threshold=0.5, ev_hysteresis=0.02
+    )
+    # EV at prob 0.6: 1.76 -> 0.056, 1.74 -> 0.044, 1.70 -> 0.02
+    prices = [1.60, 1.76, 1.74, 1.76, 1.74, 1.70, 1.76]
+    signals = [detector.on_tick("1.1", 11, ltp, t) for t, ltp in enumerate(prices)]
+
+    kinds = [(s["timestamp"], s["signal"]) for s in signals if s is not None]
+    assert kinds == [(1, "enter"), (5, "exit"), (6, "enter")]
+    # Unknown selections and non-prices are ignored
+    assert detector.on_tick("9.9", 1, 3.0) is None
+    assert detector.on_tick("1.1", 11, None) is None
+
+
+def test_replay_matches_streaming_detector():
+    """
+    The vectorised replay emits exactly the streaming detector's signals,
+    including margin-gated entries once both runners are priced.
+    """
+    rng = np.random.default_rng(7)
+    n = 5_000
+    ticks = pd.DataFrame(
+        {
+            "market_id": rng.choice(["1.1", "1.2", "1.3"], n),
+            "selection_id": rng.choice([11, 12, 21, 22], n),
+            "timestamp": np.arange(n),
+            "ltp": np.round(rng.uniform(1.01, 4.0, n), 2),
+        }
+    )
+    thresholds = dict(
+        ev_threshold=0.05,
+        confidence_threshold=0.3,
+        max_odds=3.5,
+        max_margin=1.1,
+        ev_hysteresis=0.03,
+    )
+    detector = StreamingValueBetDetector(PROBS, **thresholds)
+    streamed = pd.DataFrame(detector.run(ticks.to_dict("records")))
+    replayed = replay_ticks(ticks, PROBS, **thresholds)
+
+    assert len(streamed) > 10
+    assert streamed["signal"].eq("exit").any()
+    pd.testing.assert_frame_equal(streamed, replayed, check_dtype=False)
+
+
+def test_iter_file_streams_parse_file_rows(tmp_path):
+    """
+    iter_file yields the same rows as parse_file, lazily.
+    """
+    lines = [
+        {
+            "op": "mcm",
+            "pt": 1000 + i,
+            "mc": [{"id": "1.1", "rc": [{"id": 11, "ltp": 2.0 + i / 100}]}],
+        }
+        for i in range(3)
+    ]
+    path = tmp_path / "stream.txt"
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\nnot json\n")
+    parser = SnapshotParser(mode="ltp_only")
+
+    stream = parser.iter_file(str(path))
+    assert next(stream) == {
+        "market_id": "1.1",
+        "timestamp": 1000,
+        "selection_id": 11,
+        "ltp": 2.0,
+    }
+    assert [next(stream)] + list(stream) == parser.parse_file(str(path))[1:]
@@ -0,0 +1,102 @@
+# tests/pipeline/test_walk_forward.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.pipeline.walk_forward import load_tournaments, walk_forward
+
+
+def _tournament(path, start: str, n: int = 120, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    p1 = rng.uniform(0.15, 0.85, n)
+    margin = rng.uniform(1.0, 1.08, n)
+    ip1, ip2 = p1 * margin, (1 - p1) * margin
+    pd.DataFrame(
+        {
+            "match_id": [f"{start}-{i}" for i in range(n)],
+            "market_time": pd.date_range(start, periods=n, freq="2h").astype(str),
+            "player_1": "A",
+            "player_2": "B",
+            "implied_prob_1": ip1,
+            "implied_prob_2": ip2,
+            "implied_prob_diff": ip1 - ip2,
+            "odds_margin": margin,
+            "odds_player_1": 1 / ip1 * 1.15,
+            "winner": (rng.random(n) < p1).astype(int),
+        }
+    ).to_csv(path, index=False)
+
+
+@pytest.fixture
+def season(tmp_path):
+    _tournament(tmp_path / "ausopen_atp.csv", "2024-01-14", seed=1)
+    _tournament(tmp_path / "ausopen_wta.csv", "2024-01-14", seed=2)
+    _tournament(tmp_path / "frenchopen_atp.csv", "2024-05-26", seed=3)
+    _tournament(tmp_path / "wimbledon_atp.csv", "2024-07-01", seed=4)
+    return tmp_path
+
+
+def test_folds_only_train_on_finished_tournaments(season, tmp_path):
+    """
+    Concurrent tournaments never train on each other; each later fold trains
+    on everything that ended before it, and the ledger carries one bankroll
+    through the season in tournament order.
+    """
+    tournaments, rows = load_tournaments(str(season / "*.csv"))
+    assert list(tournaments["tournament"][:2]) == ["ausopen_atp", "ausopen_wta"]
+    assert rows["tournament_code"].nunique() == 4
+
+    ledger, summary = walk_forward(
+        str(season / "*.csv"),
+        algorithm="logreg",
+        ev_threshold=0.0,
+        confidence_threshold=0.0,
+        cache_dir=str(tmp_path / "cache"),
+    )
+    assert list(summary["tournament"]) == ["frenchopen_atp", "wimbledon_atp"]
+    assert list(summary["train_tournaments"]) == [2, 3]
+    assert list(summary["train_rows"]) == [240, 360]
+    assert set(ledger["tournament"]) <= {"frenchopen_atp", "wimbledon_atp"}
+    assert len(ledger) == summary["bets"].sum() > 0
+    assert ledger["tournament"].is_monotonic_increasing
+    assert np.allclose(ledger["bankroll"].iloc[1:], ledger["bankroll_after"].iloc[:-1])
+    assert summary["pnl"].sum() == pytest.approx(ledger["pnl"].sum())
+
+
+def test_rerun_reuses_cached_models(season, tmp_path):
+    """
+    A second run loads every fold's model from the cache; adding a
+    tournament only fits its own fold.
+    """
+    kwargs = dict(algorithm="logreg", cache_dir=str(tmp_path / "cache"))
+    first_ledger, first = walk_forward(str(season / "*.csv"), **kwargs)
+    assert not first["model_cached"].any()
+    ledger, again = walk_forward(str(season / "*.csv"), **kwargs)
+    assert again["model_cached"].all()
+    pd.testing.assert_frame_equal(ledger, first_ledger)
+
+    _tournament(season / "usopen_atp.csv", "2024-08-26", seed=5)
+    _, extended = walk_forward(str(season / "*.csv"), **kwargs)
+    assert list(extended["model_cached"]) == [True, True, False]
+
+
+def test_concurrent_tournaments_compound_in_time_order(tmp_path):
+    """
+    Bets of two overlapping test tournaments are simulated in the order they
+    were placed, not file by file.
+    """
+    _tournament(tmp_path / "ausopen_atp.csv", "2024-01-14", seed=1)
+    _tournament(tmp_path / "rome_atp.csv", "2024-05-08", seed=2)
+    _tournament(tmp_path / "rome_wta.csv", "2024-05-08 01:00", seed=3)
+    ledger, _ = walk_forward(
+        str(tmp_path / "*.csv"),
+        algorithm="logreg",
+        ev_threshold=0.0,
+        confidence_threshold=0.0,
+        cache_dir=str(tmp_path / "cache"),
+    )
+    assert set(ledger["tournament"]) == {"rome_atp", "rome_wta"}
+    assert ledger["placed_at"].is_monotonic_increasing
+    assert not ledger["tournament"].is_monotonic_increasing
+    assert np.allclose(ledger["bankroll"].iloc[1:], ledger["bankroll_after"].iloc[:-1])
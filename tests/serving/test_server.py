@@ -0,0 +1,86 @@
+# tests/serving/test_server.py
+
+import asyncio
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from scripts.pipeline.detect_value_bets import detect_value_bets
+from scripts.serving.load_test import run_load_test
+from scripts.serving.server import MicroBatcher, serve
+from scripts.utils.betting_math import add_ev_and_kelly
+
+FEATURES = ["implied_prob_1", "implied_prob_2"]
+
+
+def _model() -> LogisticRegression:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(size=(200, 2)), columns=FEATURES)
+    return LogisticRegression().fit(X, (X["implied_prob_1"] > 0.5).astype(int))
+
+
+def test_micro_batcher_batches_requests_and_matches_detect_math():
+    """
+    Tests that concurrent requests are scored in one model call and that
+    EV, Kelly and the value-bet flag agree with detect_value_bets.
+    """
+    model = _model()
+    rng = np.random.default_rng(1)
+    rows = [
+        {
+            "implied_prob_1": float(p1),
+            "implied_prob_2": float(p2),
+            "odds": float(o),
+        }
+        for p1, p2, o in zip(rng.uniform(size=10), rng.uniform(size=10), [2.5] * 10)
+    ]
+
+    async def score_all():
+        batcher = MicroBatcher(model, FEATURES, max_wait_ms=20)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.score([row]) for row in rows))
+        await batcher.stop()
+        return batcher, [r[0] for r in results]
+
+    batcher, results = asyncio.run(score_all())
+
+    expected = pd.DataFrame(rows)
+    expected["match_id"] = [f"m{i}" for i in range(len(rows))]
+    expected["player_1"], expected["player_2"] = "A", "B"
+    expected["predicted_prob"] = model.predict_proba(expected[FEATURES])[:, 1]
+    expected = add_ev_and_kelly(expected)
+    value_bets = set(detect_value_bets(expected)["match_id"])
+
+    assert batcher.batches == 1
+    for i, result in enumerate(results):
+        assert np.isclose(result["expected_value"], expected["expected_value"][i])
+        assert np.isclose(result["kelly_fraction"], expected["kelly_fraction"][i])
+        assert result["value_bet"] == (f"m{i}" in value_bets)
+
+
+def test_serve_over_unix_socket(tmp_path):
+    """
+    Tests an end-to-end load run against the HTTP service on a Unix socket.
+    """
+    model_file = tmp_path / "model.joblib"
+    joblib.dump(_model(), model_file)
+    socket_path = str(tmp_path / "score.sock")
+
+    async def run():
+        ready = asyncio.Event()
+        server = asyncio.create_task(
+            serve(str(model_file), unix_socket=socket_path, ready=ready)
+        )
+        await ready.wait()
+        summary = await run_load_test(
+            unix_socket=socket_path, concurrency=4, requests_per_client=5
+        )
+        server.cancel()
+        return summary
+
+    summary = asyncio.run(run())
+
+    assert summary["requests"] == 20
+    assert summary["errors"] == 0
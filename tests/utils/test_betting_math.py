@@ -3,7 +3,14 @@
 import numpy as np
 import pandas as pd
 
-from scripts.utils.betting_math import add_ev_and_kelly
+from scripts.utils.betting_math import (
+    add_ev_and_kelly,
+    bet_returns,
+    compute_kelly_stake_capped,
+    expected_value,
+    kelly_fraction,
+    net_odds,
+)
 
 
 def test_add_ev_and_kelly():
@@ -34,3 +41,74 @@ def test_add_ev_and_kelly():
     assert "kelly_fraction" in result_df.columns
     assert np.allclose(result_df["expected_value"], expected_ev)
     assert np.allclose(result_df["kelly_fraction"], expected_kelly)
+
+
+def test_add_ev_and_kelly_only_fills_its_own_columns():
+    """
+    NaN results are zeroed in the new columns only; other columns and the
+    input frame are untouched.
+    """
+    df = pd.DataFrame(
+        {"predicted_prob": [0.5, np.nan], "odds": [2.5, 3.0], "note": [np.nan, 1.0]}
+    )
+
+    result_df = add_ev_and_kelly(df)
+
+    assert result_df["expected_value"].tolist() == [0.25, 0.0]
+    assert result_df["note"].isna().tolist() == [True, False]
+    assert "expected_value" not in df.columns
+
+
+def test_kelly_kernels_fraction_cap_and_commission():
+    """
+    Commission reduces net odds; fractional Kelly scales and the capped stake
+    is clipped to [0, max_fraction].
+    """
+    prob = np.array([0.5, 0.2, 0.9])
+    odds = np.array([2.5, 5.0, 1.5])
+
+    net = net_odds(odds, commission=0.05)
+    assert np.allclose(net, [1.425, 3.8, 0.475])
+    assert np.allclose(
+        expected_value(prob, odds, commission=0.05), prob * net - (1 - prob)
+    )
+
+    full = kelly_fraction(prob, odds)
+    assert np.allclose(kelly_fraction(prob, odds, fraction=0.5), full / 2)
+    assert np.allclose(
+        compute_kelly_stake_capped(prob, odds, cap=0.2, fraction=0.5),
+        np.clip(full / 2, 0, 0.2),
+    )
+
+
+def test_capped_kelly_keeps_the_legacy_call_signature():
+    """
+    compute_kelly_stake_capped(prob, odds, bankroll, cap) returns the stake in
+    bankroll units, capped at `cap` of it and zero for odds that pay nothing.
+    """
+    assert np.isclose(compute_kelly_stake_capped(0.6, 2.0, 100.0, cap=0.05), 5.0)
+    assert np.isclose(compute_kelly_stake_capped(0.52, 2.0, 100.0), 4.0)
+    assert compute_kelly_stake_capped(0.6, 1.0, 100.0) == 0.0
+    assert np.allclose(
+        compute_kelly_stake_capped([0.4, 0.6], [2.0, 0.5], 10.0, 0.5), [0.0, 0.0]
+    )
+
+
+def test_kernels_write_into_preallocated_output():
+    """
+    Kernels write into `out` in place and return it, broadcasting scalars.
+    """
+    out = np.empty(3)
+
+    result = kelly_fraction([0.5, 0.6, 0.7], 2.0, out=out)
+    assert result is out
+    assert np.allclose(out, [0.0, 0.2, 0.4])
+
+    returns = bet_returns([10.0, 10.0, 5.0], [2.0, 3.0, 4.0], [1, 0, 1], 0.05, out=out)
+    assert returns is out
+    assert np.allclose(out, [9.5, -10.0, 14.25])
+
+
+def test_bet_returns_of_unsettled_bets_are_zero():
+    returns = bet_returns([10.0, 10.0, 10.0], 2.0, [1.0, np.nan, 0.0])
+    assert np.allclose(returns, [10.0, 0.0, -10.0])
@@ -0,0 +1,58 @@
+# tests/utils/test_event_simulation.py
+
+import numpy as np
+
+from scripts.utils.event_simulation import exposure_summary, simulate_events
+from scripts.utils.simulation import simulate_bankroll_path
+
+
+def test_sequential_bets_match_path_kernel():
+    """
+    When every bet settles before the next is placed, the event-driven run
+    reproduces the sequential bankroll path.
+    """
+    rng = np.random.default_rng(4)
+    n = 200
+    odds = rng.uniform(1.3, 4.0, n)
+    won = rng.integers(0, 2, n).astype(bool)
+    fractions = rng.uniform(0.0, 0.1, n)
+    placed = np.arange(n) * 10
+    per_bet, _ = simulate_events(placed, placed + 10, odds, won, fractions)
+    path = simulate_bankroll_path(odds, won, fractions)
+    for col in ["bankroll", "stake", "pnl", "bankroll_after", "peak", "drawdown"]:
+        np.testing.assert_allclose(per_bet[col], path[col])
+
+
+def test_overlapping_bets_stake_from_available_balance():
+    """
+    Stakes are locked until settlement, later bets are sized from what is
+    left, and a settlement at a placement time frees its funds first.
+    """
+    per_bet, timeline = simulate_events(
+        placed=[0, 1, 5],
+        settled=[5, 3, 6],
+        odds=[2.0, 3.0, 2.0],
+        won=[True, False, True],
+        fractions=0.5,
+        initial_bankroll=100.0,
+    )
+    # Bet 1 is placed while bet 0 holds 50; bet 2 after both have settled
+    assert per_bet["bankroll"].tolist() == [100.0, 50.0, 125.0]
+    assert per_bet["stake"].tolist() == [50.0, 25.0, 62.5]
+    assert per_bet["pnl"].tolist() == [50.0, -25.0, 62.5]
+    assert per_bet["exposure"].tolist() == [50.0, 75.0, 62.5]
+    assert per_bet["bankroll_after"].tolist() == [125.0, 75.0, 187.5]
+    assert timeline["event"].tolist() == [
+        "place",
+        "place",
+        "settle",
+        "settle",
+        "place",
+        "settle",
+    ]
+
+    summary = exposure_summary(timeline)
+    assert summary["max_exposure"] == 75.0
+    assert summary["max_open_bets"] == 2
+    assert summary["final_equity"] == 187.5
+    assert summary["max_drawdown"] == 25.0
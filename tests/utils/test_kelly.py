@@ -0,0 +1,72 @@
+# tests/utils/test_kelly.py
+
+import numpy as np
+
+from scripts.utils.kelly import simultaneous_kelly, simultaneous_kelly_windows
+
+
+def _gradient(prob, odds, f):
+    """
+    Exact gradient of expected log growth by enumerating outcomes.
+    """
+    n = len(prob)
+    wins = ((np.arange(2**n)[:, None] >> np.arange(n)) & 1).astype(bool)
+    weights = np.where(wins, prob, 1 - prob).prod(axis=1)
+    returns = np.where(wins, odds - 1, -1.0)
+    return (returns * (weights / (1 + returns @ f))[:, None]).sum(axis=0)
+
+
+def test_single_bet_matches_closed_form_kelly():
+    """
+    With one bet the solver recovers p - (1 - p) / b, and nothing for -EV.
+    """
+    fractions = simultaneous_kelly([0.6, 0.3], [2.0, 2.5])
+
+    assert np.allclose(simultaneous_kelly([0.6], [2.0]), [0.2])
+    assert np.allclose(simultaneous_kelly([0.3], [2.5]), [0.0])
+    assert fractions[1] == 0.0
+
+
+def test_exact_solution_satisfies_optimality_conditions():
+    """
+    Staked bets share the same marginal growth (the exposure cap's
+    multiplier, or 0 when uncapped) and unstaked bets do not exceed it.
+    """
+    rng = np.random.default_rng(1)
+    prob = rng.uniform(0.45, 0.7, 8)
+    odds = rng.uniform(1.6, 2.6, 8)
+    independent = np.clip(prob - (1 - prob) / (odds - 1), 0, None)
+
+    for cap in (0.95, 0.3):
+        f = simultaneous_kelly(prob, odds, max_exposure=cap)
+        gradient = _gradient(prob, odds, f)
+        staked = f > 1e-9
+        level = gradient[staked].max()
+        assert np.allclose(gradient[staked], level, atol=1e-6)
+        assert (gradient[~staked] <= level + 1e-6).all()
+        assert f.sum() <= cap + 1e-9
+        # Concurrent bets are sized more conservatively than independent Kelly
+        assert f.sum() < independent.sum()
+
+
+def test_windows_batch_matches_per_window_and_monte_carlo_is_close():
+    """
+    Batched windows give the per-window solutions, and the Monte Carlo
+    approximation for large windows lands close to exact enumeration.
+    """
+    rng = np.random.default_rng(2)
+    prob = rng.uniform(0.4, 0.75, 30)
+    odds = rng.uniform(1.5, 3.0, 30)
+    windows = np.repeat([3, 1, 2], [4, 10, 16])
+
+    batched = simultaneous_kelly_windows(prob, odds, windows, exact_max_bets=10)
+    for w in (1, 3):
+        mask = windows == w
+        assert np.allclose(batched[mask], simultaneous_kelly(prob[mask], odds[mask]))
+
+    mask = windows == 1
+    exact = simultaneous_kelly(prob[mask], odds[mask])
+    sampled = simultaneous_kelly(
+        prob[mask], odds[mask], exact_max_bets=4, n_samples=50_000
+    )
+    assert np.abs(sampled - exact).max() < 0.02
@@ -0,0 +1,70 @@
+# tests/utils/test_player_identity.py
+
+import pandas as pd
+
+from scripts.utils.player_identity import (
+    PlayerIdentityStore,
+    PlayerResolver,
+    build_sackmann_roster,
+)
+
+
+def test_resolver_writes_back_and_reuses_store(tmp_path):
+    """
+    Tests that resolutions are persisted and that a fresh resolver answers
+    from the store without needing the roster.
+    """
+    sackmann = pd.DataFrame(
+        {
+            "winner_id": [206173, 106421],
+            "winner_name": ["Jannik Sinner", "Daniil Medvedev"],
+            "loser_id": [106421, 207989],
+            "loser_name": ["Daniil Medvedev", "Carlos Alcaraz"],
+        }
+    )
+    roster = build_sackmann_roster(sackmann)
+    db = tmp_path / "identity.sqlite"
+
+    with PlayerIdentityStore(str(db)) as store:
+        resolver = PlayerResolver(
+            roster, store, alias_map={"J. Sinner": "Jannik Sinner"}
+        )
+        assert resolver.resolve("J. Sinner", selection_id=1001) == (
+            206173,
+            "Jannik Sinner",
+        )
+        assert resolver.resolve("daniil  medvedev") == (106421, "Daniil Medvedev")
+        assert resolver.resolve("Carlos Alcaras") == (207989, "Carlos Alcaraz")
+        assert resolver.resolve("Nobody Known") is None
+
+    with PlayerIdentityStore(str(db)) as store:
+        hit = store.lookup("selection_id", "1001.0")
+        assert hit is not None and hit["provenance"] == "alias"
+        assert store.lookup("name", "daniil medvedev")["provenance"] == "exact"
+        fuzzy = store.lookup("name", "Carlos Alcaras")
+        assert fuzzy["provenance"] == "fuzzy" and 0.85 <= fuzzy["confidence"] < 1.0
+
+        # An empty roster can still resolve everything seen before
+        resolver = PlayerResolver({}, store)
+        df = pd.DataFrame({"runner": ["J. Sinner", "Carlos Alcaras"]})
+        resolved = resolver.resolve_frame(df, "runner")
+        assert resolved["player_id"].tolist() == [206173, 207989]
+
+
+def test_alias_map_overrides_stored_identity(tmp_path):
+    """
+    Tests that a wrong stored fuzzy match is corrected by a later alias entry.
+    """
+    roster = {"Alex de Minaur": 200282, "Alex Michelsen": 210097}
+    with PlayerIdentityStore(str(tmp_path / "identity.sqlite")) as store:
+        store.record("name", "Alex Minaur", 210097, "Alex Michelsen", 0.9, "fuzzy")
+        resolver = PlayerResolver(
+            roster, store, alias_map={"Alex Minaur": "Alex de Minaur"}
+        )
+        assert resolver.resolve("Alex Minaur") == (200282, "Alex de Minaur")
+        hit = store.lookup("name", "Alex Minaur")
+        assert hit["provenance"] == "alias" and hit["confidence"] == 1.0
+
+        # A fuzzy match never replaces the alias
+        resolver = PlayerResolver(roster, store)
+        assert resolver.resolve("Alex Minaur") == (200282, "Alex de Minaur")
@@ -24,6 +24,18 @@ def test_normalize_columns():
     assert all(col in normalized_df.columns for col in expected_columns)
 
 
+def test_normalize_columns_keeps_odds_margin():
+    """
+    odds_margin is a feature in its own right and is not merged into odds.
+    """
+    df = pd.DataFrame({"odds": [2.5], "odds_margin": [1.05]})
+
+    normalized_df = normalize_columns(df)
+
+    assert normalized_df["odds"].tolist() == [2.5]
+    assert normalized_df["odds_margin"].tolist() == [1.05]
+
+
 def test_enforce_schema():
     """
     Tests that enforce_schema adds missing columns.
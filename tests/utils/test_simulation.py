@@ -0,0 +1,80 @@
+# tests/utils/test_simulation.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline.simulate_bankroll_growth import simulate_bankroll_growth
+from scripts.utils.simulation import simulate_bankroll_path
+
+
+def _bets(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "match_id": np.arange(n),
+            "predicted_prob": rng.uniform(0.3, 0.8, n),
+            "odds": rng.uniform(1.3, 4.0, n),
+            "winner": rng.integers(0, 2, n),
+        }
+    )
+
+
+def _loop(odds, won, fractions, initial, max_stake=np.inf):
+    """
+    Reference per-bet loop: stake min(f * bankroll, max_stake).
+    """
+    bankroll, path = initial, []
+    for o, w, f in zip(odds, won, fractions):
+        path.append(bankroll)
+        stake = min(f * bankroll, max_stake)
+        bankroll += stake * (o - 1) if w else -stake
+    return np.array(path)
+
+
+def test_kelly_simulation_matches_row_loop():
+    """
+    The vectorised Kelly path matches the original df.at row loop, and the
+    peak/drawdown columns follow the bankroll after each bet.
+    """
+    df = _bets(500)
+    result = simulate_bankroll_growth(df, initial_bankroll=1000.0)
+
+    expected = _loop(df["odds"], df["winner"], result["kelly_fraction"], 1000.0)
+    assert np.allclose(result["bankroll"], expected, rtol=1e-10)
+    assert np.allclose(result["bankroll_after"], result["bankroll"] + result["pnl"])
+    assert np.allclose(
+        result["peak"], np.maximum.accumulate(result["bankroll_after"].clip(1000.0))
+    )
+    assert (result["drawdown"] >= 0).all()
+
+
+def test_capped_and_flat_staking_match_loop():
+    """
+    Capped proportional and flat staking switch between multiplicative and
+    additive regimes exactly where the per-bet loop does.
+    """
+    df = _bets(2_000, seed=1)
+    odds, won = df["odds"].to_numpy(), df["winner"].to_numpy()
+    fractions = np.full(len(df), 0.05)
+
+    capped = simulate_bankroll_path(
+        odds, won, fractions, initial_bankroll=100.0, max_stake=8.0
+    )
+    expected = _loop(odds, won, fractions, 100.0, max_stake=8.0)
+    assert np.allclose(capped["bankroll"], expected, rtol=1e-9)
+    assert (capped["stake"] == 8.0).any() and (capped["stake"] < 8.0).any()
+
+    flat = simulate_bankroll_path(odds, won, initial_bankroll=30.0, flat_stake=10.0)
+    assert np.allclose(flat["bankroll"], _loop(odds, won, np.ones(len(df)), 30.0, 10.0))
+
+
+def test_initial_peak_carries_drawdown_over():
+    """
+    Continuing from an earlier peak measures drawdown against it.
+    """
+    path = simulate_bankroll_path(
+        [2.0, 2.0], [True, False], [0.1, 0.1], initial_bankroll=90.0, initial_peak=120.0
+    )
+
+    assert path["peak"].tolist() == [120.0, 120.0]
+    assert np.allclose(path["drawdown"], [21.0, 30.9])